@@ -0,0 +1,343 @@
+"""
+A load generator for the pricing API.
+
+It replays synthetic bond payloads against /calculate_bond, or in batches against /calculate_bonds, either with a
+fixed number of concurrent clients (closed loop) or at a fixed arrival rate (open loop), and reports throughput and
+the latency distribution. By default the requests go to the app in this process through httpx's ASGI transport, so
+no server or network is needed and the pricing worker settings can be varied from the command line; with --url
+they go to a running server instead.
+
+In open-loop mode every request's latency is measured from the time it was due to be sent, so when the API falls
+behind the queueing delay shows up in the percentiles instead of silently lowering the offered rate.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+import numpy as np
+
+from bond_pricing.bond_pricing.metrics import LATENCY_BUCKETS
+
+PERCENTILES = (50, 95, 99)
+ENDPOINTS = ('calculate_bond', 'calculate_bonds')
+
+
+def synthetic_payloads(count, seed=0, today=None):
+    """
+    Generates BondInput payloads for fixed-rate corporate bonds issued in the last 20 years and maturing up to 30
+    years after issue, with coupons on a 1/8 grid.
+
+    Args:
+        count (int): The number of payloads.
+        seed (int or Sequence[int]): The seed of the random generator, so runs replay the same bonds.
+        today (np.datetime64, optional): The reference date, today by default.
+
+    Returns:
+        list: The payloads as JSON-ready dicts.
+    """
+    rng = np.random.default_rng(seed)
+    today = np.datetime64('today', 'D') if today is None else np.datetime64(today, 'D')
+    issue = today - rng.integers(30, 20 * 365, count)
+    maturity = np.maximum(issue + rng.integers(365, 30 * 365, count), today + rng.integers(30, 365, count))
+    coupon = np.round(rng.uniform(0.5, 8.0, count) * 8) / 800
+    years = (maturity - issue).astype(np.float64) / 365.25
+    return [{"bond_type": "Corporate", "face_value": 1000, "coupon_rate": float(rate), "maturity": float(tenor),
+             "issue_date": str(start), "maturity_date": str(end)}
+            for rate, tenor, start, end in zip(coupon, years, issue, maturity)]
+
+
+class RequestBodies:
+    """
+    The JSON bodies of a load run, indexed by request number: single payloads for /calculate_bond and lists of
+    payloads for /calculate_bonds.
+
+    By default every request gets new bonds. They are generated a block of requests at a time as the run reaches
+    them, so a run bounded only by its duration never repeats a body and never holds more than one block. With a
+    number of distinct bonds, those are generated up front and the requests cycle through them.
+
+    Attributes
+    ----------
+    per_request : int
+        The bonds per request.
+    distinct : int or None
+        The number of distinct bonds replayed, or None for new bonds in every request.
+    seed : int
+        The seed of the synthetic bonds.
+    """
+
+    # Requests generated together when every request gets new bonds
+    BLOCK_SIZE = 1000
+
+    def __init__(self, per_request=1, distinct=None, seed=0):
+        self.per_request = per_request
+        self.distinct = distinct
+        self.seed = seed
+        self._today = np.datetime64('today', 'D')
+        if distinct is not None:
+            self._bodies = self._generate(max(distinct, per_request), seed)
+        else:
+            self._block = None
+            self._bodies = None
+
+    def _generate(self, count, seed):
+        payloads = synthetic_payloads(count, seed, self._today)
+        if self.per_request == 1:
+            return payloads
+        return [payloads[start:start + self.per_request]
+                for start in range(0, len(payloads) - self.per_request + 1, self.per_request)]
+
+    def __getitem__(self, index):
+        if self.distinct is not None:
+            return self._bodies[index % len(self._bodies)]
+        block, offset = divmod(index, self.BLOCK_SIZE)
+        if block != self._block:
+            self._bodies = self._generate(self.BLOCK_SIZE * self.per_request, (self.seed, block))
+            self._block = block
+        return self._bodies[offset]
+
+
+class LoadReport:
+    """
+    The outcome of a load run.
+
+    Attributes
+    ----------
+    latencies : np.ndarray
+        The latency of every request in seconds, in the order they completed.
+
+    statuses : np.ndarray
+        The HTTP status of every request, 0 for requests that failed without a response.
+
+    elapsed : float
+        The wall-clock duration of the run in seconds.
+
+    bonds_per_request : int
+        The number of bonds priced by each request.
+
+    Methods
+    -------
+    histogram():
+        Returns the number of successful requests in each latency bucket, as (upper bound in seconds, count)
+        pairs ending with '+Inf'.
+
+    summary():
+        Returns the counts, throughput and latency percentiles as a dict.
+
+    format():
+        Returns the summary as printable lines.
+    """
+    def __init__(self, latencies, statuses, elapsed, bonds_per_request=1):
+        self.latencies = np.asarray(latencies, dtype=np.float64)
+        self.statuses = np.asarray(statuses, dtype=np.int64)
+        self.elapsed = elapsed
+        self.bonds_per_request = bonds_per_request
+
+    @property
+    def _ok(self):
+        return self.latencies[self.statuses == 200]
+
+    def histogram(self):
+        counts = np.bincount(np.searchsorted(LATENCY_BUCKETS, self._ok, side='left'),
+                             minlength=len(LATENCY_BUCKETS) + 1)
+        return list(zip(list(LATENCY_BUCKETS) + ["+Inf"], counts.tolist()))
+
+    def summary(self):
+        ok = self._ok
+        elapsed = max(self.elapsed, 1e-12)
+        summary = {
+            "requests": int(self.statuses.size),
+            "ok": int(ok.size),
+            "rejected": int(np.count_nonzero(self.statuses == 429)),
+            "errors": int(np.count_nonzero((self.statuses != 200) & (self.statuses != 429))),
+            "elapsed_seconds": self.elapsed,
+            "requests_per_second": ok.size / elapsed,
+            "bonds_per_second": ok.size * self.bonds_per_request / elapsed,
+            "latency_mean": float(ok.mean()) if ok.size else None,
+            "latency_max": float(ok.max()) if ok.size else None,
+        }
+        for percentile, value in zip(PERCENTILES, np.percentile(ok, PERCENTILES) if ok.size else [None] * 3):
+            summary[f"latency_p{percentile}"] = None if value is None else float(value)
+        summary["histogram"] = self.histogram()
+        return summary
+
+    def format(self):
+        summary = self.summary()
+        lines = [f"requests {summary['requests']:,}  ok {summary['ok']:,}  rejected (429) {summary['rejected']:,}  "
+                 f"errors {summary['errors']:,}  in {summary['elapsed_seconds']:.2f}s",
+                 f"throughput {summary['requests_per_second']:,.1f} requests/s  "
+                 f"{summary['bonds_per_second']:,.1f} bonds/s"]
+        if summary['ok']:
+            lines.append("latency  " + "  ".join(f"{name[8:]} {summary[name] * 1000:.2f}ms" for name in
+                                                 ["latency_mean"] + [f"latency_p{p}" for p in PERCENTILES]
+                                                 + ["latency_max"]))
+            widest = max(count for _, count in summary['histogram'])
+            for bound, count in summary['histogram']:
+                if count:
+                    label = bound if isinstance(bound, str) else f"{bound * 1000:g}ms"
+                    lines.append(f"  <= {label:>8} {count:>8,} {'#' * max(round(40 * count / widest), 1)}")
+        return lines
+
+
+async def _post(client, path, body):
+    try:
+        response = await client.post(path, json=body)
+        return response.status_code
+    except httpx.HTTPError:
+        return 0
+
+
+async def generate_load(client, bodies, path, requests=None, duration=None, concurrency=None, rate=None):
+    """
+    Sends requests until `requests` have been sent or `duration` seconds have passed.
+
+    Args:
+        client (httpx.AsyncClient): The client, with its base URL or ASGI transport set.
+        bodies (RequestBodies): The JSON body of each request, by request number.
+        path (str): The endpoint path.
+        requests (int, optional): The number of requests to send.
+        duration (float, optional): The number of seconds to send for.
+        concurrency (int, optional): The number of clients that each send their next request as soon as the
+            previous one is answered.
+        rate (float, optional): The number of requests sent per second, whether or not earlier ones are answered;
+            used when concurrency is None.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, float]: The latencies and statuses of the requests and the elapsed time.
+    """
+    if (concurrency is None) == (rate is None):
+        raise ValueError("Give exactly one of concurrency or rate.")
+    if requests is None and duration is None:
+        raise ValueError("Give a number of requests, a duration or both.")
+    limit = requests if requests is not None else sys.maxsize
+    latencies, statuses = [], []
+    start = time.perf_counter()
+    deadline = start + duration if duration is not None else np.inf
+
+    async def timed(body, due):
+        status = await _post(client, path, body)
+        latencies.append(time.perf_counter() - due)
+        statuses.append(status)
+
+    if concurrency is not None:
+        sent = 0
+
+        async def worker():
+            nonlocal sent
+            while sent < limit and time.perf_counter() < deadline:
+                body = bodies[sent]
+                sent += 1
+                await timed(body, time.perf_counter())
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    else:
+        tasks = []
+        for index in range(limit):
+            due = start + index / rate
+            if due >= deadline:
+                break
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(timed(bodies[index], due)))
+        await asyncio.gather(*tasks)
+    return np.array(latencies), np.array(statuses), time.perf_counter() - start
+
+
+async def run(url=None, endpoint='calculate_bond', requests=None, duration=None, concurrency=None, rate=None,
+              distinct=None, batch_size=100, seed=0, warmup=0):
+    """
+    Runs a load test against a server, or against the app in this process when no URL is given.
+
+    Args:
+        url (str, optional): The base URL of a running server.
+        endpoint (str): 'calculate_bond', or 'calculate_bonds' to send batch_size bonds per request.
+        requests (int, optional): The number of requests to send.
+        duration (float, optional): The number of seconds to send for.
+        concurrency (int, optional): The number of closed-loop clients.
+        rate (float, optional): The open-loop arrival rate in requests per second.
+        distinct (int, optional): The number of distinct bonds replayed; fewer than the requests means repeats,
+            which the response cache may answer. By default every request gets new bonds, however long the run.
+        batch_size (int): The bonds per /calculate_bonds request.
+        seed (int): The seed of the synthetic bonds.
+        warmup (int): Requests sent before the measured run, e.g. to start the pricing workers.
+
+    Returns:
+        LoadReport: The measured run.
+    """
+    if endpoint not in ENDPOINTS:
+        raise ValueError(f"Unknown endpoint {endpoint!r}, expected one of {ENDPOINTS}")
+    per_request = 1 if endpoint == 'calculate_bond' else batch_size
+    bodies = RequestBodies(per_request, distinct, seed)
+    path = f"/{endpoint}"
+
+    pool = None
+    if url is None:
+        from Pricing_API.main import app, pricing_pool
+        pool = pricing_pool
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://pricing", timeout=None)
+    else:
+        limits = httpx.Limits(max_connections=concurrency or None, max_keepalive_connections=concurrency or None)
+        client = httpx.AsyncClient(base_url=url, timeout=None, limits=limits)
+    try:
+        async with client:
+            if warmup:
+                # A separate seed keeps the warm-up bonds out of the response cache of the measured run
+                warm = RequestBodies(per_request, seed=seed + 1)
+                await asyncio.gather(*(_post(client, path, warm[i]) for i in range(warmup)))
+            latencies, statuses, elapsed = await generate_load(client, bodies, path, requests, duration,
+                                                               concurrency, rate)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return LoadReport(latencies, statuses, elapsed, per_request)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m Pricing_API.load_generator',
+                                     description='Replays synthetic bonds against the pricing API and reports '
+                                                 'throughput and latency percentiles.')
+    parser.add_argument('--url', help='a running server, e.g. http://127.0.0.1:8000; the in-process app by default')
+    parser.add_argument('--endpoint', choices=ENDPOINTS, default='calculate_bond', help='the endpoint to load')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--concurrency', type=int, help='closed-loop clients (default 16)')
+    mode.add_argument('--rate', type=float, help='open-loop arrivals per second')
+    parser.add_argument('--requests', type=int, help='requests to send (default 1000 unless --duration is given)')
+    parser.add_argument('--duration', type=float, help='seconds to send for')
+    parser.add_argument('--distinct', type=int, help='distinct bonds replayed (default: a new bond per request)')
+    parser.add_argument('--batch-size', type=int, default=100, help='bonds per /calculate_bonds request')
+    parser.add_argument('--warmup', type=int, default=10, help='unmeasured requests sent first (default 10)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic bonds')
+    parser.add_argument('--workers', type=int, help='PRICING_WORKERS of the in-process app')
+    parser.add_argument('--queue-depth', type=int, help='PRICING_QUEUE_DEPTH of the in-process app')
+    parser.add_argument('--cache-size', type=int, help='RESPONSE_CACHE_SIZE of the in-process app, 0 to disable')
+    parser.add_argument('--output', help='write the summary as JSON to this file')
+    args = parser.parse_args(argv)
+
+    if args.url is not None and any(value is not None for value in (args.workers, args.queue_depth, args.cache_size)):
+        parser.error("--workers, --queue-depth and --cache-size configure the in-process app, not --url")
+    for name, value in (('PRICING_WORKERS', args.workers), ('PRICING_QUEUE_DEPTH', args.queue_depth),
+                        ('RESPONSE_CACHE_SIZE', args.cache_size)):
+        if value is not None:
+            os.environ[name] = str(value)
+    requests = args.requests if args.requests is not None or args.duration is not None else 1000
+    concurrency = args.concurrency if args.concurrency is not None or args.rate is not None else 16
+
+    try:
+        report = asyncio.run(run(args.url, args.endpoint, requests, args.duration, concurrency, args.rate,
+                                 args.distinct, args.batch_size, args.seed, args.warmup))
+    except ValueError as e:
+        parser.exit(2, f"error: {e}\n")
+    for line in report.format():
+        print(line)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report.summary(), f, indent=2)
+        print(f"Summary written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,50 +1,274 @@
-from fastapi import FastAPI, HTTPException
-from bond_pricing.bond_pricing.models import Bond
-from pydantic import BaseModel
-from typing import Optional
-import datetime
-import random
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse, PlainTextResponse
+from starlette.requests import ClientDisconnect
+from Pricing_API.models import BondInput, MarketDataInput
+from Pricing_API.workers import PricingPool, PoolSaturated, price_bond, price_bond_batch, NON_FINITE_ERROR
+from Pricing_API.market_data import MarketDataStore, ResponseCache, cache_key
+from Pricing_API.subscriptions import SubscriptionHub
+from bond_pricing.bond_pricing.metrics import registry as metrics
+import asyncio
+import contextlib
+import json
+import time
 
-app = FastAPI()
 
+# Number of bonds priced together by /calculate_bonds before results are emitted
+BATCH_CHUNK_SIZE = 1000
+BUSY_ERROR = "Error: All pricing workers are busy, please retry."
 
-class BondInput(BaseModel):
-    bond_type: str
-    face_value: int
-    coupon_rate: float
-    maturity: float
-    yield_to_maturity: Optional[float] = None
-    npv: Optional[float] = None
-    issue_date: datetime.datetime
-    maturity_date: datetime.datetime
+# Worker count and queue depth come from PRICING_WORKERS and PRICING_QUEUE_DEPTH
+pricing_pool = PricingPool()
+market_data = MarketDataStore()
+# Size and time to live come from RESPONSE_CACHE_SIZE and RESPONSE_CACHE_TTL
+response_cache = ResponseCache()
+# The per-connection subscription limit comes from SUBSCRIPTION_LIMIT
+subscriptions = SubscriptionHub(pricing_pool, market_data)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    yield
+    subscriptions.shutdown()
+    pricing_pool.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    if not metrics.enabled:
+        return await call_next(request)
+    start = time.perf_counter()
+    # An exception raised by a handler propagates out of call_next and is answered with a 500 by the server
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        path = request.url.path
+        metrics.observe("http_request_seconds", time.perf_counter() - start, path=path)
+        metrics.inc("http_requests_total", path=path, status=status)
+        if status >= 400:
+            metrics.inc("http_errors_total", path=path, status=status)
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Exports the request, stage, solver and cache metrics in the Prometheus text format. Nothing is recorded unless
+    the API runs with BOND_METRICS=1.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+def _busy():
+    return HTTPException(status_code=429, detail=BUSY_ERROR, headers={"Retry-After": "1"})
 
 
 @app.post("/calculate_bond")
 async def calculate_bond(bond_input: BondInput):
+    """
+    Prices one bond against the current market data snapshot. Results are cached per snapshot version, so
+    repeated requests for the same bond are answered without pricing until new market data is published.
+    """
+    snapshot = market_data.snapshot
+    key = cache_key(bond_input)
+    result = response_cache.get(snapshot.version, key)
+    if result is not None:
+        metrics.inc("response_cache_hits_total")
+        return result
+    metrics.inc("response_cache_misses_total")
+
+    discount_rate = float(snapshot.discount_rate(bond_input.maturity))
+    risk_free_rate = float(snapshot.risk_free_rate(bond_input.maturity))
     try:
-        bond = Bond(
-            bond_type=bond_input.bond_type,
-            face_value=bond_input.face_value,
-            coupon_rate=bond_input.coupon_rate,
-            maturity=bond_input.maturity,
-            yield_to_maturity=bond_input.yield_to_maturity,
-            issue_date=bond_input.issue_date,
-            maturity_date=bond_input.maturity_date
-        )
-
-        discount_rate = random.uniform(0.03, 0.06)  # Can pull from external source
-        npv, ytm = bond.calculate_npv_ytm(discount_rate)
-
-        risk_free_rate = 0.04  # Can pull from external source
-        spread = bond.calculate_spread(risk_free_rate, discount_rate)
-
-        duration = bond.calculate_duration(discount_rate)
-
-        return {
-            "NPV": round(npv, 4),
-            "YTM": round(ytm, 4),
-            "Spread": round(spread, 4),
-            "Duration": round(duration, 4)
-        }
+        result = await pricing_pool.run(price_bond, bond_input, discount_rate, risk_free_rate)
+    except PoolSaturated:
+        raise _busy()
     except ValueError as e:
-        raise HTTPException(status_code=500, detail="Error: Out of range float values are not JSON compliant.")
+        raise HTTPException(status_code=500, detail=NON_FINITE_ERROR)
+    response_cache.put(snapshot.version, key, result)
+    return result
+
+
+@app.get("/market_data")
+async def get_market_data():
+    return market_data.snapshot.to_dict()
+
+
+@app.put("/market_data")
+async def publish_market_data(market_data_input: MarketDataInput):
+    """
+    Publishes new discount and risk-free curves, given as rates by tenor label such as '3m' or '10y'. Requests
+    are priced against them from now on and responses cached for earlier curves are no longer served.
+    """
+    try:
+        snapshot = market_data.publish(market_data_input.discount_curve, market_data_input.risk_free_curve)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Error: {e}")
+    subscriptions.market_data_changed()
+    return snapshot.to_dict()
+
+
+async def _send_updates(websocket, subscriber):
+    while True:
+        messages, updates, dropped = await subscriber.take()
+        for message in messages:
+            await websocket.send_json(message)
+        if updates:
+            await websocket.send_json({"type": "prices", "dropped": dropped,
+                                       "prices": [{"id": subscription_id, **result}
+                                                  for subscription_id, result in updates.items()]})
+
+
+async def _handle_message(subscriber, message):
+    if not isinstance(message, dict):
+        raise ValueError("Messages must be JSON objects.")
+    action = message.get("action")
+    if action == "subscribe":
+        bonds = {}
+        for bond in message.get("bonds") or []:
+            if not isinstance(bond, dict) or "id" not in bond:
+                raise ValueError("Every subscribed bond needs an id.")
+            fields = {name: value for name, value in bond.items() if name != "id"}
+            bonds[str(bond["id"])] = BondInput(**fields)
+        await subscriptions.subscribe(subscriber, bonds)
+        return {"type": "subscribed", "ids": list(bonds)}
+    if action == "unsubscribe":
+        ids = [str(subscription_id) for subscription_id in message.get("ids") or []]
+        subscriptions.unsubscribe(subscriber, ids)
+        return {"type": "unsubscribed", "ids": ids}
+    raise ValueError(f"Unknown action {action!r}, expected 'subscribe' or 'unsubscribe'.")
+
+
+@app.websocket("/subscribe")
+async def subscribe(websocket: WebSocket):
+    """
+    Streams prices for a set of bonds. Clients send `{"action": "subscribe", "bonds": [...]}`, each bond a
+    BondInput with an `id`, and `{"action": "unsubscribe", "ids": [...]}`. Prices are pushed as
+    `{"type": "prices", "prices": [...], "dropped": n}` when a bond is subscribed to and whenever published market
+    data moves its rates, and only to the connections following that bond.
+
+    Each connection keeps at most the latest unsent price per bond, so a client that reads slowly skips the
+    intermediate prices, counted in `dropped`, instead of queueing them.
+    """
+    await websocket.accept()
+    subscriber = subscriptions.connect()
+    sender = asyncio.ensure_future(_send_updates(websocket, subscriber))
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except ValueError:
+                subscriber.notify({"type": "error", "detail": "Error: Message is not valid JSON."})
+                continue
+            try:
+                subscriber.notify(await _handle_message(subscriber, message))
+            except (TypeError, ValueError) as e:
+                subscriber.notify({"type": "error", "detail": f"Error: {e}"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        subscriptions.disconnect(subscriber)
+        sender.cancel()
+        try:
+            await sender
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            # Sending failed, usually because the client went away mid-send; the connection is closing anyway
+            metrics.inc("subscription_send_errors_total")
+
+
+def _chunks(items):
+    snapshot = market_data.snapshot
+    return [(items[start:start + BATCH_CHUNK_SIZE], start, snapshot)
+            for start in range(0, len(items), BATCH_CHUNK_SIZE)]
+
+
+async def _ndjson_chunks(request):
+    """
+    Splits an NDJSON request body into chunks of BATCH_CHUNK_SIZE lines as it is received, so that pricing starts
+    before the upload ends and the whole body is never held in memory.
+    """
+    snapshot = market_data.snapshot
+    lines = []
+    start = 0
+    partial = b""
+    async for data in request.stream():
+        *complete, partial = (partial + data).split(b"\n")
+        for line in complete:
+            if line.strip():
+                lines.append(line)
+            if len(lines) == BATCH_CHUNK_SIZE:
+                yield lines, start, snapshot
+                start += len(lines)
+                lines = []
+    if partial.strip():
+        lines.append(partial)
+    if lines:
+        yield lines, start, snapshot
+
+
+async def _stream_results(chunks):
+    priced = pricing_pool.map(price_bond_batch, chunks)
+    try:
+        async for results in priced:
+            for result in results:
+                yield json.dumps(result) + "\n"
+    finally:
+        await priced.aclose()
+
+
+class _UploadStreamingResponse(StreamingResponse):
+    """
+    A StreamingResponse whose body is written while the request body is still being read. StreamingResponse
+    listens for disconnects by reading the request itself, which would swallow the upload, so here a disconnect
+    is seen by the request stream or by a failing send instead. Either way the body iterator is closed, which
+    cancels the chunks still waiting to be priced.
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except (ClientDisconnect, OSError):
+            # The client is gone and there is nobody left to answer
+            pass
+        finally:
+            await self.body_iterator.aclose()
+
+
+@app.post("/calculate_bonds")
+async def calculate_bonds(request: Request, stream: bool = False):
+    """
+    Prices many bonds in one request. The body is either a JSON array of BondInput objects or, with
+    `Content-Type: application/x-ndjson`, one BondInput per line. Bonds are priced in chunks of BATCH_CHUNK_SIZE
+    through BondBook on the pricing workers, and per-bond validation or pricing errors are returned inline as
+    `{"index", "error"}`.
+
+    NDJSON bodies, and JSON bodies with `stream=true`, get an NDJSON response written chunk by chunk while
+    pricing progresses; NDJSON bodies are also read chunk by chunk, so pricing starts before the upload ends.
+    Otherwise the results are returned as one JSON array. Chunks not yet priced are cancelled when the client
+    disconnects.
+    """
+    if pricing_pool.saturated():
+        raise _busy()
+
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        return _UploadStreamingResponse(_stream_results(_ndjson_chunks(request)), media_type="application/x-ndjson")
+
+    try:
+        items = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Error: Request body is not valid JSON.")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Error: Request body must be a JSON array of bonds.")
+
+    if stream:
+        return StreamingResponse(_stream_results(_chunks(items)), media_type="application/x-ndjson")
+    results = []
+    async for chunk_results in pricing_pool.map(price_bond_batch, _chunks(items)):
+        results.extend(chunk_results)
+    return results
@@ -0,0 +1,213 @@
+"""
+Versioned market data the API prices against, and the cache of priced responses built on top of it.
+
+A MarketDataSnapshot is immutable: publishing new curves replaces the current snapshot with one whose version is
+one higher, so a result computed against a snapshot can be cached under that snapshot's version and is never served
+once newer data is published.
+"""
+from credit_yield_curve.credit_yield_curve.interpolation import YieldCurve, TENORS, tenor_years
+import collections
+import threading
+import datetime
+import time
+import os
+
+DEFAULT_RISK_FREE_RATE = 0.04
+DEFAULT_CREDIT_SPREAD = 0.005
+
+
+class MarketDataSnapshot:
+    """
+    The discount and risk-free curves at one point in time.
+
+    Attributes
+    ----------
+    version : int
+        The snapshot's position in the sequence of published snapshots.
+
+    discount_curve : dict
+        The discount rates by tenor label, e.g. {'1y': 0.045, '10y': 0.05}.
+
+    risk_free_curve : dict
+        The risk-free rates by tenor label.
+
+    published_at : datetime.datetime
+        When the snapshot was published.
+
+    Methods
+    -------
+    discount_rate(maturity):
+        Returns the discount rate at the given maturities in years, interpolated linearly and flat outside the
+        tenors.
+
+    risk_free_rate(maturity):
+        Returns the risk-free rate at the given maturities in years.
+
+    to_dict():
+        Returns the snapshot as a JSON-compatible dict.
+    """
+
+    def __init__(self, version, discount_curve, risk_free_curve, published_at=None):
+        self.version = version
+        self.discount_curve = dict(discount_curve)
+        self.risk_free_curve = dict(risk_free_curve)
+        self.published_at = published_at or datetime.datetime.now()
+        self._discount = self._interpolate(self.discount_curve)
+        self._risk_free = self._interpolate(self.risk_free_curve)
+
+    @staticmethod
+    def _interpolate(curve):
+        tenors = list(curve)
+        times = tenor_years(tenors)
+        rates = [curve[tenor] for tenor in tenors]
+        if len(set(times)) == 1:
+            # A single tenor is a flat curve
+            times = [times[0], times[0] + 1]
+            rates = rates[:1] * 2
+        return YieldCurve(times, rates, method='linear', extrapolation='flat')
+
+    @classmethod
+    def default(cls, version=1):
+        """
+        Flat curves at DEFAULT_RISK_FREE_RATE, with discount rates DEFAULT_CREDIT_SPREAD above them.
+        """
+        return cls(version,
+                   {tenor: DEFAULT_RISK_FREE_RATE + DEFAULT_CREDIT_SPREAD for tenor in TENORS},
+                   {tenor: DEFAULT_RISK_FREE_RATE for tenor in TENORS})
+
+    def discount_rate(self, maturity):
+        return self._discount(maturity)
+
+    def risk_free_rate(self, maturity):
+        return self._risk_free(maturity)
+
+    def to_dict(self):
+        return {
+            "version": self.version,
+            "published_at": self.published_at.isoformat(),
+            "discount_curve": self.discount_curve,
+            "risk_free_curve": self.risk_free_curve,
+        }
+
+
+class MarketDataStore:
+    """
+    Holds the current market data snapshot of the process.
+
+    Attributes
+    ----------
+    snapshot : MarketDataSnapshot
+        The snapshot new requests are priced against.
+
+    Methods
+    -------
+    publish(discount_curve, risk_free_curve):
+        Makes a new snapshot with the next version current and returns it.
+    """
+
+    def __init__(self, snapshot=None):
+        self.snapshot = snapshot or MarketDataSnapshot.default()
+        self._lock = threading.Lock()
+
+    def publish(self, discount_curve, risk_free_curve):
+        with self._lock:
+            snapshot = MarketDataSnapshot(self.snapshot.version + 1, discount_curve, risk_free_curve)
+            self.snapshot = snapshot
+        return snapshot
+
+
+class ResponseCache:
+    """
+    An LRU cache of priced responses that expire after a time to live. Entries belong to one market data
+    version: looking up a newer version drops everything cached for the older one.
+
+    Attributes
+    ----------
+    maxsize : int
+        The maximum number of responses kept before the least recently used one is evicted. 0 disables caching.
+    ttl : float
+        The number of seconds a response stays valid.
+    version : int
+        The market data version of the cached responses.
+    hits : int
+        The number of lookups served from the cache.
+    misses : int
+        The number of lookups that found nothing valid.
+
+    Methods
+    -------
+    get(version, key):
+        Returns the cached response for key under the given market data version, or None.
+
+    put(version, key, value):
+        Caches a response computed against the given market data version.
+
+    info():
+        Returns the cache counters and current size as a dict.
+
+    clear():
+        Drops every cached response.
+    """
+
+    def __init__(self, maxsize=None, ttl=None):
+        if maxsize is None:
+            maxsize = int(os.environ.get("RESPONSE_CACHE_SIZE", 10_000))
+        if ttl is None:
+            ttl = float(os.environ.get("RESPONSE_CACHE_TTL", 60))
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def _switch(self, version):
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+
+    def get(self, version, key):
+        with self._lock:
+            self._switch(version)
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, version, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            # A response priced against a snapshot that has since been replaced is not worth keeping
+            if self.version is not None and version < self.version:
+                return
+            self._switch(version)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize,
+                "ttl": self.ttl, "version": self.version}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def cache_key(bond_input):
+    """
+    The canonical form of a BondInput, equal for payloads that describe the same bond however they were written
+    (field order, 1000 vs 1000.0, date formats).
+    """
+    return tuple(bond_input.model_dump().values())
@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import Dict, Optional
+import datetime
+
+
+class BondInput(BaseModel):
+    bond_type: str
+    face_value: int
+    coupon_rate: float
+    maturity: float
+    yield_to_maturity: Optional[float] = None
+    npv: Optional[float] = None
+    issue_date: datetime.datetime
+    maturity_date: datetime.datetime
+
+
+class MarketDataInput(BaseModel):
+    discount_curve: Dict[str, float]
+    risk_free_curve: Dict[str, float]
@@ -0,0 +1,232 @@
+"""
+Push pricing for WebSocket subscribers.
+
+Every distinct bond subscribed to is priced once, however many connections follow it, and remembers the discount
+and risk-free rates it was priced at. When new market data is published, only the bonds whose rates at their
+maturity moved are repriced, and their new prices are pushed only to the connections subscribed to them.
+
+Each connection has at most one pending update per subscribed bond: a price that has not been sent by the time a
+newer one arrives is replaced, so a slow consumer skips intermediate ticks and always receives the latest price,
+and its buffer never grows past its subscriptions.
+"""
+from Pricing_API.workers import price_bond_batch, RESULT_FIELDS
+from Pricing_API.market_data import cache_key
+from bond_pricing.bond_pricing.metrics import registry as metrics
+import numpy as np
+import collections
+import asyncio
+import os
+
+# Bonds priced together per pricing job when subscriptions are priced or repriced
+SUBSCRIPTION_CHUNK_SIZE = 1000
+# Pending control messages (acknowledgements and errors) kept per connection
+MESSAGE_BUFFER = 100
+
+
+class Subscriber:
+    """
+    One connection's subscriptions and the updates waiting to be sent to it.
+
+    Attributes
+    ----------
+    bonds : dict
+        The cache key of the bond behind each subscription id.
+    dropped : int
+        The number of updates replaced by newer ones before they were sent, since the last send.
+
+    Methods
+    -------
+    push(subscription_id, result):
+        Queues a price update, replacing any unsent update for the same subscription.
+
+    notify(message):
+        Queues a control message such as an acknowledgement or an error.
+
+    take():
+        Waits until something is pending and returns the pending messages and updates, clearing them.
+    """
+
+    def __init__(self):
+        self.bonds = {}
+        self.dropped = 0
+        self._updates = collections.OrderedDict()
+        self._messages = collections.deque(maxlen=MESSAGE_BUFFER)
+        self._ready = asyncio.Event()
+
+    def push(self, subscription_id, result):
+        if subscription_id in self._updates:
+            self.dropped += 1
+            metrics.inc("subscription_dropped_total")
+        self._updates[subscription_id] = result
+        self._ready.set()
+
+    def notify(self, message):
+        self._messages.append(message)
+        self._ready.set()
+
+    async def take(self):
+        await self._ready.wait()
+        self._ready.clear()
+        messages, self._messages = list(self._messages), collections.deque(maxlen=MESSAGE_BUFFER)
+        updates, self._updates = self._updates, collections.OrderedDict()
+        dropped, self.dropped = self.dropped, 0
+        return messages, updates, dropped
+
+
+class SubscriptionHub:
+    """
+    The bonds subscribed to by every connection, with their latest prices.
+
+    Attributes
+    ----------
+    pool : PricingPool
+        The workers subscriptions are priced on.
+    market_data : MarketDataStore
+        Where the current snapshot is read from.
+    limit : int
+        The maximum number of subscriptions per connection.
+
+    Methods
+    -------
+    connect():
+        Registers a new connection and returns its Subscriber.
+
+    disconnect(subscriber):
+        Drops a connection's subscriptions.
+
+    subscribe(subscriber, bonds):
+        Subscribes a connection to bonds given by subscription id, pricing the ones not yet priced, and queues
+        their current prices.
+
+    unsubscribe(subscriber, ids):
+        Drops subscriptions by id.
+
+    market_data_changed():
+        Schedules a reprice of the bonds affected by the current snapshot. Publishes that arrive while a reprice
+        is running are coalesced into one more reprice against the latest snapshot.
+    """
+
+    def __init__(self, pool, market_data, limit=None):
+        if limit is None:
+            limit = int(os.environ.get("SUBSCRIPTION_LIMIT", 10_000))
+        self.pool = pool
+        self.market_data = market_data
+        self.limit = limit
+        self._bonds = {}
+        self._subscribers = collections.defaultdict(dict)
+        self._prices = {}
+        self._rates = {}
+        self._repricing = None
+
+    def connect(self):
+        return Subscriber()
+
+    def disconnect(self, subscriber):
+        self.unsubscribe(subscriber, list(subscriber.bonds))
+
+    def _rates_at(self, keys, snapshot):
+        maturities = np.array([self._bonds[key].maturity for key in keys])
+        return np.column_stack([snapshot.discount_rate(maturities), snapshot.risk_free_rate(maturities)])
+
+    async def _price(self, keys, snapshot):
+        """
+        Prices bonds against a snapshot in chunks on the pool, records their prices and rates, and returns the
+        keys whose price changed. A result is dropped when the bond was repriced against a newer snapshot while
+        this one was being priced.
+        """
+        items = [self._bonds[key].model_dump() for key in keys]
+        chunks = [(items[start:start + SUBSCRIPTION_CHUNK_SIZE], start, snapshot)
+                  for start in range(0, len(items), SUBSCRIPTION_CHUNK_SIZE)]
+        results = []
+        async for chunk_results in self.pool.map(price_bond_batch, chunks):
+            results.extend(chunk_results)
+
+        rates = self._rates_at(keys, snapshot)
+        changed = []
+        for key, result, key_rates in zip(keys, results, rates):
+            if key not in self._bonds:
+                # Unsubscribed while it was being priced
+                continue
+            previous = self._prices.get(key)
+            if previous is not None and previous["version"] > snapshot.version:
+                continue
+            result = {field: value for field, value in result.items() if field != "index"}
+            result["version"] = snapshot.version
+            if previous is None or any(previous.get(field) != result.get(field)
+                                       for field in RESULT_FIELDS + ("error",)):
+                changed.append(key)
+            self._prices[key] = result
+            self._rates[key] = key_rates
+        return changed
+
+    async def subscribe(self, subscriber, bonds):
+        """
+        Args:
+            subscriber (Subscriber): The connection subscribing.
+            bonds (Dict[str, BondInput]): The bonds to follow by subscription id. An id already in use is
+                switched to the new bond.
+
+        Raises:
+            ValueError: If the connection would exceed its subscription limit.
+        """
+        if len(set(subscriber.bonds) | set(bonds)) > self.limit:
+            raise ValueError(f"A connection can follow at most {self.limit} bonds")
+        self.unsubscribe(subscriber, [subscription_id for subscription_id in bonds
+                                      if subscription_id in subscriber.bonds])
+        for subscription_id, bond_input in bonds.items():
+            key = cache_key(bond_input)
+            self._bonds.setdefault(key, bond_input)
+            self._subscribers[key].setdefault(subscriber, set()).add(subscription_id)
+            subscriber.bonds[subscription_id] = key
+
+        unpriced = list(dict.fromkeys(key for key in subscriber.bonds.values() if key not in self._prices))
+        if unpriced:
+            snapshot = self.market_data.snapshot
+            await self._price(unpriced, snapshot)
+            if self.market_data.snapshot.version != snapshot.version:
+                # A reprice that ran while these bonds were being priced skipped them, so run one more
+                self.market_data_changed()
+        for subscription_id in bonds:
+            key = subscriber.bonds.get(subscription_id)
+            if key in self._prices:
+                subscriber.push(subscription_id, self._prices[key])
+
+    def unsubscribe(self, subscriber, ids):
+        for subscription_id in ids:
+            key = subscriber.bonds.pop(subscription_id, None)
+            if key is None:
+                continue
+            followers = self._subscribers[key]
+            followers[subscriber].discard(subscription_id)
+            if not followers[subscriber]:
+                del followers[subscriber]
+            if not followers:
+                # Nobody follows the bond any more
+                del self._subscribers[key]
+                del self._bonds[key]
+                self._prices.pop(key, None)
+                self._rates.pop(key, None)
+
+    def market_data_changed(self):
+        if self._repricing is None or self._repricing.done():
+            self._repricing = asyncio.ensure_future(self._reprice())
+        return self._repricing
+
+    async def _reprice(self):
+        while True:
+            snapshot = self.market_data.snapshot
+            keys = [key for key in self._bonds if key in self._rates]
+            if keys:
+                moved = np.any(self._rates_at(keys, snapshot) != np.array([self._rates[key] for key in keys]), axis=1)
+                keys = [key for key, key_moved in zip(keys, moved) if key_moved]
+            if not keys:
+                return
+            for key in await self._price(keys, snapshot):
+                for subscriber, ids in self._subscribers.get(key, {}).items():
+                    for subscription_id in ids:
+                        subscriber.push(subscription_id, self._prices[key])
+                        metrics.inc("subscription_updates_total")
+
+    def shutdown(self):
+        if self._repricing is not None:
+            self._repricing.cancel()
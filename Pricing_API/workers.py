@@ -0,0 +1,236 @@
+"""
+Pricing functions run by the API, and the process pool that runs them off the event loop.
+
+QuantLib keeps its evaluation date in process-global settings, so concurrent requests cannot safely share one
+process through threads. Each pool worker is a separate process with its own QuantLib state and its own
+instrument cache.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from bond_pricing.bond_pricing.models import Bond
+from bond_pricing.bond_pricing.book import BondBook
+from bond_pricing.bond_pricing.metrics import registry as metrics
+from Pricing_API.models import BondInput
+from Pricing_API.market_data import MarketDataSnapshot
+import multiprocessing
+import numpy as np
+import collections
+import asyncio
+import json
+import os
+
+NON_FINITE_ERROR = "Error: Out of range float values are not JSON compliant."
+RESULT_FIELDS = ("NPV", "YTM", "Spread", "Duration")
+
+
+def price_bond(bond_input: BondInput, discount_rate: float, risk_free_rate: float) -> dict:
+    """
+    Prices one bond with the Bond model.
+
+    Raises:
+        ValueError: If the results are not finite and so cannot be returned as JSON.
+    """
+    # The BondInput was validated when the request was parsed, so its values are not validated a second time
+    with metrics.stage('bond', 'construction'):
+        bond = Bond.model_construct(**{**dict(bond_input), 'face_value': float(bond_input.face_value)})
+    npv, ytm = bond.calculate_npv_ytm(discount_rate)
+    spread = bond.calculate_spread(risk_free_rate, discount_rate)
+    duration = bond.calculate_duration(discount_rate)
+    if not np.all(np.isfinite([npv, ytm, spread, duration])):
+        raise ValueError(NON_FINITE_ERROR)
+
+    return {
+        "NPV": round(float(npv), 4),
+        "YTM": round(ytm, 4),
+        "Spread": round(spread, 4),
+        "Duration": round(duration, 4)
+    }
+
+
+def _price_book(bond_inputs, discount_rates, risk_free_rate):
+    book = BondBook.from_bonds(bond_inputs)
+    npv, ytm = book.calculate_npv_ytm(discount_rates)
+    duration = book.calculate_duration(discount_rates)
+    return np.vstack([npv, ytm, ytm - risk_free_rate, duration])
+
+
+def price_bond_batch(items, start=0, market_data=None):
+    """
+    Prices a chunk of bond payloads in one BondBook pass. Items that fail validation or produce non-finite
+    results are reported inline instead of failing the chunk.
+
+    Args:
+        items (list): Bond payloads, either dicts or undecoded JSON lines.
+        start (int): The position of the first item in the whole request.
+        market_data (MarketDataSnapshot, optional): The curves the bonds are priced against, the default
+            snapshot if not given.
+
+    Returns:
+        list: One result dict per item, in order, each carrying the item's `index`.
+    """
+    results = [None] * len(items)
+    bond_inputs = []
+    positions = []
+    for i, item in enumerate(items):
+        try:
+            if isinstance(item, (bytes, str)):
+                item = json.loads(item)
+            bond_inputs.append(BondInput(**item))
+            positions.append(i)
+        except (TypeError, ValueError) as e:
+            results[i] = {"index": start + i, "error": f"Error: {e}"}
+
+    if bond_inputs:
+        market_data = market_data or MarketDataSnapshot.default()
+        maturities = np.array([bond_input.maturity for bond_input in bond_inputs])
+        discount_rates = market_data.discount_rate(maturities)
+        risk_free_rates = market_data.risk_free_rate(maturities)
+        try:
+            priced = [_price_book(bond_inputs, discount_rates, risk_free_rates)]
+            groups = [positions]
+        except Exception:
+            # Isolate the bonds the batch path cannot handle by pricing them one at a time
+            priced, groups = [], []
+            for i, bond_input, discount_rate, risk_free_rate in zip(positions, bond_inputs, discount_rates,
+                                                                     risk_free_rates):
+                try:
+                    priced.append(_price_book([bond_input], discount_rate, risk_free_rate))
+                    groups.append([i])
+                except Exception as e:
+                    results[i] = {"index": start + i, "error": f"Error: {e}"}
+
+        for group, values in zip(groups, priced):
+            for j, i in enumerate(group):
+                row = values[:, j]
+                if not np.all(np.isfinite(row)):
+                    results[i] = {"index": start + i, "error": NON_FINITE_ERROR}
+                    continue
+                results[i] = {"index": start + i, **{name: round(float(value), 4)
+                                                     for name, value in zip(RESULT_FIELDS, row)}}
+    return results
+
+
+def _measured(fn, *args):
+    """
+    Runs fn(*args) on a worker with metrics on and returns its result together with the metrics it recorded, so
+    the API process can merge them into the registry it exports. The metrics of a call that raises are dropped
+    rather than left behind to be reported with the next job on the same worker.
+    """
+    metrics.enable()
+    try:
+        result = fn(*args)
+    finally:
+        snapshot = metrics.drain()
+    return result, snapshot
+
+
+async def _iterate(items):
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+class PoolSaturated(Exception):
+    """
+    Raised when a pricing job is submitted while every worker is busy and the queue is full.
+    """
+
+
+class PricingPool:
+    """
+    A process pool of pricing workers with a bounded number of jobs in flight.
+
+    Attributes
+    ----------
+    max_workers : int
+        The number of worker processes. With 0, jobs run inline in the calling process.
+    queue_depth : int
+        The number of jobs allowed to wait for a worker on top of the ones running.
+
+    Methods
+    -------
+    saturated():
+        Returns True when every worker is busy and the queue is full.
+
+    run(fn, *args, wait=False):
+        Runs fn(*args) on a worker and returns its result. Raises PoolSaturated when the pool is full, unless
+        wait is true, in which case it waits for a free slot. While metrics are enabled, whatever the worker
+        recorded is merged into this process's registry.
+
+    map(fn, args_list):
+        Runs fn over an iterable or async iterable of argument tuples, keeping up to max_workers jobs in flight,
+        and yields the results in order. Jobs still pending when the generator is closed are cancelled.
+
+    shutdown():
+        Stops the worker processes.
+    """
+
+    def __init__(self, max_workers=None, queue_depth=None):
+        if max_workers is None:
+            max_workers = int(os.environ.get("PRICING_WORKERS", os.cpu_count() or 1))
+        if queue_depth is None:
+            queue_depth = int(os.environ.get("PRICING_QUEUE_DEPTH", 4 * max(max_workers, 1)))
+        self.max_workers = max_workers
+        self.queue_depth = queue_depth
+        self._executor = None
+        self._slots = None
+        self._in_flight = 0
+
+    @property
+    def capacity(self):
+        return max(self.max_workers, 1) + self.queue_depth
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    def saturated(self):
+        return self._in_flight >= self.capacity
+
+    def _start(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.capacity)
+        if self._executor is None and self.max_workers > 0:
+            # Spawned workers start from a clean interpreter rather than a copy of the event loop process
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+
+    async def run(self, fn, *args, wait=False):
+        self._start()
+        if not wait and self.saturated():
+            raise PoolSaturated()
+        async with self._slots:
+            self._in_flight += 1
+            try:
+                if self._executor is None:
+                    return fn(*args)
+                loop = asyncio.get_running_loop()
+                if not metrics.enabled:
+                    return await loop.run_in_executor(self._executor, fn, *args)
+                result, snapshot = await loop.run_in_executor(self._executor, _measured, fn, *args)
+                metrics.merge(snapshot)
+                return result
+            finally:
+                self._in_flight -= 1
+
+    async def map(self, fn, args_list):
+        pending = collections.deque()
+        try:
+            async for args in _iterate(args_list):
+                pending.append(asyncio.ensure_future(self.run(fn, *args, wait=True)))
+                if len(pending) >= max(self.max_workers, 1):
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            # Reached early when the consumer stops reading, e.g. because the client disconnected
+            for task in pending:
+                task.cancel()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._slots = None
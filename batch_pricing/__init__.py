@@ -0,0 +1,5 @@
+"""
+Batch pricing of bond files of any size: the file is read in fixed-size chunks, each chunk is priced (NPV, YTM,
+spread, duration and JTD) through the vectorized BondBook and JTD paths on worker processes, and results are written
+out chunk by chunk with a checkpoint so an interrupted run can resume. Run with `python -m batch_pricing --help`.
+"""
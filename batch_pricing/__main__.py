@@ -0,0 +1,5 @@
+from batch_pricing.runner import main
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+"""
+The chunk pricer, the output writers with their checkpoint, and the command line that ties them together.
+"""
+import argparse
+import collections
+import importlib.util
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+CHUNK_SIZE = 100_000
+# The same flat rates as the API's default market data
+DISCOUNT_RATE = 0.045
+RISK_FREE_RATE = 0.04
+FORMATS = ('csv', 'parquet')
+RESULT_COLUMNS = ('CUSIP', 'Ticker', 'NPV', 'YTM', 'Spread', 'Duration', 'LGD', 'Default Prob', 'JTD')
+# The files ParquetWriter writes: a part per chunk, and the part being written
+PART_NAME = re.compile(r'part-(\d{5})\.parquet(\.partial)?')
+
+
+def price_chunk(df, discount_rate=DISCOUNT_RATE, risk_free_rate=RISK_FREE_RATE):
+    """
+    Prices a chunk of bonds in the bond_data.csv layout in one BondBook pass and calculates their JTD. Runs in
+    the worker processes.
+
+    Args:
+        df (DataFrame): The bonds, one per row.
+        discount_rate (float): The flat rate every bond is discounted at.
+        risk_free_rate (float): The rate spreads are measured against.
+
+    Returns:
+        DataFrame: One row per bond with the RESULT_COLUMNS.
+    """
+    from bond_pricing.bond_pricing.universe import BondUniverse
+    from jtd_calculator import jtd_columns
+
+    book = BondUniverse.from_frame(df).to_book()
+    npv, ytm = book.calculate_npv_ytm(discount_rate)
+    jtd = jtd_columns(df)
+    return pd.DataFrame({
+        'CUSIP': df['CUSIP'].to_numpy(),
+        'Ticker': df['Ticker'].to_numpy(),
+        'NPV': npv,
+        'YTM': ytm,
+        'Spread': ytm - risk_free_rate,
+        'Duration': book.calculate_duration(discount_rate),
+        'LGD': jtd['LGD'].to_numpy(),
+        'Default Prob': jtd['Default Prob'].to_numpy(),
+        'JTD': jtd['JTD'].to_numpy(),
+    }, columns=list(RESULT_COLUMNS))
+
+
+class Checkpoint:
+    """
+    The progress of a run, saved next to its output after every completed chunk so that a crashed run can carry
+    on from the last chunk that was fully written.
+
+    Attributes
+    ----------
+    path : str
+        Where the checkpoint is saved.
+
+    state : dict
+        The input file's path, size and modification time, the chunk size, format and rates, and the number of
+        chunks, rows and output bytes completed.
+
+    Methods
+    -------
+    load(path):
+        Reads a saved checkpoint, or returns None if there is none.
+
+    matches(source, chunk_size, output_format, discount_rate, risk_free_rate):
+        Returns True if the checkpoint belongs to a run over the same input with the same settings and rates.
+
+    save():
+        Writes the checkpoint atomically.
+    """
+
+    def __init__(self, path, state):
+        self.path = path
+        self.state = state
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path) as f:
+                return cls(path, json.load(f))
+        except (OSError, ValueError):
+            return None
+
+    def matches(self, source, chunk_size, output_format, discount_rate, risk_free_rate):
+        return (self.state.get('source') == source and self.state.get('chunk_size') == chunk_size
+                and self.state.get('format') == output_format and self.state.get('discount_rate') == discount_rate
+                and self.state.get('risk_free_rate') == risk_free_rate)
+
+    def save(self):
+        partial = self.path + '.partial'
+        with open(partial, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(partial, self.path)
+
+
+class CsvWriter:
+    """
+    Appends result chunks to one CSV file, flushed to disk after each chunk. On resume, anything written after
+    the last checkpointed chunk is truncated away.
+
+    Raises:
+        ValueError: If the checkpoint records more output than the file holds, e.g. because it was deleted.
+    """
+
+    def __init__(self, path, offset):
+        if offset and (not os.path.exists(path) or os.path.getsize(path) < offset):
+            raise ValueError(f"The checkpoint records {offset:,} bytes of output but {path} is missing or shorter; "
+                             f"run without resume.")
+        self.file = open(path, 'r+b' if offset else 'wb')
+        self.file.truncate(offset)
+        self.file.seek(offset)
+        self.header = offset == 0
+
+    def write(self, frame, index):
+        self.file.write(frame.to_csv(index=False, header=self.header).encode())
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.header = False
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """
+    Writes each result chunk as one part file of a Parquet dataset directory. Parts are renamed into place once
+    complete, and parts past the last checkpointed chunk are removed on resume. Files other than parts are never
+    touched.
+
+    Raises:
+        ValueError: If the directory is not empty and was not written by an earlier run, which `owned` tells, or
+            if a checkpointed part is missing.
+    """
+
+    def __init__(self, path, chunks, owned):
+        if not owned and os.path.isdir(path) and os.listdir(path):
+            raise ValueError(f"{path} is not empty and was not written by batch_pricing; choose a new directory.")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        written = set()
+        for name in os.listdir(path):
+            match = PART_NAME.fullmatch(name)
+            if match is None or not os.path.isfile(os.path.join(path, name)):
+                continue
+            if int(match.group(1)) >= chunks or match.group(2):
+                os.remove(os.path.join(path, name))
+            else:
+                written.add(int(match.group(1)))
+        if len(written) < chunks:
+            raise ValueError(f"The checkpoint records {chunks} parts but {path} holds {len(written)}; "
+                             f"run without resume.")
+
+    def write(self, frame, index):
+        part = os.path.join(self.path, f'part-{index:05d}.parquet')
+        frame.to_parquet(part + '.partial', index=False)
+        os.replace(part + '.partial', part)
+        return 0
+
+    def close(self):
+        pass
+
+
+def _source(path):
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _ordered(executor, fn, chunks, in_flight, *args):
+    """
+    Maps fn over the chunks with at most in_flight chunks read ahead, yielding results in order, so memory does
+    not grow with the input size.
+    """
+    pending = collections.deque()
+    for chunk in chunks:
+        pending.append(executor.submit(fn, chunk, *args) if executor else chunk)
+        if len(pending) >= in_flight:
+            head = pending.popleft()
+            yield head.result() if executor else fn(head, *args)
+    while pending:
+        head = pending.popleft()
+        yield head.result() if executor else fn(head, *args)
+
+
+def run(input_path, output_path, chunk_size=CHUNK_SIZE, workers=None, output_format=None, resume=False,
+        discount_rate=DISCOUNT_RATE, risk_free_rate=RISK_FREE_RATE, log=print):
+    """
+    Prices a bond file chunk by chunk and writes the results incrementally.
+
+    Args:
+        input_path (str): A CSV file in the bond_data.csv layout.
+        output_path (str): A CSV file, or a directory of Parquet parts for the Parquet format.
+        chunk_size (int): The number of bonds read, priced and written at a time.
+        workers (int, optional): The number of worker processes, os.cpu_count() by default; 0 prices in this
+            process.
+        output_format (str, optional): 'csv' or 'parquet', taken from the output's extension by default.
+        resume (bool): Carry on from the checkpoint of an earlier run over the same input, if there is one.
+        discount_rate (float): The flat discount rate.
+        risk_free_rate (float): The rate spreads are measured against.
+        log (Callable): Receives the progress lines.
+
+    Returns:
+        dict: The final checkpoint state.
+    """
+    output_format = output_format or ('parquet' if output_path.endswith('.parquet') else 'csv')
+    if output_format not in FORMATS:
+        raise ValueError(f"Unknown output format {output_format!r}, expected one of {FORMATS}")
+    if output_format == 'parquet' and not any(importlib.util.find_spec(name) for name in ('pyarrow', 'fastparquet')):
+        raise ImportError("Parquet output needs pyarrow or fastparquet to be installed.")
+
+    source = _source(input_path)
+    checkpoint_path = output_path.rstrip(os.sep) + '.checkpoint.json'
+    # An output with a checkpoint next to it was written by an earlier run and can be overwritten
+    owned = os.path.exists(checkpoint_path)
+    checkpoint = Checkpoint.load(checkpoint_path) if resume else None
+    if checkpoint is not None and not checkpoint.matches(source, chunk_size, output_format, discount_rate,
+                                                         risk_free_rate):
+        raise ValueError("The checkpoint belongs to a different input file, chunk size, format or rates; run "
+                         "without resume.")
+    if checkpoint is None:
+        checkpoint = Checkpoint(checkpoint_path,
+                                {'source': source, 'chunk_size': chunk_size, 'format': output_format,
+                                 'discount_rate': discount_rate, 'risk_free_rate': risk_free_rate, 'chunks': 0,
+                                 'rows': 0, 'offset': 0, 'complete': False})
+    state = checkpoint.state
+    if state['complete']:
+        log(f"{output_path} is already complete ({state['rows']:,} rows)")
+        return state
+    if state['chunks']:
+        log(f"Resuming after chunk {state['chunks']} ({state['rows']:,} rows)")
+
+    done = state['rows']
+    chunks = pd.read_csv(input_path, chunksize=chunk_size, skiprows=(lambda row: 0 < row <= done) if done else None)
+    writer = (CsvWriter(output_path, state['offset']) if output_format == 'csv'
+              else ParquetWriter(output_path, state['chunks'], owned))
+    workers = os.cpu_count() if workers is None else workers
+    executor = (ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+                if workers > 0 else None)
+    start = time.perf_counter()
+    try:
+        for frame in _ordered(executor, price_chunk, chunks, 2 * max(workers, 1), discount_rate, risk_free_rate):
+            state['offset'] = writer.write(frame, state['chunks'])
+            state['chunks'] += 1
+            state['rows'] += len(frame)
+            checkpoint.save()
+            rate = (state['rows'] - done) / (time.perf_counter() - start)
+            log(f"chunk {state['chunks']:>5}: {state['rows']:>12,} rows  {rate:>10,.0f} rows/s")
+        state['complete'] = True
+        checkpoint.save()
+    finally:
+        writer.close()
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    return state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m batch_pricing',
+                                     description='Prices a bond file in chunks, writing results as it goes.')
+    parser.add_argument('input', help='a CSV file in the bond_data.csv layout')
+    parser.add_argument('output', help='the results CSV, or a directory of Parquet parts')
+    parser.add_argument('--format', choices=FORMATS, help='output format, from the output extension by default')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help=f'bonds per chunk (default {CHUNK_SIZE})')
+    parser.add_argument('--workers', type=int, help='worker processes, 0 to price inline (default: CPU count)')
+    parser.add_argument('--discount-rate', type=float, default=DISCOUNT_RATE, help='flat discount rate')
+    parser.add_argument('--risk-free-rate', type=float, default=RISK_FREE_RATE, help='risk-free rate for spreads')
+    parser.add_argument('--resume', action='store_true', help='continue from the checkpoint of an interrupted run')
+    args = parser.parse_args(argv)
+
+    try:
+        run(args.input, args.output, args.chunk_size, args.workers, args.format, args.resume, args.discount_rate,
+            args.risk_free_rate, log=lambda line: print(line, file=sys.stderr))
+    except (ImportError, ValueError) as e:
+        parser.exit(2, f"error: {e}\n")
@@ -0,0 +1,4 @@
+"""
+Performance benchmarks for the bond pricing, credit curve, JTD and API code paths, run on synthetic bond universes
+in the bond_data.csv layout. Run with `python -m benchmarks --help`.
+"""
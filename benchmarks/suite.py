@@ -0,0 +1,247 @@
+"""
+The benchmark cases and the command line that runs them, writes the results as JSON and compares them with a
+saved baseline.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import QuantLib as ql
+
+from benchmarks.universe import synthetic_universe, DATE_FORMAT
+
+SIZES = (1_000, 10_000, 100_000)
+GROUPS = ('bond', 'curve', 'jtd', 'api', 'cli')
+
+# Per-object paths are timed on a sample of this many bonds and reported per bond
+SAMPLE_SIZE = 500
+API_REQUESTS = 200
+
+
+def _best_time(fn, repeat):
+    """
+    Returns the fastest of `repeat` timed calls of fn, in seconds.
+    """
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _bonds(universe):
+    from bond_pricing.bond_pricing.models import Bond
+
+    issue = pd.to_datetime(universe['Issue Date'], format=DATE_FORMAT)
+    maturity = pd.to_datetime(universe['Maturity'], format=DATE_FORMAT)
+    return [Bond(bond_type='Corporate', face_value=100.0, coupon_rate=cpn / 100,
+                 maturity=(end - start).days / 365.25, issue_date=start.to_pydatetime(),
+                 maturity_date=end.to_pydatetime())
+            for cpn, start, end in zip(universe['Cpn'], issue, maturity)]
+
+
+def bond_cases(universe, rates):
+    from bond_pricing.bond_pricing.book import BondBook
+    from bond_pricing.bond_pricing.ladder import CashFlowLadder
+    from bond_pricing.bond_pricing.universe import BondUniverse
+
+    sample = _bonds(universe.iloc[:SAMPLE_SIZE])
+    sample_rates = rates[:SAMPLE_SIZE]
+    bonds = _bonds(universe)
+    yield 'bond.calculate_npv_ytm', len(sample), \
+        lambda: [bond.calculate_npv_ytm(rate) for bond, rate in zip(sample, sample_rates)]
+    yield 'bond.calculate_duration', len(sample), \
+        lambda: [bond.calculate_duration(rate) for bond, rate in zip(sample, sample_rates)]
+    yield 'book.calculate_npv_ytm', len(bonds), lambda: BondBook.from_bonds(bonds).calculate_npv_ytm(rates)
+    yield 'book.calculate_duration', len(bonds), lambda: BondBook.from_bonds(bonds).calculate_duration(rates)
+    yield 'universe.from_frame', len(universe), lambda: BondUniverse.from_frame(universe)
+    # Bucketing reuses the flows laid out once, as reports re-bucket the same book
+    book = BondUniverse.from_frame(universe).to_book()
+    yield 'ladder.from_book', len(universe), lambda: CashFlowLadder.from_book(book)
+    ladder = CashFlowLadder.from_book(book)
+    yield 'ladder.bucket', len(universe), lambda: ladder.bucket('M', discount_rate=rates)
+
+
+def curve_cases(universe, directory):
+    from credit_yield_curve.credit_yield_curve.construct_curve import CreditYieldCurve
+
+    path = os.path.join(directory, f'universe_{len(universe)}.csv')
+    universe.to_csv(path, index=False)
+    curve = CreditYieldCurve(path)
+    curve.load_and_sort_data()
+    curve.calculate_yield()
+    yield 'curve.load_and_sort_data', len(universe), curve.load_and_sort_data
+    yield 'curve.calculate_yield', len(universe), curve.calculate_yield
+    yield 'curve.construct_yc', len(universe), curve.construct_yc
+    # A later process building the same curve loads the snapshot the first build saved
+    CreditYieldCurve(path).build()
+    yield 'curve.build_from_snapshot', len(universe), lambda: CreditYieldCurve(path).build()
+    # Refits start from the previous hazards, as they do intraday
+    curve.fit_curve()
+    yield 'curve.fit_curve', len(universe), curve.fit_curve
+
+    # The tree OAS is timed on a sample, in this process, with the tree built once outside the timing
+    sample_path = os.path.join(directory, f'sample_{len(universe)}.csv')
+    universe.iloc[:SAMPLE_SIZE].to_csv(sample_path, index=False)
+    sample = CreditYieldCurve(sample_path)
+    sample.load_and_sort_data()
+    sample.calculate_yield()
+    sample.construct_yc()
+    sample.lattice()
+    yield 'curve.calculate_oas', len(sample.df), lambda: sample.calculate_oas(workers=0)
+
+
+def jtd_cases(universe):
+    from jtd_calculator import JtdCalculator, jtd_columns
+
+    sample = universe.iloc[:SAMPLE_SIZE]
+    columns = [sample[name].to_numpy() for name in ('Issued Amount', 'Cpn', 'Maturity Type', 'Composite Rating')]
+    yield 'jtd.JtdCalculator', len(sample), lambda: [JtdCalculator(*row).jtd for row in zip(*columns)]
+    yield 'jtd.jtd_columns', len(universe), lambda: jtd_columns(universe)
+
+
+def api_cases(universe):
+    import httpx
+    from Pricing_API.main import app, pricing_pool
+
+    issue = pd.to_datetime(universe['Issue Date'], format=DATE_FORMAT)
+    maturity = pd.to_datetime(universe['Maturity'], format=DATE_FORMAT)
+    payloads = [{'bond_type': 'Corporate', 'face_value': 100, 'coupon_rate': cpn / 100,
+                 'maturity': (end - start).days / 365.25, 'issue_date': start.isoformat(),
+                 'maturity_date': end.isoformat()}
+                for cpn, start, end in zip(universe['Cpn'], issue, maturity)]
+
+    async def single():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://bench') as client:
+            for payload in payloads[:API_REQUESTS]:
+                (await client.post('/calculate_bond', json=payload)).raise_for_status()
+
+    async def batch():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://bench',
+                                     timeout=None) as client:
+            (await client.post('/calculate_bonds', json=payloads)).raise_for_status()
+
+    # One event loop for every run, since the pool's semaphore belongs to the loop it was first used on
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(single())  # starts the pricing workers outside the timings
+        yield 'api.calculate_bond', min(len(payloads), API_REQUESTS), lambda: loop.run_until_complete(single())
+        yield 'api.calculate_bonds', len(payloads), lambda: loop.run_until_complete(batch())
+    finally:
+        pricing_pool.shutdown()
+        loop.close()
+
+
+def cli_cases():
+    from financial_calculations.cli import COMMANDS
+
+    def start(code):
+        return lambda: subprocess.run([sys.executable, '-c', code], check=True)
+
+    # Each run is a fresh interpreter, so the times include Python's own start-up, the same for every case
+    yield 'cli.import', 1, start('import financial_calculations.cli')
+    for command in COMMANDS:
+        yield f'cli.import_{command}', 1, start(f'from financial_calculations.cli import load; load({command!r})')
+
+
+def run(sizes=SIZES, groups=GROUPS, repeat=3, seed=0, log=print):
+    """
+    Runs the benchmark groups on universes of each size.
+
+    Returns:
+        dict: The run metadata under 'meta' and one record per case and size under 'results'.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            universe = synthetic_universe(size, seed=seed)
+            rates = np.random.default_rng(seed).uniform(0.03, 0.06, size)
+            cases = {
+                'bond': lambda: bond_cases(universe, rates),
+                'curve': lambda: curve_cases(universe, directory),
+                'jtd': lambda: jtd_cases(universe),
+                'api': lambda: api_cases(universe),
+                'cli': cli_cases,
+            }
+            for group in groups:
+                for name, items, fn in cases[group]():
+                    seconds = _best_time(fn, repeat)
+                    results.append({'name': name, 'size': size, 'items': items, 'seconds': seconds,
+                                    'per_item': seconds / items, 'items_per_second': items / seconds})
+                    log(f"{name:<28} {size:>8} {items:>8} {seconds:>10.4f}s {items / seconds:>14,.0f}/s")
+    return {
+        'meta': {
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'quantlib': ql.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': repeat,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+def compare(results, baseline, threshold=0.2):
+    """
+    Compares per-item times with a baseline run.
+
+    Args:
+        results (dict): The current run, as returned by run().
+        baseline (dict): The baseline run in the same format.
+        threshold (float): The relative slowdown above which a case counts as a regression.
+
+    Returns:
+        List[dict]: One record per case present in both runs with the time ratio and a 'regression' flag.
+    """
+    previous = {(record['name'], record['size']): record for record in baseline['results']}
+    rows = []
+    for record in results['results']:
+        base = previous.get((record['name'], record['size']))
+        if base is None:
+            continue
+        ratio = record['per_item'] / base['per_item']
+        rows.append({'name': record['name'], 'size': record['size'], 'baseline': base['seconds'],
+                     'current': record['seconds'], 'ratio': ratio, 'regression': ratio > 1 + threshold})
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES), help='universe sizes to run')
+    parser.add_argument('--groups', nargs='+', choices=GROUPS, default=list(GROUPS), help='benchmark groups')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per case, the fastest is kept')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic universes')
+    parser.add_argument('--output', default='benchmark_results.json', help='where to write the JSON results')
+    parser.add_argument('--compare', metavar='BASELINE', help='a previous results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative slowdown per item that counts as a regression (default 0.2)')
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.groups, args.repeat, args.seed)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            rows = compare(results, json.load(f), args.threshold)
+        for row in rows:
+            flag = 'REGRESSION' if row['regression'] else 'ok'
+            print(f"{row['name']:<28} {row['size']:>8} {row['baseline']:>10.4f}s {row['current']:>10.4f}s "
+                  f"{row['ratio']:>6.2f}x {flag}")
+        if any(row['regression'] for row in rows):
+            sys.exit(1)
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from jtd_calculator import DEFAULT_PROBABILITIES
+
+DATE_FORMAT = '%m/%d/%Y'
+TICKERS = ('IBM', 'AAPL', 'MSFT', 'ORCL', 'INTC', 'CSCO', 'HPQ', 'DELL', 'TXN', 'QCOM')
+MATURITY_TYPES = ('AT MATURITY', 'CALLABLE', 'Callable', 'Putable')
+
+
+def synthetic_universe(size, seed=0, today=None):
+    """
+    Generates a bond universe with the columns of bond_data.csv. Issue dates fall in the last 30 years and
+    maturities up to 40 years after today, coupons are on a 1/8 grid, and ask prices are the clean prices of
+    the coupon schedule at a yield around 5%, so the universe exercises the same code paths as the real file.
+
+    Args:
+        size (int): The number of bonds.
+        seed (int): The seed of the random generator, so universes are identical between runs.
+        today (np.datetime64, optional): The reference date, today by default.
+
+    Returns:
+        DataFrame: The bonds, with dates formatted like bond_data.csv.
+    """
+    rng = np.random.default_rng(seed)
+    today = np.datetime64('today', 'D') if today is None else np.datetime64(today, 'D')
+    issue = today - rng.integers(30, 30 * 365, size)
+    maturity = np.maximum(issue + rng.integers(365, 40 * 365, size), today + rng.integers(30, 365, size))
+    coupon = np.round(rng.uniform(0.5, 8.0, size) * 8) / 8
+    years = (maturity - today).astype(np.float64) / 365.25
+    market_yield = rng.normal(0.05, 0.01, size).clip(0.005, 0.15)
+    factor = (1 + market_yield / 2) ** (-2 * years)
+    ask_price = np.round(coupon / market_yield * (1 - factor) + 100 * factor, 3)
+    maturity_type = rng.choice(MATURITY_TYPES, size, p=[0.6, 0.3, 0.05, 0.05])
+    next_call = np.where(maturity_type == 'AT MATURITY', '#N/A Field Not Applicable',
+                         pd.to_datetime(maturity - 90).strftime(DATE_FORMAT))
+
+    return pd.DataFrame({
+        'CUSIP': [f'{code:09X}' for code in rng.choice(16 ** 9, size, replace=False)],
+        'Maturity': pd.to_datetime(maturity).strftime(DATE_FORMAT),
+        'Ticker': rng.choice(TICKERS, size),
+        'Issue Date': pd.to_datetime(issue).strftime(DATE_FORMAT),
+        'Cpn': coupon,
+        'Coupon Type': 'FIXED',
+        'Coupon Freq': 2,
+        'Issued Amount': rng.choice([250, 500, 750, 1000, 1500, 2500], size) * 1_000_000,
+        'Next Call Date': next_call,
+        'Composite Rating': rng.choice(list(DEFAULT_PROBABILITIES) + ['CCC', 'NR'], size),
+        'Maturity Type': maturity_type,
+        'Announce': pd.to_datetime(issue - 7).strftime(DATE_FORMAT),
+        'Currency': 'USD',
+        'Ask Price': ask_price,
+    })
@@ -0,0 +1,313 @@
+import functools
+import numpy as np
+
+from credit_yield_curve.credit_yield_curve.conventions import COUPON_MONTHS, SETTLEMENT_DAYS, MonthTable, holidays
+from .metrics import registry as metrics, ITERATION_BUCKETS
+
+
+@functools.lru_cache(maxsize=8)
+def _following(first_year: int, last_year: int) -> np.ndarray:
+    """
+    Returns, for every day from the start of `first_year`, the day number of the first US government bond
+    business day on or after it, so that whole date matrices can be rolled with one lookup.
+    """
+    days = np.arange(np.datetime64(f'{first_year}-01-01'), np.datetime64(f'{last_year + 1}-01-01'))
+    return np.busday_offset(days, 0, roll='forward', holidays=holidays(first_year, last_year + 1)).view(np.int64)
+
+
+def _curve_time(today: np.ndarray, dates: np.ndarray, year_length: np.ndarray) -> np.ndarray:
+    """
+    Year fractions used by a flat QuantLib curve with an ActualActual(ISMA) day counter and no reference
+    period: the whole interval is rounded to months, and intervals shorter than half a month are measured
+    against the year that follows the reference date.
+    """
+    days = (dates - today).astype(np.float64)
+    months = np.floor(12.0 * days / 365.0 + 0.5)
+    return np.where(months == 0, days / year_length, months / 12.0)
+
+
+def _isma_fraction(start, end, ref_start, ref_end, next_ref_end):
+    """
+    ActualActual(ISMA) year fraction from `start` to `end` for a semi-annual coupon with the given reference
+    period. Dates past the end of the reference period are measured against the following period.
+    """
+    inside = np.minimum(end, ref_end)
+    fraction = 0.5 * (inside - start) / (ref_end - ref_start)
+    beyond = np.maximum(end - ref_end, 0)
+    return fraction + 0.5 * beyond / (next_ref_end - ref_end)
+
+
+class BondBook:
+    """
+        This class represents a book of fixed-rate bonds held as arrays, and prices all of them at once with the
+        same conventions as the Bond model.
+
+        Attributes:
+            face_value (np.ndarray): The face values of the bonds.
+            coupon_rate (np.ndarray): The annual coupon rates of the bonds.
+            maturity (np.ndarray): The maturities of the bonds in years.
+            issue_date (np.ndarray): The issue dates of the bonds as datetime64[D].
+            maturity_date (np.ndarray): The maturity dates of the bonds as datetime64[D].
+
+        Methods:
+        from_bonds(bonds: List[Bond]) -> BondBook:
+            Builds a book from a list of Bond objects.
+
+        calculate_npv_ytm(discount_rate) -> Tuple[np.ndarray, np.ndarray]:
+            Calculates the NPV and YTM of every bond given one discount rate or one rate per bond.
+
+        calculate_spread(risk_free_rate, discount_rate) -> np.ndarray:
+            Calculates the spread of every bond's YTM over the risk-free rate.
+
+        calculate_present_value(discount_rate) -> np.ndarray:
+            Calculates the present value of every bond's cash flows.
+
+        calculate_cash_flows(discount_rate) -> np.ma.MaskedArray:
+            Calculates the discounted cash flows of every bond, one row per bond, masked past each bond's last period.
+
+        calculate_duration(discount_rate) -> np.ndarray:
+            Calculates the modified duration of every bond.
+    """
+
+    def __init__(self, face_value, coupon_rate, maturity, issue_date, maturity_date):
+        self.face_value = np.asarray(face_value, dtype=np.float64)
+        self.coupon_rate = np.asarray(coupon_rate, dtype=np.float64)
+        self.maturity = np.asarray(maturity, dtype=np.float64)
+        self.issue_date = np.asarray(issue_date, dtype='datetime64[D]')
+        self.maturity_date = np.asarray(maturity_date, dtype='datetime64[D]')
+        if not (self.face_value.shape == self.coupon_rate.shape == self.maturity.shape ==
+                self.issue_date.shape == self.maturity_date.shape) or self.face_value.ndim != 1:
+            raise ValueError("BondBook inputs must be one-dimensional arrays of the same length.")
+        self._periods = None
+        self._schedule = None
+
+    @classmethod
+    def from_bonds(cls, bonds):
+        """
+        Builds a book from Bond objects.
+
+        Args:
+            bonds (List[Bond]): The bonds to include, in order.
+
+        Returns:
+            BondBook: The book holding the bonds' terms.
+        """
+        return cls(
+            face_value=[bond.face_value for bond in bonds],
+            coupon_rate=[bond.coupon_rate for bond in bonds],
+            maturity=[bond.maturity for bond in bonds],
+            issue_date=[np.datetime64(bond.issue_date.date()) for bond in bonds],
+            maturity_date=[np.datetime64(bond.maturity_date.date()) for bond in bonds],
+        )
+
+    def __len__(self):
+        return self.face_value.shape[0]
+
+    def _rates(self, rate) -> np.ndarray:
+        return np.broadcast_to(np.asarray(rate, dtype=np.float64), self.face_value.shape)
+
+    def _period_matrix(self):
+        """
+        Builds the undiscounted per-period cash flows used by Bond.calculate_cash_flows, zero-padded past each
+        bond's last period.
+        """
+        if self._periods is None:
+            periods = np.trunc(self.maturity * 2).astype(np.int64)
+            columns = np.arange(periods.max(initial=0) + 1)
+            padding = columns[None, :] > periods[:, None]
+            cash_flows = np.where(padding, 0.0, (self.face_value * self.coupon_rate / 2)[:, None])
+            cash_flows[np.arange(len(self)), periods] += self.face_value
+            self._periods = cash_flows, padding, columns
+        return self._periods
+
+    @staticmethod
+    def _period_discount(rates: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        return np.exp(-np.log1p(rates / 2)[:, None] * columns[None, :])
+
+    def _build_schedule(self):
+        """
+        Builds the dated coupon schedule of every bond: semi-annual dates generated backward from maturity,
+        unadjusted accrual, payments rolled to the following US government bond business day, settlement two
+        business days after issue. Coupons of all bonds are stored back to back in ascending order per bond,
+        with `rows` giving the bond each coupon belongs to and `payments` the day number each is paid on.
+        """
+        if self._schedule is not None:
+            return self._schedule
+        with metrics.stage('bond_book', 'schedule'):
+            self._schedule = self._schedule_arrays()
+        return self._schedule
+
+    def _schedule_arrays(self):
+        """
+        Computes the arrays cached by _build_schedule.
+        """
+        count = len(self)
+        issue = self.issue_date.astype(np.int64)
+        maturity = self.maturity_date.astype(np.int64)
+        issue_month = self.issue_date.astype('datetime64[M]').astype(np.int64)
+        maturity_month = self.maturity_date.astype('datetime64[M]').astype(np.int64)
+        table = MonthTable(int(min(issue_month.min(initial=0), maturity_month.min(initial=0))) - 2 * COUPON_MONTHS,
+                           int(max(issue_month.max(initial=0), maturity_month.max(initial=0))) + 2 * COUPON_MONTHS)
+        day = table.day_of_month(maturity, maturity_month)
+
+        # Coupon dates fall on maturity - 6k months for every k whose date is still after the issue date
+        back = np.maximum(maturity_month - issue_month, 0) // COUPON_MONTHS
+        coupons = back + (table.date(maturity_month - COUPON_MONTHS * back, day) > issue)
+        offsets = np.cumsum(coupons) - coupons
+        rows = np.repeat(np.arange(count), coupons)
+        position = np.arange(rows.size) - offsets[rows]
+        lasts = offsets + coupons - 1
+        end_months = maturity_month[rows] - COUPON_MONTHS * (coupons[rows] - 1 - position)
+        row_day = day[rows]
+
+        ends = table.date(end_months, row_day)
+        firsts = offsets[coupons > 0]
+        starts = np.empty_like(ends)
+        starts[1:] = ends[:-1]
+        starts[firsts] = issue[rows[firsts]]
+
+        # Stub reference periods and the periods following each coupon roll on the coupon's own (clamped)
+        # day of month, which only differs from the maturity day of month at month ends
+        end_day = table.day_of_month(ends, end_months)
+        ref_starts = starts.copy()
+        stubs = firsts[table.date(end_months[firsts] - COUPON_MONTHS, row_day[firsts]) < starts[firsts]]
+        ref_starts[stubs] = table.date(end_months[stubs] - COUPON_MONTHS, end_day[stubs])
+        next_ref_ends = np.empty_like(ends)
+        next_ref_ends[:-1] = ends[1:]
+        clamped = (end_day < row_day) | (position == coupons[rows] - 1)
+        next_ref_ends[clamped] = table.date(end_months[clamped] + COUPON_MONTHS, end_day[clamped])
+
+        first_year = int(table.first_month // 12 + 1970)
+        last_year = int((table.first_month + len(table.starts)) // 12 + 1970)
+        first_day = np.datetime64(f'{first_year}-01-01').astype(np.int64)
+        payments = _following(first_year, last_year)[ends - first_day]
+        settlement = np.busday_offset(self.issue_date, SETTLEMENT_DAYS, roll='backward',
+                                      holidays=holidays(first_year, last_year + 1)).view(np.int64)
+        settlement = np.maximum(settlement, issue)
+        alive = payments > settlement[rows]
+
+        amounts = 0.5 * self.coupon_rate[rows] * self.face_value[rows]
+        amounts[stubs] *= 2 * _isma_fraction(starts[stubs], ends[stubs], ref_starts[stubs], ends[stubs],
+                                             next_ref_ends[stubs])
+        amounts[lasts[coupons > 0]] += self.face_value[coupons > 0]
+        amounts[~alive] = 0.0
+
+        # Yield discounting steps from one cash flow to the next, measured in each coupon's reference period
+        previous = np.empty_like(payments)
+        previous[1:] = payments[:-1]
+        previous_alive = np.zeros_like(alive)
+        previous_alive[1:] = alive[:-1]
+        previous_alive[firsts] = False
+        previous = np.where(previous_alive, previous, np.maximum(settlement[rows], starts))
+        steps = _isma_fraction(starts, payments, ref_starts, ends, next_ref_ends) - \
+            _isma_fraction(starts, previous, ref_starts, ends, next_ref_ends)
+        steps[~alive] = 0.0
+        steps = np.cumsum(steps)
+        times = steps - np.concatenate([[0.0], steps])[offsets][rows]
+
+        year_length = (table.date(issue_month + 12, table.day_of_month(issue, issue_month)) - issue)
+        curve_times = _curve_time(issue[rows], payments, year_length[rows])
+        settlement_time = _curve_time(issue, settlement, year_length)
+
+        return rows, amounts, times, curve_times, settlement_time, payments
+
+    def _row_sum(self, values: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        return np.bincount(rows, weights=values, minlength=len(self))
+
+    def _solve_yield(self, price: np.ndarray, guess: np.ndarray, accuracy: float = 1.0e-10,
+                     max_iterations: int = 100) -> np.ndarray:
+        """
+        Solves every bond's semi-annual yield from its dirty settlement price with Newton steps.
+        """
+        rows, amounts, times, _, _, _ = self._build_schedule()
+        ytm = guess.copy()
+        for iteration in range(1, max_iterations + 1):
+            factor = 1 + ytm / 2
+            discounted = amounts * np.exp(-2 * times * np.log(factor)[rows])
+            slope = -self._row_sum(discounted * times, rows) / factor
+            with np.errstate(divide='ignore', invalid='ignore'):
+                step = (self._row_sum(discounted, rows) - price) / slope
+            ytm -= step
+            if not np.any(np.abs(step) >= accuracy):
+                break
+        metrics.observe('solver_iterations', iteration, ITERATION_BUCKETS, component='bond_book')
+        return ytm
+
+    def _yield(self, rates: np.ndarray) -> np.ndarray:
+        rows, amounts, _, curve_times, settlement_time, _ = self._build_schedule()
+        price = self._row_sum(amounts * np.exp(-rates[rows] * (curve_times - settlement_time[rows])), rows)
+        return self._solve_yield(price, guess=2 * np.expm1(rates / 2))
+
+    def calculate_cash_flows(self, discount_rate) -> np.ma.MaskedArray:
+        """
+        This method calculates every bond's cash flows, discounted at the given rate.
+
+        Args:
+            discount_rate (float or np.ndarray): The rate used for discounting future cash flows.
+
+        Returns:
+            np.ma.MaskedArray: One row of discounted cash flows per bond, masked past the bond's last period.
+        """
+        cash_flows, padding, columns = self._period_matrix()
+        discounted = cash_flows * self._period_discount(self._rates(discount_rate), columns)
+        return np.ma.masked_array(discounted, mask=padding)
+
+    def calculate_present_value(self, discount_rate) -> np.ndarray:
+        """
+        This method calculates the present value of every bond's cash flows.
+
+        Args:
+            discount_rate (float or np.ndarray): The rate used for discounting future cash flows.
+
+        Returns:
+            np.ndarray: The present value of each bond's cash flows.
+        """
+        cash_flows, _, columns = self._period_matrix()
+        return (cash_flows * self._period_discount(self._rates(discount_rate), columns)).sum(axis=1)
+
+    def calculate_npv_ytm(self, discount_rate):
+        """
+        This method calculates the net present value (NPV) and yield to maturity (YTM) of every bond.
+
+        Args:
+            discount_rate (float or np.ndarray): The rate used for discounting future cash flows.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The NPVs and YTMs of the bonds.
+        """
+        rates = self._rates(discount_rate)
+        cash_flows, _, columns = self._period_matrix()
+        # Bond discounts its already discounted cash flows once more when computing the NPV
+        npv = (cash_flows * self._period_discount(rates, 2 * columns)).sum(axis=1)
+        return npv, self._yield(rates)
+
+    def calculate_spread(self, risk_free_rate, discount_rate) -> np.ndarray:
+        """
+        This method calculates the spread of every bond.
+
+        Args:
+            risk_free_rate (float or np.ndarray): The risk-free rate.
+            discount_rate (float or np.ndarray): The discount rate.
+
+        Returns:
+            np.ndarray: The bond spreads.
+        """
+        return self._yield(self._rates(discount_rate)) - np.asarray(risk_free_rate, dtype=np.float64)
+
+    def calculate_duration(self, discount_rate) -> np.ndarray:
+        """
+        This method calculates the modified duration of every bond at the yield implied by the discount rate.
+
+        Args:
+            discount_rate (float or np.ndarray): The discount rate to calculate bond duration.
+
+        Returns:
+            np.ndarray: The bond durations, scaled by 100 like Bond.calculate_duration.
+        """
+        ytm = self._yield(self._rates(discount_rate))
+        rows, amounts, times, _, _, _ = self._build_schedule()
+        factor = 1 + ytm / 2
+        discounted = amounts * np.exp(-2 * times * np.log(factor)[rows])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            duration = self._row_sum(discounted * times, rows) / self._row_sum(discounted, rows) / factor
+        return duration * 100
@@ -0,0 +1,121 @@
+import collections
+import threading
+import QuantLib as ql
+
+
+class CachedBond:
+    """
+    A QuantLib fixed-rate bond built once, together with the discount curve its pricing engine uses. The curve is
+    a flat forward driven by a SimpleQuote, so changing the rate only bumps the quote and lets QuantLib recalculate
+    lazily.
+
+    Attributes
+    ----------
+    today : ql.Date
+        The evaluation date the bond and its discount curve are built for.
+    bond : ql.FixedRateBond
+        The QuantLib instrument.
+    day_count : ql.DayCounter
+        The day counter used for the discount curve and for yield calculations.
+    rate_quote : ql.SimpleQuote
+        The quote holding the flat discount rate.
+    discount_handle : ql.RelinkableYieldTermStructureHandle
+        The handle the pricing engine discounts with, linked to the quote-driven flat curve.
+    discount_rate : float
+        The rate the quote currently holds, or None before the first rate is set.
+    """
+
+    def __init__(self, today, bond, day_count):
+        self.today = today
+        self.bond = bond
+        self.day_count = day_count
+        self.rate_quote = ql.SimpleQuote(0.0)
+        self.discount_handle = ql.RelinkableYieldTermStructureHandle(
+            ql.FlatForward(today, ql.QuoteHandle(self.rate_quote), day_count))
+        self.discount_rate = None
+        self.bond.setPricingEngine(ql.DiscountingBondEngine(self.discount_handle))
+
+    def set_discount_rate(self, discount_rate: float):
+        """
+        Moves the flat discount curve to the given rate, unless it is already there.
+        """
+        if discount_rate != self.discount_rate:
+            self.rate_quote.setValue(discount_rate)
+            self.discount_rate = discount_rate
+
+
+class InstrumentCache:
+    """
+    An LRU cache of QuantLib bonds keyed on their terms and conventions, so that repeated pricing of the same
+    bond only moves its discount rate instead of rebuilding the schedule and the instrument.
+
+    Attributes
+    ----------
+    maxsize : int
+        The maximum number of instruments kept before the least recently used one is evicted.
+    hits : int
+        The number of lookups served from the cache.
+    misses : int
+        The number of lookups that had to build a new instrument.
+    evictions : int
+        The number of instruments dropped to stay within maxsize.
+
+    Methods
+    -------
+    get(key, build):
+        Returns the cached instrument for key, building it with build() on a miss.
+
+    info():
+        Returns the cache counters and current size as a dict.
+
+    clear():
+        Drops every cached instrument and resets the counters.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, build):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        entry = build()
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def info(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+instrument_cache = InstrumentCache()
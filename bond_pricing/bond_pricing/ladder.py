@@ -0,0 +1,198 @@
+from typing import Callable, Optional, Sequence
+import numpy as np
+import pandas as pd
+import QuantLib as ql
+
+from .book import BondBook
+
+
+FREQUENCIES = ('D', 'W', 'M', 'Q', 'Y')
+LADDER_COLUMNS = ('coupon', 'principal', 'total')
+
+
+def _day_number(date) -> int:
+    """
+    Returns the day number of a date given as a QuantLib date, a datetime, a datetime64 or an ISO string.
+    """
+    if isinstance(date, ql.Date):
+        date = date.ISO()
+    return int(np.datetime64(date, 'D').astype(np.int64))
+
+
+def _period_starts(days: np.ndarray, frequency: str) -> np.ndarray:
+    """
+    Returns the day number of the start of the calendar period each day falls in. Weeks start on Mondays.
+    """
+    if frequency == 'D':
+        return days
+    if frequency == 'W':
+        # Day 0, 1970-01-01, was a Thursday
+        return days - (days + 3) % 7
+    months = days.view('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    if frequency == 'Q':
+        months -= months % 3
+    elif frequency == 'Y':
+        months -= months % 12
+    return months.astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+
+
+class CashFlowLadder:
+    """
+        This class holds the dated coupon and principal flows of a whole book once, sorted by payment date in one
+        array per column, and aggregates them into date buckets. Buckets are contiguous runs of the sorted flows,
+        so bucketing by calendar period is one np.add.reduceat and bucketing by tenor one np.searchsorted, and
+        neither re-bucketing nor re-discounting regenerates the schedules.
+
+        Attributes:
+            date (np.ndarray): The payment date of each flow as datetime64[D], in ascending order.
+            bond (np.ndarray): The position in the book of the bond paying each flow.
+            coupon (np.ndarray): The coupon paid by each flow, stub coupons included.
+            principal (np.ndarray): The principal repaid by each flow.
+            bonds (np.ndarray): The labels of the bonds, their positions in the book by default.
+
+        Methods:
+        from_book(book: BondBook, bonds=None) -> CashFlowLadder:
+            Builds the ladder from the dated schedules BondBook prices with.
+
+        discount_factors(as_of=None, discount_rate=None, curve=None) -> np.ndarray:
+            Returns the discount factor of every flow from the as-of date.
+
+        bucket(frequency='M', tenors=None, as_of=None, discount_rate=None, curve=None) -> DataFrame:
+            Aggregates the flows paid after the as-of date by calendar period or by tenor.
+
+        to_frame() -> DataFrame:
+            Returns one row per flow.
+    """
+
+    def __init__(self, date, bond, coupon, principal, bonds: Sequence = None):
+        days = np.asarray(date, dtype='datetime64[D]').astype(np.int64)
+        bond = np.asarray(bond, dtype=np.int64)
+        coupon = np.asarray(coupon, dtype=np.float64)
+        principal = np.asarray(principal, dtype=np.float64)
+        if not (days.shape == bond.shape == coupon.shape == principal.shape) or days.ndim != 1:
+            raise ValueError("CashFlowLadder inputs must be one-dimensional arrays of the same length.")
+        count = bond.max(initial=-1) + 1
+        # One integer key orders the flows by date and then by bond, and sorts faster than a stable sort on dates
+        order = np.argsort((days - days.min(initial=0)) * max(count, 1) + bond)
+        self._days = days[order]
+        self.date = self._days.view('datetime64[D]')
+        self.bond = bond[order]
+        self.coupon = coupon[order]
+        self.principal = principal[order]
+        self.bonds = np.arange(count) if bonds is None else np.asarray(bonds)
+        self._amounts = np.stack([self.coupon, self.principal], axis=1)
+        self._periods = {}
+
+    @classmethod
+    def from_book(cls, book: BondBook, bonds: Sequence = None):
+        """
+        Builds the ladder from the book's dated schedules: semi-annual coupons generated backward from each
+        bond's maturity date, paid on the following US government bond business day, and the face value repaid
+        with the last coupon. Flows paid before settlement are left out.
+
+        Args:
+            book (BondBook): The bonds.
+            bonds (Sequence, optional): Labels for the bonds such as CUSIPs, their positions in the book by default.
+
+        Returns:
+            CashFlowLadder: The flows of every bond.
+        """
+        rows, amounts, _, _, _, payments = book._build_schedule()
+        last = np.ones(rows.shape, dtype=bool)
+        last[:-1] = rows[1:] != rows[:-1]
+        paid = amounts != 0
+        rows, payments, last, amounts = rows[paid], payments[paid], last[paid], amounts[paid]
+        principal = np.where(last, book.face_value[rows], 0.0)
+        return cls(payments.view('datetime64[D]'), rows, amounts - principal, principal,
+                   np.arange(len(book)) if bonds is None else bonds)
+
+    def __len__(self):
+        return self.date.shape[0]
+
+    def _as_of(self, as_of) -> int:
+        return _day_number(ql.Settings.instance().evaluationDate if as_of is None else as_of)
+
+    def _discount(self, flows: slice, as_of: int, discount_rate, curve) -> np.ndarray:
+        times = (self._days[flows] - as_of) / 365.25
+        if curve is not None:
+            rates = np.asarray(curve(times), dtype=np.float64)
+        else:
+            rates = np.asarray(discount_rate, dtype=np.float64)
+            if rates.ndim:
+                rates = rates[self.bond[flows]]
+        return np.exp(-2 * times * np.log1p(rates / 2))
+
+    def discount_factors(self, as_of=None, discount_rate=None,
+                         curve: Optional[Callable[[np.ndarray], np.ndarray]] = None) -> np.ndarray:
+        """
+        Calculates the discount factor of every flow, at a semi-annually compounded rate over Actual/365.25 years
+        from the as-of date.
+
+        Args:
+            as_of (optional): The date discounted to, the QuantLib evaluation date by default.
+            discount_rate (float or np.ndarray, optional): One flat rate or one rate per bond.
+            curve (Callable, optional): Maps times in years to semi-annual yields, e.g. CreditYieldCurve.yield_at;
+                used when discount_rate is None.
+
+        Returns:
+            np.ndarray: One discount factor per flow, in the ladder's order.
+        """
+        if (discount_rate is None) == (curve is None):
+            raise ValueError("Give exactly one of discount_rate or curve.")
+        return self._discount(slice(None), self._as_of(as_of), discount_rate, curve)
+
+    def bucket(self, frequency: str = 'M', tenors: Sequence[float] = None, as_of=None, discount_rate=None,
+               curve: Optional[Callable[[np.ndarray], np.ndarray]] = None) -> pd.DataFrame:
+        """
+        Aggregates the flows paid after the as-of date into buckets, either calendar periods or tenor bands, with
+        their present values when a discount rate or a curve is given.
+
+        Args:
+            frequency (str): The calendar period, one of 'D', 'W' (starting Mondays), 'M', 'Q' or 'Y'; ignored when
+                tenors are given.
+            tenors (Sequence[float], optional): The ends of the tenor bands in years from the as-of date. Each band
+                holds the flows after the previous end up to its own, and a last band holds the flows beyond the last
+                tenor.
+            as_of (optional): The date the ladder starts after, the QuantLib evaluation date by default.
+            discount_rate (float or np.ndarray, optional): One flat semi-annual rate or one per bond.
+            curve (Callable, optional): Maps times in years to semi-annual yields; used when discount_rate is None.
+
+        Returns:
+            DataFrame: The 'coupon', 'principal' and 'total' flows of each bucket, plus their 'present_value' when
+                discounting, indexed by the start date of each period or by the end of each tenor band in years
+                (infinity for the last one). Calendar buckets without flows are left out.
+        """
+        if discount_rate is not None and curve is not None:
+            raise ValueError("Give at most one of discount_rate or curve.")
+        if frequency not in FREQUENCIES and tenors is None:
+            raise ValueError(f"Unknown frequency {frequency!r}, expected one of {FREQUENCIES}")
+        as_of = self._as_of(as_of)
+        flows = slice(int(np.searchsorted(self._days, as_of, side='right')), len(self))
+        amounts = self._amounts[flows]
+        columns = list(LADDER_COLUMNS)
+        if discount_rate is not None or curve is not None:
+            factors = self._discount(flows, as_of, discount_rate, curve)
+            amounts = np.column_stack([amounts, amounts.sum(axis=1) * factors])
+            columns.append('present_value')
+
+        if tenors is not None:
+            ends = as_of + np.round(np.asarray(tenors, dtype=np.float64) * 365.25).astype(np.int64)
+            edges = np.concatenate([[0], np.searchsorted(self._days[flows], ends, side='right'), [len(amounts)]])
+            cumulative = np.concatenate([np.zeros((1, amounts.shape[1])), np.cumsum(amounts, axis=0)])
+            sums = cumulative[edges[1:]] - cumulative[edges[:-1]]
+            index = pd.Index(np.append(np.asarray(tenors, dtype=np.float64), np.inf), name='tenor')
+        else:
+            if frequency not in self._periods:
+                self._periods[frequency] = _period_starts(self._days, frequency)
+            keys = self._periods[frequency][flows]
+            starts = np.flatnonzero(np.diff(keys, prepend=keys[:1] - 1)) if len(keys) else np.empty(0, np.int64)
+            sums = np.add.reduceat(amounts, starts, axis=0) if len(starts) else np.empty((0, amounts.shape[1]))
+            index = pd.Index(keys[starts].view('datetime64[D]'), name='date')
+
+        total = sums[:, 0] + sums[:, 1]
+        values = np.column_stack([sums[:, :2], total, sums[:, 2:]])
+        return pd.DataFrame(values, index=index, columns=columns)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({'date': self.date, 'bond': self.bonds[self.bond], 'coupon': self.coupon,
+                             'principal': self.principal})
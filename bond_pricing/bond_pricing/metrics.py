@@ -0,0 +1,203 @@
+"""
+Opt-in stage timers, counters and histograms, rendered in the Prometheus text format.
+
+Recording is off unless the BOND_METRICS environment variable is set to a true value or registry.enable() is
+called. While it is off, stage() hands back one shared no-op context manager and inc()/observe() return after a
+single attribute check, so instrumented code pays next to nothing.
+"""
+import bisect
+import contextlib
+import os
+import threading
+import time
+
+# Upper bounds in seconds of the latency histogram buckets, from 10 microseconds to 10 seconds
+LATENCY_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25,
+                   0.5, 1.0, 2.5, 5.0, 10.0)
+ITERATION_BUCKETS = (1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30, 50, 100)
+
+METRIC_HELP = {
+    'stage_seconds': 'Time spent in each instrumented stage.',
+    'http_request_seconds': 'Latency of API requests.',
+    'http_requests_total': 'API requests by path and status code.',
+    'http_errors_total': 'API requests answered with an error status.',
+    'solver_iterations': 'Newton iterations needed by the batched yield solver.',
+    'instrument_cache_hits_total': 'QuantLib instruments served from the instrument cache.',
+    'instrument_cache_misses_total': 'QuantLib instruments built on an instrument cache miss.',
+    'response_cache_hits_total': 'API responses served from the response cache.',
+    'response_cache_misses_total': 'API requests that had to be priced.',
+    'subscription_updates_total': 'Prices queued for WebSocket subscribers.',
+    'subscription_dropped_total': 'Subscriber prices replaced by newer ones before they were sent.',
+    'subscription_send_errors_total': 'WebSocket connections whose updates failed to send.',
+}
+
+_NO_STAGE = contextlib.nullcontext()
+
+
+def _env_enabled():
+    return os.environ.get('BOND_METRICS', '').lower() in ('1', 'true', 'yes', 'on')
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram of observed values.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def merge(self, counts, total):
+        self.counts = [a + b for a, b in zip(self.counts, counts)]
+        self.sum += total
+
+
+class _Stage:
+    __slots__ = ('registry', 'labels', 'start')
+
+    def __init__(self, registry, labels):
+        self.registry = registry
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry._observe('stage_seconds', self.labels, time.perf_counter() - self.start, LATENCY_BUCKETS)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms keyed on a metric name and a set of labels.
+
+    Attributes
+    ----------
+    enabled : bool
+        Whether anything is recorded; taken from the BOND_METRICS environment variable by default.
+
+    Methods
+    -------
+    enable(enabled=True):
+        Turns recording on or off.
+
+    stage(component, stage):
+        Returns a context manager that times its block into the stage_seconds histogram.
+
+    inc(name, value=1, **labels):
+        Adds to a counter.
+
+    observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+        Records a value in a histogram.
+
+    drain():
+        Returns everything recorded so far and resets the registry, so worker processes can ship their metrics.
+
+    merge(snapshot):
+        Adds a drained snapshot into this registry.
+
+    render():
+        Returns every metric in the Prometheus text exposition format.
+    """
+
+    def __init__(self, enabled=None):
+        self.enabled = _env_enabled() if enabled is None else enabled
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def stage(self, component, stage):
+        if not self.enabled:
+            return _NO_STAGE
+        return _Stage(self, (('component', component), ('stage', stage)))
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        if not self.enabled:
+            return
+        self._observe(name, tuple(sorted(labels.items())), value, buckets)
+
+    def _observe(self, name, labels, value, buckets):
+        with self._lock:
+            histogram = self._histograms.get((name, labels))
+            if histogram is None:
+                histogram = self._histograms[(name, labels)] = Histogram(buckets)
+            histogram.observe(value)
+
+    def drain(self):
+        with self._lock:
+            snapshot = {
+                'counters': self._counters,
+                'histograms': {key: (h.buckets, h.counts, h.sum) for key, h in self._histograms.items()},
+            }
+            self._counters = {}
+            self._histograms = {}
+        return snapshot
+
+    def merge(self, snapshot):
+        with self._lock:
+            for key, value in snapshot['counters'].items():
+                self._counters[key] = self._counters.get(key, 0) + value
+            for key, (buckets, counts, total) in snapshot['histograms'].items():
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(buckets)
+                histogram.merge(counts, total)
+
+    def render(self):
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (h.buckets, list(h.counts), h.sum)) for key, h in self._histograms.items())
+
+        lines = []
+        described = set()
+
+        def describe(name, kind):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            describe(name, 'counter')
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        for (name, labels), (buckets, counts, total) in histograms:
+            describe(name, 'histogram')
+            cumulative = 0
+            for bound, count in zip(buckets + (float('inf'),), counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = MetricsRegistry()
@@ -1,9 +1,15 @@
 import numpy as np
 from pydantic import BaseModel
-from typing import Optional, List
-import numpy_financial as npf
+from typing import Optional, List, Sequence, Tuple
 import QuantLib as ql
 import datetime
+from .instruments import CachedBond, instrument_cache
+from .metrics import registry as metrics
+
+
+# Schedule and day count conventions of the QuantLib bond, part of the instrument cache key
+CONVENTIONS = ('Semiannual', 'UnitedStates.GovernmentBond', 'Unadjusted', 'Backward', 'ActualActual.Bond',
+               'ActualActual.ISMA', 2)
 
 
 class Bond(BaseModel):
@@ -38,6 +44,12 @@ class Bond(BaseModel):
         calculate_duration(discount_rate: float) -> float:
             Calculates the Macaulay Duration of the bond, which measures the bond's price sensitivity to interest rate
             changes.
+
+        reprice_many(discount_rates: Sequence[float]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+            Calculates the NPV, YTM and duration of the bond for each discount rate in a rate ladder.
+
+        quantlib_bond(discount_rate: float) -> CachedBond:
+            Returns the cached QuantLib instrument for the bond, discounted on a flat curve at the given rate.
     """
 
     bond_type: str
@@ -60,23 +72,16 @@ class Bond(BaseModel):
             Tuple[float, float]: The NPV and YTM of the bond.
         """
 
-        cash_flows = self.calculate_cash_flows(discount_rate)
-        npv = npf.npv(discount_rate / 2, cash_flows)  # Discount rate is adjusted for semi-annual periods
+        import numpy_financial as npf
+
+        with metrics.stage('bond', 'cash_flows'):
+            cash_flows = self.calculate_cash_flows(discount_rate)
+            npv = npf.npv(discount_rate / 2, cash_flows)  # Discount rate is adjusted for semi-annual periods
 
         # Calculate IRR (YTM) with QuantLib
-        today = ql.Date(self.issue_date.day, self.issue_date.month, self.issue_date.year)
-        maturity = ql.Date(self.maturity_date.day, self.maturity_date.month, self.maturity_date.year)
-        ql.Settings.instance().evaluationDate = today
-        bond_schedule = ql.Schedule(today, maturity, ql.Period(ql.Semiannual),
-                                    ql.UnitedStates(ql.UnitedStates.GovernmentBond), ql.Unadjusted, ql.Unadjusted,
-                                    ql.DateGeneration.Backward, False)
-
-        bond = ql.FixedRateBond(2, self.face_value, bond_schedule, [self.coupon_rate],
-                                ql.ActualActual(ql.ActualActual.Bond))
-        day_count = ql.ActualActual(ql.ActualActual.ISMA)
-        discount_curve = ql.YieldTermStructureHandle(ql.FlatForward(today, discount_rate, day_count))
-        bond.setPricingEngine(ql.DiscountingBondEngine(discount_curve))
-        ytm = bond.bondYield(day_count, ql.Compounded, ql.Semiannual)
+        cached = self.quantlib_bond(discount_rate)
+        with metrics.stage('bond', 'yield_solve'):
+            ytm = cached.bond.bondYield(cached.day_count, ql.Compounded, ql.Semiannual)
         self.yield_to_maturity = ytm
         self.npv = npv
 
@@ -110,6 +115,7 @@ class Bond(BaseModel):
         Returns:
             float: The present value of the bond's cash flows.
         """
+        import numpy_financial as npf
 
         cash_flows = np.full(int(self.maturity * 2) + 1, self.face_value * (self.coupon_rate / 2))
         cash_flows[-1] += self.face_value
@@ -153,23 +159,78 @@ class Bond(BaseModel):
             float: The bond duration.
         """
 
-        today = ql.Date(self.issue_date.day, self.issue_date.month, self.issue_date.year)
-        maturity = ql.Date(self.maturity_date.day, self.maturity_date.month, self.maturity_date.year)
-        ql.Settings.instance().evaluationDate = today
-        bond_schedule = ql.Schedule(today, maturity, ql.Period(ql.Semiannual),
-                                    ql.UnitedStates(ql.UnitedStates.GovernmentBond), ql.Unadjusted, ql.Unadjusted,
-                                    ql.DateGeneration.Backward, False)
+        cached = self.quantlib_bond(discount_rate)
+        with metrics.stage('bond', 'yield_solve'):
+            yield_value = cached.bond.bondYield(cached.day_count, ql.Compounded, ql.Semiannual)
+        with metrics.stage('bond', 'duration'):
+            interest_rate = ql.InterestRate(yield_value, cached.day_count, ql.Compounded, ql.Semiannual)
+            duration = ql.BondFunctions.duration(cached.bond, interest_rate, ql.Duration.Modified)
 
-        bond = ql.FixedRateBond(2, self.face_value, bond_schedule, [self.coupon_rate],
-                                ql.ActualActual(ql.ActualActual.Bond))
+        return duration*100
 
-        day_count = ql.ActualActual(ql.ActualActual.ISMA)
-        discount_curve = ql.YieldTermStructureHandle(ql.FlatForward(today, discount_rate, day_count))
-        bond.setPricingEngine(ql.DiscountingBondEngine(discount_curve))
+    def reprice_many(self, discount_rates: Sequence[float]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        This method reprices the bond across a ladder of discount rates.
 
-        yield_value = bond.bondYield(discount_rate, day_count, ql.Compounded, ql.Semiannual)
-        # yield_value = bond.bondYield(day_count, ql.Compounded, ql.Semiannual)
-        interest_rate = ql.InterestRate(yield_value, day_count, ql.Compounded, ql.Semiannual)
-        duration = ql.BondFunctions.duration(bond, interest_rate, ql.Duration.Modified)
+        The QuantLib bond is built (or taken from the cache) once, and each rate only bumps the quote behind its
+        discount curve. The bond's stored NPV and YTM are left unchanged.
 
-        return duration*100
+        Args:
+            discount_rates (Sequence[float]): The discount rates to price the bond at.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: The NPV, YTM and duration of the bond for each rate, computed
+            as in calculate_npv_ytm and calculate_duration.
+        """
+
+        rates = np.asarray(discount_rates, dtype=float)
+        periods = np.arange(int(self.maturity * 2) + 1)
+        cash_flows = np.full(periods.size, self.face_value * (self.coupon_rate / 2))
+        cash_flows[-1] += self.face_value
+        npv = (cash_flows / (1 + rates[:, None] / 2) ** (2 * periods)).sum(axis=1)
+
+        ytm = np.empty(rates.size)
+        duration = np.empty(rates.size)
+        cached = self.quantlib_bond(float(rates[0])) if rates.size else None
+        for i, rate in enumerate(rates):
+            cached.set_discount_rate(float(rate))
+            ytm[i] = cached.bond.bondYield(cached.day_count, ql.Compounded, ql.Semiannual)
+            interest_rate = ql.InterestRate(ytm[i], cached.day_count, ql.Compounded, ql.Semiannual)
+            duration[i] = ql.BondFunctions.duration(cached.bond, interest_rate, ql.Duration.Modified) * 100
+
+        return npv, ytm, duration
+
+    def quantlib_bond(self, discount_rate: float) -> CachedBond:
+        """
+        This method returns the QuantLib bond for this bond's terms, discounted on a flat curve at the given rate.
+
+        The instrument is taken from the shared instrument cache and only built on a miss; on a hit only the quote
+        behind its discount curve is moved to the new rate. The QuantLib evaluation date is set to the issue date.
+
+        Args:
+            discount_rate (float): The flat rate the bond is discounted at.
+
+        Returns:
+            CachedBond: The cached QuantLib bond and its discount handle.
+        """
+
+        today = ql.Date(self.issue_date.day, self.issue_date.month, self.issue_date.year)
+        maturity = ql.Date(self.maturity_date.day, self.maturity_date.month, self.maturity_date.year)
+        ql.Settings.instance().evaluationDate = today
+
+        def build():
+            with metrics.stage('bond', 'schedule'):
+                bond_schedule = ql.Schedule(today, maturity, ql.Period(ql.Semiannual),
+                                            ql.UnitedStates(ql.UnitedStates.GovernmentBond), ql.Unadjusted,
+                                            ql.Unadjusted, ql.DateGeneration.Backward, False)
+                bond = ql.FixedRateBond(2, self.face_value, bond_schedule, [self.coupon_rate],
+                                        ql.ActualActual(ql.ActualActual.Bond))
+                return CachedBond(today, bond, ql.ActualActual(ql.ActualActual.ISMA))
+
+        key = (today.serialNumber(), maturity.serialNumber(), self.coupon_rate, self.face_value, CONVENTIONS)
+        misses = instrument_cache.misses
+        cached = instrument_cache.get(key, build)
+        metrics.inc('instrument_cache_misses_total' if instrument_cache.misses != misses
+                    else 'instrument_cache_hits_total')
+        cached.set_discount_rate(discount_rate)
+        return cached
@@ -0,0 +1,95 @@
+from typing import NamedTuple, Sequence
+import numpy as np
+
+from credit_yield_curve.credit_yield_curve.interpolation import TENORS, tenor_years
+from .book import BondBook
+
+
+# The CreditYieldCurve tenor grid, 1m to 70y, in years
+KEY_RATE_TENORS = tuple(tenor_years(TENORS))
+
+
+class BondRisk(NamedTuple):
+    """
+        The yield sensitivities of a book of bonds, one entry per bond.
+
+        Attributes:
+            ytm (np.ndarray): The semi-annual yields the sensitivities are taken at.
+            dirty_price (np.ndarray): The settlement dirty prices, in the same units as the face values.
+            macaulay_duration (np.ndarray): The Macaulay durations in years.
+            modified_duration (np.ndarray): The modified durations in years.
+            convexity (np.ndarray): The convexities, in years squared.
+            dv01 (np.ndarray): The price change for a one basis point fall in yield.
+    """
+
+    ytm: np.ndarray
+    dirty_price: np.ndarray
+    macaulay_duration: np.ndarray
+    modified_duration: np.ndarray
+    convexity: np.ndarray
+    dv01: np.ndarray
+
+
+def _discounted_flows(book: BondBook, discount_rate):
+    """
+    Solves every bond's yield at the given discount rate and discounts its cash flows at that yield.
+    """
+    ytm = book._yield(book._rates(discount_rate))
+    rows, amounts, times, _, _, _ = book._build_schedule()
+    factor = 1 + ytm / 2
+    discounted = amounts * np.exp(-2 * times * np.log(factor)[rows])
+    return ytm, factor, rows, times, discounted
+
+
+def calculate_risk(book: BondBook, discount_rate) -> BondRisk:
+    """
+    Calculates the closed-form yield sensitivities of every bond in the book at the yield implied by the discount
+    rate, with the same cash flows and year fractions the book solves yields with.
+
+    Args:
+        book (BondBook): The bonds.
+        discount_rate (float or np.ndarray): One discount rate for the whole book or one per bond.
+
+    Returns:
+        BondRisk: The yield, dirty price, durations, convexity and DV01 of every bond.
+    """
+    ytm, factor, rows, times, discounted = _discounted_flows(book, discount_rate)
+    price = book._row_sum(discounted, rows)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        macaulay = book._row_sum(discounted * times, rows) / price
+        convexity = book._row_sum(discounted * times * (times + 0.5), rows) / price / factor ** 2
+    modified = macaulay / factor
+    return BondRisk(ytm=ytm, dirty_price=price, macaulay_duration=macaulay, modified_duration=modified,
+                    convexity=convexity, dv01=modified * price * 1e-4)
+
+
+def calculate_key_rate_durations(book: BondBook, discount_rate,
+                                 tenors: Sequence[float] = KEY_RATE_TENORS) -> np.ndarray:
+    """
+    Calculates every bond's key-rate durations: the modified duration split across the tenors by moving each
+    cash flow's sensitivity onto the two tenors around its time with linear weights. Flows before the first or
+    after the last tenor are assigned to that tenor, so each bond's key-rate durations add up to its modified
+    duration.
+
+    Args:
+        book (BondBook): The bonds.
+        discount_rate (float or np.ndarray): One discount rate for the whole book or one per bond.
+        tenors (Sequence[float]): The key-rate tenors in years, increasing.
+
+    Returns:
+        np.ndarray: A (bonds, tenors) array of key-rate durations in years.
+    """
+    tenors = np.asarray(tenors, dtype=np.float64)
+    ytm, factor, rows, times, discounted = _discounted_flows(book, discount_rate)
+    price = book._row_sum(discounted, rows)
+
+    clipped = np.clip(times, tenors[0], tenors[-1])
+    upper = np.clip(np.searchsorted(tenors, clipped, side='right'), 1, len(tenors) - 1)
+    upper_weight = (clipped - tenors[upper - 1]) / (tenors[upper] - tenors[upper - 1])
+    sensitivity = discounted * times
+    cells = rows * len(tenors)
+    size = len(book) * len(tenors)
+    durations = np.bincount(cells + upper - 1, weights=sensitivity * (1 - upper_weight), minlength=size)
+    durations += np.bincount(cells + upper, weights=sensitivity * upper_weight, minlength=size)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return durations.reshape(len(book), len(tenors)) / (price * factor)[:, None]
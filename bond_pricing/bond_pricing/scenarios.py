@@ -0,0 +1,167 @@
+import itertools
+from typing import Callable, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+from .book import BondBook
+
+
+SHOCK_FIELDS = ('parallel', 'twist', 'butterfly')
+SCENARIO_DTYPE = np.dtype([(field, np.float64) for field in SHOCK_FIELDS])
+
+# Tenors in years that shape the twist (short end down, long end up) and the butterfly (wings up, belly down)
+SHORT_TENOR = 2.0
+BELLY_TENOR = 10.0
+LONG_TENOR = 30.0
+
+
+def shock_grid(parallel: Sequence[float] = (0.0,), twist: Sequence[float] = (0.0,),
+               butterfly: Sequence[float] = (0.0,)) -> np.ndarray:
+    """
+    Builds every combination of parallel, twist and butterfly shock sizes.
+
+    Args:
+        parallel (Sequence[float]): Parallel shifts in basis points.
+        twist (Sequence[float]): Twist sizes in basis points: the long end moves up and the short end down by this.
+        butterfly (Sequence[float]): Butterfly sizes in basis points: the wings move up and the belly down by this.
+
+    Returns:
+        np.ndarray: A structured array of scenarios with 'parallel', 'twist' and 'butterfly' fields.
+    """
+    return np.array(list(itertools.product(parallel, twist, butterfly)), dtype=SCENARIO_DTYPE)
+
+
+def shock_shapes(times: np.ndarray) -> np.ndarray:
+    """
+    Returns the unit parallel, twist and butterfly shifts at each time as a (3, times) array. Twists and
+    butterflies are piecewise linear between the short, belly and long tenors and flat outside them.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    return np.stack([
+        np.ones_like(times),
+        np.interp(times, [SHORT_TENOR, LONG_TENOR], [-1.0, 1.0]),
+        np.interp(times, [SHORT_TENOR, BELLY_TENOR, LONG_TENOR], [1.0, -1.0, 1.0]),
+    ])
+
+
+class ScenarioPnL:
+    """
+    The profit and loss of every bond in every scenario, with labelled axes.
+
+    Attributes
+    ----------
+    values : np.ndarray
+        A (bonds, scenarios) array of P&L in the same units as the face values.
+
+    bonds : np.ndarray
+        The bond labels along the first axis.
+
+    scenarios : np.ndarray
+        The structured scenario array along the second axis, shock sizes in basis points.
+
+    base_value : np.ndarray
+        The unshocked dirty value of every bond.
+
+    Methods
+    -------
+    total():
+        Returns the P&L of the whole book in each scenario.
+
+    to_frame():
+        Returns the P&L as a DataFrame indexed by bond with one column per scenario.
+    """
+    def __init__(self, values, bonds, scenarios, base_value):
+        self.values = values
+        self.bonds = bonds
+        self.scenarios = scenarios
+        self.base_value = base_value
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def total(self) -> np.ndarray:
+        return self.values.sum(axis=0, dtype=np.float64)
+
+    def to_frame(self) -> pd.DataFrame:
+        columns = pd.MultiIndex.from_arrays([self.scenarios[field] for field in SHOCK_FIELDS], names=SHOCK_FIELDS)
+        return pd.DataFrame(self.values, index=pd.Index(self.bonds, name='bond'), columns=columns)
+
+
+def _blocks(offsets: np.ndarray, per_flow: int, max_bytes: int):
+    """
+    Splits the bonds into contiguous blocks whose flows times `per_flow` bytes fit in max_bytes.
+    """
+    start = 0
+    count = len(offsets) - 1
+    while start < count:
+        limit = offsets[start] + max(max_bytes // per_flow, 1)
+        stop = max(int(np.searchsorted(offsets, limit, side='right')) - 1, start + 1)
+        yield start, min(stop, count)
+        start = stop
+
+
+def calculate_scenario_pnl(book: BondBook, scenarios: np.ndarray, discount_rate=None,
+                           curve: Optional[Callable[[np.ndarray], np.ndarray]] = None, bonds: Sequence = None,
+                           dtype=np.float64, max_bytes: int = 256 * 2 ** 20) -> ScenarioPnL:
+    """
+    Revalues every bond of the book under every scenario and returns the P&L matrix. The shocks are applied at
+    each cash flow's time, either to the flat discount rate of each bond or to a yield curve.
+
+    With a discount rate, cash flows are discounted on the continuously compounded flat curve the book prices
+    with, shifted by the shock at each flow's time. With a curve, each flow is discounted at the semi-annual yield
+    the curve gives for its time plus the shock, e.g. `curve=credit_yield_curve.yield_at`.
+
+    The (flows, scenarios) intermediates are evaluated in blocks of bonds and scenarios so that they stay under
+    max_bytes.
+
+    Args:
+        book (BondBook): The bonds.
+        scenarios (np.ndarray): Structured shock sizes in basis points, as returned by shock_grid().
+        discount_rate (float or np.ndarray, optional): One flat discount rate for the book or one per bond.
+        curve (Callable, optional): Maps times in years to semi-annual yields; used when discount_rate is None.
+        bonds (Sequence, optional): Labels for the bonds, their positions in the book by default.
+        dtype: The dtype of the P&L matrix, e.g. np.float32 to halve its size.
+        max_bytes (int): The memory ceiling for intermediate arrays.
+
+    Returns:
+        ScenarioPnL: The (bonds, scenarios) P&L with its labels.
+    """
+    if (discount_rate is None) == (curve is None):
+        raise ValueError("Give exactly one of discount_rate or curve.")
+    scenarios = np.asarray(scenarios, dtype=SCENARIO_DTYPE)
+    sizes = np.stack([scenarios[field] for field in SHOCK_FIELDS], axis=1) * 1e-4
+    rows, amounts, times, curve_times, settlement_time, _ = book._build_schedule()
+
+    if curve is None:
+        times = curve_times - settlement_time[rows]
+        base_rate = book._rates(discount_rate)[rows]
+    else:
+        base_rate = np.asarray(curve(times), dtype=np.float64)
+    shifts = shock_shapes(times)
+    offsets = np.searchsorted(rows, np.arange(len(book) + 1))
+
+    def present_value(flows, shift):
+        rate = base_rate[flows, None] + shift
+        if curve is None:
+            factor = np.exp(-rate * times[flows, None])
+        else:
+            factor = np.exp(-2 * times[flows, None] * np.log1p(rate / 2))
+        return amounts[flows, None] * factor
+
+    base_value = book._row_sum(present_value(slice(None), np.zeros((1, 1)))[:, 0], rows)
+    values = np.empty((len(book), len(scenarios)), dtype=dtype)
+    columns = max(min(len(scenarios), max_bytes // (4 * 8 * max(len(amounts), 1))), 1)
+    for first_scenario in range(0, len(scenarios), columns):
+        block_sizes = sizes[first_scenario:first_scenario + columns]
+        for start, stop in _blocks(offsets, 4 * 8 * len(block_sizes), max_bytes):
+            flows = slice(offsets[start], offsets[stop])
+            value = present_value(flows, shifts[:, flows].T @ block_sizes.T)
+            # Flows are stored bond by bond, so each bond's value is a reduceat over its run of flows
+            has_flows = np.diff(offsets[start:stop + 1]) > 0
+            totals = np.zeros((stop - start, len(block_sizes)))
+            if has_flows.any():
+                totals[has_flows] = np.add.reduceat(value, (offsets[start:stop] - offsets[start])[has_flows], axis=0)
+            values[start:stop, first_scenario:first_scenario + columns] = totals - base_value[start:stop, None]
+
+    return ScenarioPnL(values, np.arange(len(book)) if bonds is None else np.asarray(bonds), scenarios, base_value)
@@ -0,0 +1,258 @@
+import datetime
+import numpy as np
+import pandas as pd
+
+from credit_yield_curve.credit_yield_curve.bond_data import MISSING_VALUES
+from .book import BondBook
+from .models import Bond
+
+
+# Numeric columns and their dtypes; dates are int64 day numbers since 1970-01-01, i.e. datetime64[D] as integers
+NUMERIC_COLUMNS = {
+    'face_value': np.float64,
+    'coupon_rate': np.float64,
+    'maturity': np.float64,
+    'issue_date': np.int64,
+    'maturity_date': np.int64,
+    'ask_price': np.float64,
+}
+# Text columns with few distinct values, stored as int32 codes into a sorted array of categories
+CATEGORICAL_COLUMNS = ('bond_type', 'ticker', 'rating', 'maturity_type')
+
+# The day number of a missing date, the integer view of NaT
+MISSING_DAY = np.datetime64('NaT', 'D').view(np.int64)
+
+# Columns of bond_data.csv the universe is read from
+FRAME_COLUMNS = {
+    'CUSIP': 'cusip',
+    'Ticker': 'ticker',
+    'Issued Amount': 'face_value',
+    'Cpn': 'coupon_rate',
+    'Issue Date': 'issue_date',
+    'Maturity': 'maturity_date',
+    'Composite Rating': 'rating',
+    'Maturity Type': 'maturity_type',
+    'Ask Price': 'ask_price',
+}
+
+
+def _encode(values):
+    """
+    Returns the sorted distinct values and the int32 code of every value.
+    """
+    codes, categories = pd.factorize(np.asarray(values, dtype=object), sort=True)
+    return np.asarray(categories, dtype=str), codes.astype(np.int32)
+
+
+def _day_numbers(dates, date_format):
+    """
+    Returns dates as int64 day numbers, MISSING_DAY for missing dates and the '#N/A Field Not Applicable'
+    sentinel. Strings are parsed once per distinct value, since a universe has far fewer distinct dates than bonds.
+    """
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates.to_numpy(dtype='datetime64[D]').view(np.int64)
+    codes, distinct = pd.factorize(dates)
+    present = ~pd.Index(distinct).isin(MISSING_VALUES)
+    # Missing values get code -1, which picks the MISSING_DAY appended at the end
+    days = np.full(len(distinct) + 1, MISSING_DAY)
+    parsed = pd.to_datetime(distinct[present], format=date_format).to_numpy(dtype='datetime64[D]')
+    days[:-1][present] = parsed.view(np.int64)
+    return days[codes]
+
+
+class BondUniverse:
+    """
+        This class holds a universe of bonds as one contiguous array per column instead of one object per bond.
+        Dates are int64 day numbers and text fields with few distinct values are int32 codes into a table of
+        categories, so a 100k-bond universe takes a few megabytes and is filtered with array comparisons.
+
+        Slicing with a slice returns a view that shares the column arrays; integer arrays and boolean masks return
+        a copy, like NumPy indexing.
+
+        Attributes:
+            cusip (np.ndarray): The CUSIPs of the bonds.
+            columns (Dict[str, np.ndarray]): The numeric columns (see NUMERIC_COLUMNS) and the codes of the
+                categorical columns (see CATEGORICAL_COLUMNS).
+            categories (Dict[str, np.ndarray]): The sorted distinct values of each categorical column.
+
+        Methods:
+        from_frame(df: DataFrame) -> BondUniverse:
+            Builds a universe from a DataFrame in the bond_data.csv layout.
+
+        from_bonds(bonds: List[Bond]) -> BondUniverse:
+            Builds a universe from Bond objects.
+
+        column(name: str) -> np.ndarray:
+            Returns a column, decoding categorical columns to their values and dates to datetime64[D].
+
+        rows(cusips) -> np.ndarray:
+            Returns the positions of the given CUSIPs.
+
+        filter(cusip=None, ticker=None, rating=None, maturity_type=None, bond_type=None) -> BondUniverse:
+            Returns the bonds matching every given criterion, each one a value or a list of values.
+
+        bond(index: int) -> Bond:
+            Returns one bond as a Bond object.
+
+        to_book() -> BondBook:
+            Returns a BondBook over the universe's columns, without copying them.
+
+        to_frame() -> DataFrame:
+            Returns the universe as a DataFrame with decoded columns.
+    """
+
+    def __init__(self, cusip, columns, categories):
+        self.cusip = np.asarray(cusip, dtype=str)
+        self.columns = {name: np.asarray(columns[name], dtype=dtype) for name, dtype in NUMERIC_COLUMNS.items()}
+        self.columns.update((name, np.asarray(columns[name], dtype=np.int32)) for name in CATEGORICAL_COLUMNS)
+        self.categories = {name: np.asarray(categories[name], dtype=str) for name in CATEGORICAL_COLUMNS}
+        if self.cusip.ndim != 1 or any(values.shape != self.cusip.shape for values in self.columns.values()):
+            raise ValueError("BondUniverse columns must be one-dimensional arrays of the same length.")
+        self._order = None
+
+    @classmethod
+    def from_frame(cls, df, bond_type='Corporate', date_format='%m/%d/%Y'):
+        """
+        Builds a universe from a DataFrame in the bond_data.csv layout. Coupons are converted from percent to
+        rates, the issued amount is used as face value and the maturity in years is counted from the issue date.
+
+        Args:
+            df (DataFrame): The bonds, one per row.
+            bond_type (str): The bond type of every bond, which bond_data.csv does not carry.
+            date_format (str): The format of the date columns when they are strings.
+
+        Returns:
+            BondUniverse: The bonds as column arrays.
+
+        Raises:
+            ValueError: If a bond has no issue or maturity date, which it cannot be priced without.
+        """
+        columns, categories = {}, {}
+        for source, name in FRAME_COLUMNS.items():
+            if name in NUMERIC_COLUMNS and name.endswith('_date'):
+                columns[name] = _day_numbers(df[source], date_format)
+                missing = np.flatnonzero(columns[name] == MISSING_DAY)
+                if missing.size:
+                    raise ValueError(f"Bond {df['CUSIP'].iloc[missing[0]]} has no {source}.")
+            elif name in NUMERIC_COLUMNS:
+                columns[name] = df[source].to_numpy(dtype=np.float64)
+            elif name in CATEGORICAL_COLUMNS:
+                categories[name], columns[name] = _encode(df[source].to_numpy())
+        columns['coupon_rate'] = columns['coupon_rate'] / 100
+        columns['maturity'] = (columns['maturity_date'] - columns['issue_date']) / 365.25
+        categories['bond_type'] = np.array([bond_type])
+        columns['bond_type'] = np.zeros(len(df), dtype=np.int32)
+        return cls(df['CUSIP'].to_numpy(dtype=str), columns, categories)
+
+    @classmethod
+    def from_bonds(cls, bonds, cusips=None):
+        """
+        Builds a universe from Bond objects, which carry no CUSIP, ticker, rating, maturity type or price.
+
+        Args:
+            bonds (List[Bond]): The bonds to include, in order.
+            cusips (List[str], optional): Identifiers for the bonds, their positions by default.
+
+        Returns:
+            BondUniverse: The bonds as column arrays.
+        """
+        count = len(bonds)
+        columns = {
+            'face_value': [bond.face_value for bond in bonds],
+            'coupon_rate': [bond.coupon_rate for bond in bonds],
+            'maturity': [bond.maturity for bond in bonds],
+            'issue_date': np.array([bond.issue_date.date() for bond in bonds], dtype='datetime64[D]').view(np.int64),
+            'maturity_date': np.array([bond.maturity_date.date() for bond in bonds],
+                                      dtype='datetime64[D]').view(np.int64),
+            'ask_price': np.full(count, np.nan),
+        }
+        categories = {}
+        categories['bond_type'], columns['bond_type'] = _encode([bond.bond_type for bond in bonds])
+        for name in ('ticker', 'rating', 'maturity_type'):
+            categories[name], columns[name] = np.array(['']), np.zeros(count, dtype=np.int32)
+        cusips = np.arange(count).astype(str) if cusips is None else cusips
+        return cls(cusips, columns, categories)
+
+    def __len__(self):
+        return self.cusip.shape[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return self.bond(index)
+        return BondUniverse(self.cusip[index], {name: values[index] for name, values in self.columns.items()},
+                            self.categories)
+
+    def column(self, name):
+        if name == 'cusip':
+            return self.cusip
+        values = self.columns[name]
+        if name in CATEGORICAL_COLUMNS:
+            return self.categories[name][values]
+        if name.endswith('_date'):
+            return values.view('datetime64[D]')
+        return values
+
+    def rows(self, cusips):
+        """
+        Returns the positions of the given CUSIPs, looked up in a sorted index built on first use.
+
+        Raises:
+            KeyError: If a CUSIP is not in the universe.
+        """
+        if self._order is None:
+            self._order = np.argsort(self.cusip, kind='stable')
+        cusips = np.atleast_1d(np.asarray(cusips, dtype=str))
+        sorted_cusips = self.cusip[self._order]
+        found = np.searchsorted(sorted_cusips, cusips)
+        known = found < len(self)
+        known[known] = sorted_cusips[found[known]] == cusips[known]
+        if not known.all():
+            raise KeyError(f"Unknown CUSIP {str(cusips[~known][0])!r}")
+        return self._order[found]
+
+    def _matches(self, name, values):
+        # Values are turned into codes once, so the comparison over the bonds is on integers
+        wanted = np.atleast_1d(np.asarray(values, dtype=str))
+        codes = np.flatnonzero(np.isin(self.categories[name], wanted))
+        return np.isin(self.columns[name], codes)
+
+    def filter(self, cusip=None, ticker=None, rating=None, maturity_type=None, bond_type=None):
+        mask = np.ones(len(self), dtype=bool)
+        if cusip is not None:
+            mask &= np.isin(self.cusip, np.atleast_1d(np.asarray(cusip, dtype=str)))
+        for name, values in (('ticker', ticker), ('rating', rating), ('maturity_type', maturity_type),
+                             ('bond_type', bond_type)):
+            if values is not None:
+                mask &= self._matches(name, values)
+        return self[mask]
+
+    def bond(self, index):
+        """
+        Returns one bond of the universe. The values come from arrays that were validated as a whole, so the Bond
+        is constructed without validating them again.
+
+        Args:
+            index (int): The position of the bond.
+
+        Returns:
+            Bond: The bond.
+        """
+        columns = self.columns
+        return Bond.model_construct(
+            bond_type=str(self.categories['bond_type'][columns['bond_type'][index]]),
+            face_value=float(columns['face_value'][index]),
+            coupon_rate=float(columns['coupon_rate'][index]),
+            maturity=float(columns['maturity'][index]),
+            issue_date=datetime.datetime.combine(columns['issue_date'][index].view('datetime64[D]').item(),
+                                                 datetime.time()),
+            maturity_date=datetime.datetime.combine(columns['maturity_date'][index].view('datetime64[D]').item(),
+                                                    datetime.time()),
+        )
+
+    def to_book(self):
+        columns = self.columns
+        return BondBook(columns['face_value'], columns['coupon_rate'], columns['maturity'],
+                        columns['issue_date'].view('datetime64[D]'), columns['maturity_date'].view('datetime64[D]'))
+
+    def to_frame(self):
+        return pd.DataFrame({'cusip': self.cusip, **{name: self.column(name) for name in self.columns}})
@@ -0,0 +1,164 @@
+"""
+A binary columnar cache of bond data CSV files.
+
+The first load of a CSV parses it once, with its dates and '#N/A Field Not Applicable' sentinels, and writes every
+column as a typed .npy file in a directory named after the SHA-256 of the file's content. Later loads of the same
+content, from any process, memory-map those files instead of parsing the CSV again, so worker processes reading the
+same data share the operating system's pages rather than each holding a parsed copy. Editing the CSV changes its
+hash, and the next load builds a new cache entry.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+
+FORMAT_VERSION = 1
+DATE_FORMAT = '%m/%d/%Y'
+DATE_COLUMNS = ('Maturity', 'Issue Date', 'Next Call Date', 'Announce')
+MISSING_VALUES = ('#N/A Field Not Applicable',)
+# Text columns with at most this share of distinct values are stored as categories, the rest as fixed-width strings
+CATEGORY_SHARE = 0.5
+
+_MANIFEST = 'manifest.json'
+
+
+def file_hash(path, chunk_size=2 ** 20):
+    """
+    Returns the SHA-256 hex digest of a file's content.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_directory(path, cache_dir=None):
+    """
+    Returns the cache directory of a CSV file's current content. The cache lives in the BOND_DATA_CACHE directory
+    if that is set, otherwise in .bond_data_cache next to the file.
+    """
+    if cache_dir is None:
+        cache_dir = os.environ.get('BOND_DATA_CACHE') or os.path.join(os.path.dirname(os.path.abspath(path)),
+                                                                      '.bond_data_cache')
+    return os.path.join(cache_dir, file_hash(path))
+
+
+def _parse_dates(values):
+    """
+    Parses date strings once per distinct value into datetime64[s], the resolution pandas keeps without copying.
+    """
+    codes, distinct = pd.factorize(values)
+    dates = pd.to_datetime(distinct, format=DATE_FORMAT).to_numpy(dtype='datetime64[s]')
+    return np.where(codes >= 0, dates[np.maximum(codes, 0)], np.datetime64('NaT'))
+
+
+def _write_cache(path, directory):
+    """
+    Parses the CSV and writes its columns and manifest to a temporary directory that is then renamed into place,
+    so concurrent loaders never see a partial cache.
+    """
+    df = pd.read_csv(path, na_values=list(MISSING_VALUES), keep_default_na=True)
+    columns = []
+    parent = os.path.dirname(directory)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=parent, prefix='.partial-')
+    try:
+        for position, name in enumerate(df.columns):
+            values = df[name]
+            column = {'name': name, 'file': f'{position}.npy'}
+            if name in DATE_COLUMNS:
+                column['kind'] = 'date'
+                array = _parse_dates(values.to_numpy(dtype=object))
+            elif pd.api.types.is_numeric_dtype(values):
+                column['kind'] = 'numeric'
+                array = values.to_numpy()
+            else:
+                values = values.to_numpy(dtype=object)
+                codes, categories = pd.factorize(values, sort=True)
+                if len(categories) <= CATEGORY_SHARE * len(values):
+                    column['kind'] = 'category'
+                    column['categories'] = [str(category) for category in categories]
+                    array = codes.astype(np.int32)
+                else:
+                    column['kind'] = 'string'
+                    array = np.where(pd.isna(values), '', values).astype(str)
+            np.save(os.path.join(staging, column['file']), array, allow_pickle=False)
+            columns.append(column)
+
+        with open(os.path.join(staging, _MANIFEST), 'w') as f:
+            json.dump({'format_version': FORMAT_VERSION, 'source': os.path.abspath(path), 'rows': len(df),
+                       'columns': columns}, f, indent=2)
+        try:
+            os.replace(staging, directory)
+        except OSError:
+            # Another process finished the same cache first
+            if not os.path.exists(os.path.join(directory, _MANIFEST)):
+                raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _read_manifest(directory):
+    try:
+        with open(os.path.join(directory, _MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('format_version') == FORMAT_VERSION else None
+
+
+def load_bond_columns(path, cache_dir=None, mmap_mode='c'):
+    """
+    Returns the columns of a bond data CSV as arrays, memory-mapped from the cache. Dates are datetime64[s] with NaT
+    for missing values, categorical text columns are (codes, categories) pairs with code -1 for missing values, and
+    other text columns are fixed-width string arrays.
+
+    Args:
+        path (str): The CSV file.
+        cache_dir (str, optional): Where cache entries are kept, see cache_directory().
+        mmap_mode (str, optional): The np.load memory-map mode. 'c' shares the pages between processes until one
+            writes to them, which then gets a private copy; 'r' is strictly read-only; None reads into memory.
+
+    Returns:
+        Dict[str, np.ndarray | Tuple[np.ndarray, List[str]]]: The columns in file order.
+    """
+    directory = cache_directory(path, cache_dir)
+    manifest = _read_manifest(directory)
+    if manifest is None:
+        shutil.rmtree(directory, ignore_errors=True)
+        _write_cache(path, directory)
+        manifest = _read_manifest(directory)
+
+    columns = {}
+    for column in manifest['columns']:
+        array = np.load(os.path.join(directory, column['file']), mmap_mode=mmap_mode, allow_pickle=False)
+        columns[column['name']] = (array, column['categories']) if column['kind'] == 'category' else array
+    return columns
+
+
+def load_bond_data(path, cache_dir=None, mmap_mode='c'):
+    """
+    Loads a bond data CSV as a DataFrame through the columnar cache. Numeric and date columns are backed by the
+    memory maps without copying, categorical text columns become pandas categoricals and the date columns are
+    already parsed. Unlike pd.read_csv, missing dates are NaT rather than the '#N/A Field Not Applicable' string.
+
+    Args:
+        path (str): The CSV file.
+        cache_dir (str, optional): Where cache entries are kept, see cache_directory().
+        mmap_mode (str, optional): The np.load memory-map mode. 'c' shares the pages between processes until one
+            writes to them, which then gets a private copy; 'r' is strictly read-only; None reads into memory.
+
+    Returns:
+        DataFrame: The bond data.
+    """
+    columns = {}
+    for name, values in load_bond_columns(path, cache_dir, mmap_mode).items():
+        if isinstance(values, tuple):
+            values = pd.Categorical.from_codes(values[0], values[1])
+        columns[name] = values
+    return pd.DataFrame(columns, copy=False)
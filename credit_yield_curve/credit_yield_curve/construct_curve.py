@@ -1,6 +1,14 @@
+import contextlib
+import numpy as np
 import pandas as pd
 import QuantLib as ql
-import matplotlib.pyplot as plt
+
+from .bond_data import load_bond_data
+from .interpolation import TENORS, YieldCurve, tenor_years
+from .hazard_curve import DEFAULT_KNOTS, DEFAULT_RECOVERY, DEFAULT_RISK_FREE_RATE, SMOOTHING, HazardCurveFitter
+from .snapshot import load_snapshot, save_snapshot, snapshot_path
+from .oas import DEFAULT_MEAN_REVERSION, DEFAULT_VOLATILITY, STEPS_PER_YEAR, HullWhiteTree, calculate_oas, option_signs
+from .yield_solver import bond_cash_flows, bond_yields
 
 
 class CreditYieldCurve:
@@ -18,6 +26,20 @@ class CreditYieldCurve:
     yc_df : DataFrame
         a pandas DataFrame that holds the final, interpolated yield curve data
 
+    curve : YieldCurve
+        the fitted yield curve that yc_df is tabulated from
+
+    fitted : HazardCurve
+        the issuer's hazard-rate curve fitted to every bond's price by fit_curve, None until then
+
+    version : int
+        a counter bumped whenever the data, the yields or the curve change, so holders of earlier results can tell
+        they are stale
+
+    metrics : MetricsRegistry
+        an optional registry (e.g. bond_pricing.metrics.registry) that times each step as a 'credit_yield_curve'
+        stage; nothing is timed without one
+
     Methods
     -------
     load_and_sort_data():
@@ -26,96 +48,357 @@ class CreditYieldCurve:
     calculate_yield():
         Calculates the yield for each bond in the data
 
-    construct_yc():
+    construct_yc(tenors, method, extrapolation, parameters):
         Constructs a yield curve based on the bond yield data
 
-    plot_yields():
-        Plots the yields over time
+    build(tenors, method, extrapolation, snapshot, cache_dir):
+        Loads the data and constructs the curve, from an on-disk snapshot when the same curve was built before
+
+    yield_at(times):
+        Evaluates the constructed yield curve at arbitrary times
+
+    update_quote(cusip, price):
+        Reprices one bond and updates only the parts of the curve it affects
+
+    lattice(mean_reversion, volatility, steps_per_year):
+        Returns the Hull-White tree fitted to the curve, built once per curve version and volatility
+
+    calculate_oas(mean_reversion, volatility, steps_per_year, workers):
+        Calculates the option-adjusted spread, duration and convexity of every bond on the shared tree
 
-    plot_yc():
-        Plots the yield curve
+    fit_curve(knots, recovery, risk_free, maturity_types, smoothing):
+        Fits a hazard-rate curve jointly to the bond prices, starting from the previous fit
+
+    default_probability(horizon):
+        Returns the issuer's default probability implied by the fitted curve
+
+    plot_yields(path):
+        Plots the yields over time, or saves the plot to a PNG or SVG file
+
+    plot_yc(path):
+        Plots the yield curve, or saves the plot to a PNG or SVG file
     """
-    def __init__(self, data_path):
+    def __init__(self, data_path, metrics=None):
         self.data_path = data_path
+        self.metrics = metrics
         self.yc_df = None
         self.df = None
+        self.curve = None
+        self.fitted = None
+        self.version = 0
+        self._rows = {}
+        self._curve_positions = {}
+        self._tenor_years = None
+        self._stale = None
+        self._trees = {}
+        self._fitter = None
+        self._fitter_key = None
+
+    def _stage(self, stage):
+        if self.metrics is None:
+            return contextlib.nullcontext()
+        return self.metrics.stage('credit_yield_curve', stage)
+
+    @property
+    def yc_df(self):
+        if self._stale is not None and self._stale.any():
+            self._yc_df.loc[self._stale, 'Yield'] = self.curve(self._tenor_years[self._stale])
+            self._stale[:] = False
+        return self._yc_df
+
+    @yc_df.setter
+    def yc_df(self, yc_df):
+        self._yc_df = yc_df
+        self._stale = None
 
     def load_and_sort_data(self):
         """
-        Loads and sorts the data by maturity from the file at data_path.
+        Loads and sorts the data by maturity from the file at data_path. The file is parsed once into the
+        columnar cache of bond_data, and later loads of the same content memory-map the cached columns.
         """
-        df = pd.read_csv(self.data_path)
-        df['Maturity'] = pd.to_datetime(df['Maturity'], format='%m/%d/%Y')
-        df = df.sort_values(by='Maturity')
+        with self._stage('load_and_sort_data'):
+            df = load_bond_data(self.data_path)
+            df = df.sort_values(by='Maturity')
         self.df = df
+        self._rows = dict(zip(df['CUSIP'], df.index))
+        self._fitter = None
+        self.version += 1
 
     def calculate_yield(self):
         """
-        Calculates the yield for each bond in the data using the QuantLib library.
+        Calculates the yield to maturity of every bond in the data from its ask price, taken as a clean price per
+        100 face. All bonds are solved at once by bond_yields; the few that the batched solver cannot settle are
+        handed to QuantLib. Bonds that have matured by the settlement date get a NaN yield.
 
         Returns:
             df (DataFrame): The original DataFrame with an added 'Yield' column.
         """
-        yield_list = []
-        for index, row in self.df.iterrows():
-            settlement_date = ql.Settings.instance().evaluationDate
-            maturity_date = ql.Date(row['Maturity'].day, int(row['Maturity'].month), row['Maturity'].year)
-
-            schedule = ql.Schedule(settlement_date, maturity_date, ql.Period(ql.Semiannual),
-                                   ql.UnitedStates(ql.UnitedStates.GovernmentBond),
-                                   ql.Unadjusted, ql.Unadjusted, ql.DateGeneration.Backward, False)
-            bond = ql.FixedRateBond(2, 100, schedule, [row['Cpn']/100], ql.Thirty360(ql.Thirty360.USA))
-            bond.setPricingEngine(ql.DiscountingBondEngine(ql.YieldTermStructureHandle(ql.FlatForward(
-                settlement_date, row['Ask Price']/100, ql.Thirty360(ql.Thirty360.USA)))))
-            yield_list.append(bond.bondYield(ql.Thirty360(ql.Thirty360.USA), ql.Compounded, ql.Semiannual))
-        self.df['Yield'] = yield_list
+        with self._stage('calculate_yield'):
+            self.df['Yield'] = bond_yields(ql.Settings.instance().evaluationDate,
+                                           self.df['Maturity'].to_numpy(dtype='datetime64[D]'),
+                                           self.df['Cpn'].to_numpy() / 100, self.df['Ask Price'].to_numpy())
+        self.version += 1
         return self.df
 
-    def construct_yc(self):
-        """
-        Constructs a yield curve based on the bond yield data. The yield curve is interpolated for a specific
-        set of tenors.
-        """
-        at_maturity_df = self.df[self.df['Maturity Type'] == 'AT MATURITY'].copy()
-        tenors = ['1m', '3m', '6m', '1y', '2y', '3y', '5y', '7y', '10y', '20y', '30y', '50y', '70y']
-        tenors_in_years = [1 / 12, 3 / 12, 6 / 12, 1, 2, 3, 5, 7, 10, 20, 30, 50, 70]
-        today = pd.to_datetime(ql.Date.todaysDate().ISO())
-        at_maturity_df.loc[:, 'Maturity Years'] = at_maturity_df['Maturity'].apply(lambda x: (x - today).days / 365.25)
-        result_list = []
-        for tenor, tenor_year in zip(tenors, tenors_in_years):
-            lower_bond = at_maturity_df[at_maturity_df['Maturity Years'] <= tenor_year].iloc[-1]
-            upper_bond = at_maturity_df[at_maturity_df['Maturity Years'] >= tenor_year].iloc[0]
-            if lower_bond['Maturity Years'] == upper_bond['Maturity Years']:
-                interpolated_yield = lower_bond['Yield']
-            else:
-                slope = (upper_bond['Yield'] - lower_bond['Yield']) / (
-                        upper_bond['Maturity Years'] - lower_bond['Maturity Years'])
-                interpolated_yield = slope * (tenor_year - lower_bond['Maturity Years']) + lower_bond['Yield']
-            result_list.append({'Tenor': tenor, 'Yield': interpolated_yield})
-        self.yc_df = pd.DataFrame(result_list)
-
-    def plot_yields(self):
+    def construct_yc(self, tenors=TENORS, method='linear', extrapolation='flat', parameters=None):
+        """
+        Constructs a yield curve through the yields of the bullet bonds and interpolates it at a set of tenors.
+        The fitted curve is kept in `curve` so it can be queried at any other time with yield_at().
+
+        Args:
+            tenors (Iterable[str]): The tenor labels to tabulate in yc_df, e.g. '3m' or '10y'.
+            method (str): The interpolation method, see YieldCurve.
+            extrapolation (str): What to do with tenors outside the bond maturities, see YieldCurve.
+            parameters (np.ndarray, optional): The curve's parameters fitted earlier to the same yields, see
+                YieldCurve.parameters.
+        """
+        with self._stage('construct_yc'):
+            at_maturity_df = self.df[self.df['Maturity Type'] == 'AT MATURITY']
+            today = np.datetime64(ql.Settings.instance().evaluationDate.ISO())
+            maturity_days = at_maturity_df['Maturity'].to_numpy(dtype='datetime64[D]') - today
+            maturity_years = maturity_days.astype(np.float64) / 365.25
+            self.curve = YieldCurve(maturity_years, at_maturity_df['Yield'].to_numpy(), method, extrapolation,
+                                    parameters)
+            self._curve_positions = dict(zip(at_maturity_df.index, range(len(at_maturity_df))))
+            tenors = list(tenors)
+            self._tenor_years = tenor_years(tenors)
+            self.yc_df = pd.DataFrame({'Tenor': tenors, 'Yield': self.curve(self._tenor_years)})
+        self._stale = np.zeros(len(tenors), dtype=bool)
+        self.version += 1
+
+    def build(self, tenors=TENORS, method='linear', extrapolation='flat', snapshot=True, cache_dir=None):
+        """
+        Loads the data, calculates the yields and constructs the curve, like load_and_sort_data(),
+        calculate_yield() and construct_yc() in turn. The yields and the curve's fitted parameters are saved in a
+        snapshot next to the bond data cache, keyed by the content of the CSV, the evaluation date and the curve
+        settings, and later builds of the same curve in any process load the snapshot instead of solving the
+        yields again. Changing any of those inputs builds a new snapshot.
+
+        Args:
+            tenors (Iterable[str]): The tenor labels to tabulate in yc_df, e.g. '3m' or '10y'.
+            method (str): The interpolation method, see YieldCurve.
+            extrapolation (str): What to do with tenors outside the bond maturities, see YieldCurve.
+            snapshot (bool): Load and save snapshots; False always calculates.
+            cache_dir (str, optional): Where cache entries are kept, see bond_data.cache_directory().
+
+        Returns:
+            bool: True if the curve was loaded from a snapshot.
+        """
+        tenors = list(tenors)
+        self.load_and_sort_data()
+        path = None
+        if snapshot:
+            path = snapshot_path(self.data_path, ql.Settings.instance().evaluationDate, tenors, method,
+                                 extrapolation, cache_dir)
+            saved = load_snapshot(path)
+            if saved is not None and len(saved[0]) == len(self.df):
+                yields, parameters = saved
+                # The snapshot is in file order and the index of the sorted data holds each row's file position
+                self.df['Yield'] = yields[self.df.index.to_numpy()]
+                self.version += 1
+                self.construct_yc(tenors, method, extrapolation, parameters)
+                return True
+
+        self.calculate_yield()
+        self.construct_yc(tenors, method, extrapolation)
+        if path is not None:
+            yields = np.empty(len(self.df))
+            yields[self.df.index.to_numpy()] = self.df['Yield'].to_numpy()
+            save_snapshot(path, yields, self.curve.parameters)
+        return False
+
+    def yield_at(self, times):
+        """
+        Evaluates the constructed yield curve at arbitrary times.
+
+        Args:
+            times (array-like): The times in years.
+
+        Returns:
+            np.ndarray: The interpolated yields.
+        """
+        return self.curve(times)
+
+    def update_quote(self, cusip, price):
+        """
+        Updates the ask price of one bond and recalculates its yield. If the bond is one of the curve's knots,
+        only that knot is replaced: the curve segments and yc_df tenors around it are recalculated lazily the
+        next time they are read.
+
+        Args:
+            cusip (str): The CUSIP of the bond.
+            price (float): The new ask price, per 100 face.
+
+        Returns:
+            float: The new yield of the bond.
+        """
+        if cusip not in self._rows:
+            raise KeyError(f"Unknown CUSIP {cusip!r}")
+        with self._stage('update_quote'):
+            label = self._rows[cusip]
+            maturity = np.array([self.df.at[label, 'Maturity']], dtype='datetime64[D]')
+            bond_yield = bond_yields(ql.Settings.instance().evaluationDate, maturity, [self.df.at[label, 'Cpn'] / 100],
+                                     [price])[0]
+            self.df.at[label, 'Ask Price'] = price
+            if 'Yield' in self.df:
+                self.df.at[label, 'Yield'] = bond_yield
+            position = self._curve_positions.get(label)
+            if position is not None:
+                low, high = self.curve.update(position, bond_yield)
+                self._stale |= (self._tenor_years >= low) & (self._tenor_years <= high)
+        self.version += 1
+        return bond_yield
+
+    def _years(self, column):
+        today = np.datetime64(ql.Settings.instance().evaluationDate.ISO())
+        days = self.df[column].to_numpy(dtype='datetime64[D]') - today
+        return np.where(np.isnat(days), np.nan, days.astype(np.float64)) / 365.25
+
+    def lattice(self, mean_reversion=DEFAULT_MEAN_REVERSION, volatility=DEFAULT_VOLATILITY,
+                steps_per_year=STEPS_PER_YEAR):
+        """
+        Returns a Hull-White tree fitted to the constructed curve and long enough for every bond in the data. Trees
+        are cached by curve version and model parameters, so all of the issuer's bonds, and every later call until
+        the data or the curve change, share one lattice.
+
+        Args:
+            mean_reversion (float): The Hull-White mean reversion speed.
+            volatility (float): The Hull-White short-rate volatility.
+            steps_per_year (int): The time steps per year, a multiple of the two coupons a year.
+
+        Returns:
+            HullWhiteTree: The fitted tree.
+        """
+        key = (self.version, mean_reversion, volatility, steps_per_year)
+        tree = self._trees.get(key)
+        if tree is None:
+            horizon = max(np.nanmax(self._years('Maturity'), initial=0.0), 1.0 / steps_per_year)
+            with self._stage('lattice'):
+                tree = HullWhiteTree(self.curve.discount, horizon, mean_reversion, volatility, steps_per_year)
+            self._trees = {key: tree}
+        return tree
+
+    def calculate_oas(self, mean_reversion=DEFAULT_MEAN_REVERSION, volatility=DEFAULT_VOLATILITY,
+                      steps_per_year=STEPS_PER_YEAR, workers=None):
+        """
+        Calculates the option-adjusted spread of every bond over the constructed curve from its ask price. Callable
+        bonds can be called and putable bonds put at par on any step from the next call date, or from the next step
+        when they have none, to maturity; bullet bonds have no option, so their OAS is their zero-volatility spread
+        to the curve. All bonds are solved on the one tree returned by lattice(), in chunks spread over worker
+        processes. Convexity is effective convexity over a 25bp OAS shift.
+
+        Args:
+            mean_reversion (float): The Hull-White mean reversion speed.
+            volatility (float): The Hull-White short-rate volatility.
+            steps_per_year (int): The time steps per year of the tree.
+            workers (int, optional): The number of worker processes, os.cpu_count() by default; 0 solves in this
+                process. A single chunk of bonds is always solved in this process.
+
+        Returns:
+            df (DataFrame): The original DataFrame with added 'OAS', 'OA Duration' and 'OA Convexity' columns.
+        """
+        tree = self.lattice(mean_reversion, volatility, steps_per_year)
+        with self._stage('calculate_oas'):
+            oas, duration, convexity = calculate_oas(
+                tree, self._years('Maturity'), self.df['Cpn'].to_numpy() / 100, self.df['Ask Price'].to_numpy(),
+                option_time=self._years('Next Call Date'), option_sign=option_signs(self.df['Maturity Type']),
+                workers=workers)
+            self.df['OAS'] = oas
+            self.df['OA Duration'] = duration
+            self.df['OA Convexity'] = convexity
+        return self.df
+
+    def fit_curve(self, knots=DEFAULT_KNOTS, recovery=DEFAULT_RECOVERY, risk_free=DEFAULT_RISK_FREE_RATE,
+                  maturity_types=None, smoothing=SMOOTHING):
+        """
+        Fits a piecewise-constant hazard-rate curve jointly to the ask prices of the bonds, by least squares on
+        prices over a risk-free curve. The bonds' cash flows are laid out once per data load, evaluation date and
+        settings; every later fit, e.g. after update_quote(), starts from the previous hazards and converges in a
+        few iterations. The model clean prices are added as a 'Fitted Price' column.
+
+        Args:
+            knots (Iterable[float]): The ends of the hazard segments in years.
+            recovery (float): The share of market value recovered on default.
+            risk_free (float or Callable): A flat semi-annual risk-free rate, or a discount function of time in
+                years such as YieldCurve.discount.
+            maturity_types (Iterable[str], optional): The maturity types of the bonds to fit, e.g.
+                ['AT MATURITY']; all bonds by default. Options are not valued, so callable bonds are fitted as
+                bullets.
+            smoothing (float): The weight of the penalty on jumps between neighbouring hazards.
+
+        Returns:
+            HazardCurve: The fitted curve, also kept in `fitted`.
+        """
+        evaluation_date = ql.Settings.instance().evaluationDate
+        key = (evaluation_date.serialNumber(), tuple(knots), recovery, risk_free, smoothing)
+        if self._fitter is None or self._fitter_key != key:
+            flows = bond_cash_flows(evaluation_date, self.df['Maturity'].to_numpy(dtype='datetime64[D]'),
+                                    self.df['Cpn'].to_numpy() / 100)
+            self._fitter = HazardCurveFitter(flows, knots, recovery, risk_free, smoothing)
+            self._fitter_key = key
+        weights = None
+        if maturity_types is not None:
+            weights = self.df['Maturity Type'].isin(list(maturity_types)).to_numpy(dtype=np.float64)
+        with self._stage('fit_curve'):
+            self.fitted = self._fitter.fit(self.df['Ask Price'].to_numpy(), weights)
+            self.df['Fitted Price'] = self._fitter.prices(self.fitted.hazards)
+        self.version += 1
+        return self.fitted
+
+    def default_probability(self, horizon=1.0):
+        """
+        Returns the probability that the issuer defaults within the horizon, implied by the curve fitted with
+        fit_curve(); it can be passed to JtdCalculator and the jtd_calculator portfolio functions as default_prob.
+
+        Args:
+            horizon (float or array-like): The horizon in years.
+
+        Returns:
+            float or np.ndarray: The default probability at each horizon.
+        """
+        if self.fitted is None:
+            raise ValueError("Fit the curve with fit_curve() first")
+        probability = self.fitted.default_probability(horizon)
+        return float(probability[0]) if np.ndim(horizon) == 0 else probability
+
+    @staticmethod
+    def _plot(x, y, label, xlabel, title, path):
+        if path is None:
+            import matplotlib.pyplot as plt
+            figure = plt.figure(figsize=(10, 6))
+        else:
+            # A bare Figure renders through matplotlib's file canvases, so saving needs no display or GUI backend
+            from matplotlib.figure import Figure
+            figure = Figure(figsize=(10, 6))
+        axes = figure.add_subplot()
+        axes.plot(x, y, label=label)
+        axes.set_xlabel(xlabel)
+        axes.set_ylabel('Yield')
+        axes.set_title(title)
+        axes.grid(True)
+        axes.legend()
+        if path is None:
+            plt.show()
+        else:
+            figure.savefig(path)
+
+    def plot_yields(self, path=None):
         """
         Plots the yields over time using matplotlib. The x-axis is maturity and the y-axis is yield.
+
+        Args:
+            path (str, optional): A file to save the plot to instead of showing it, in the format of its extension
+                such as .png or .svg.
         """
-        plt.figure(figsize=(10, 6))
-        plt.plot(self.df['Maturity'], self.df['Yield'], label='Yields')
-        plt.xlabel('Maturity')
-        plt.ylabel('Yield')
-        plt.title('IBM Bond Yields Plot')
-        plt.grid(True)
-        plt.legend()
-        plt.show()
+        self._plot(self.df['Maturity'], self.df['Yield'], 'Yields', 'Maturity', 'IBM Bond Yields Plot', path)
 
-    def plot_yc(self):
+    def plot_yc(self, path=None):
         """
         Plots the yield curve using matplotlib. The x-axis is the tenor and the y-axis is the yield.
+
+        Args:
+            path (str, optional): A file to save the plot to instead of showing it, in the format of its extension
+                such as .png or .svg.
         """
-        plt.figure(figsize=(10, 6))
-        plt.plot(self.yc_df['Tenor'], self.yc_df['Yield'], label='Interpolated Yield Curve')
-        plt.xlabel('Tenor')
-        plt.ylabel('Yield')
-        plt.title('Interpolated Yield Curve')
-        plt.grid(True)
-        plt.legend()
-        plt.show()
+        self._plot(self.yc_df['Tenor'], self.yc_df['Yield'], 'Interpolated Yield Curve', 'Tenor',
+                   'Interpolated Yield Curve', path)
@@ -0,0 +1,52 @@
+"""
+The US government bond calendar and semi-annual coupon conventions shared by the vectorized bond pricers: BondBook
+in bond_pricing and the credit curve's yield solver.
+"""
+import functools
+import numpy as np
+import QuantLib as ql
+
+
+CALENDAR = ql.UnitedStates(ql.UnitedStates.GovernmentBond)
+SETTLEMENT_DAYS = 2
+COUPON_MONTHS = 6
+
+
+@functools.lru_cache(maxsize=8)
+def holidays(first_year: int, last_year: int) -> np.ndarray:
+    """
+    Returns the US government bond holidays between two years as a datetime64[D] array.
+    """
+    dates = ql.Calendar.holidayList(CALENDAR, ql.Date(1, 1, first_year), ql.Date(31, 12, last_year))
+    return np.array([d.ISO() for d in dates], dtype='datetime64[D]')
+
+
+class MonthTable:
+    """
+    Day numbers of the first day of each month over a range, so that month arithmetic and day-of-month lookups
+    on whole date arrays are done with integer lookups instead of calendar conversions.
+    """
+
+    def __init__(self, first_month: int, last_month: int):
+        self.first_month = first_month
+        months = np.arange(first_month, last_month + 2).astype('datetime64[M]')
+        starts = months.astype('datetime64[D]').astype(np.int64)
+        self.starts = starts[:-1]
+        self.lengths = np.diff(starts)
+
+    def date(self, month: np.ndarray, day: np.ndarray) -> np.ndarray:
+        """
+        Returns the day number of `day` in `month`, clamped to the month's length like QuantLib does.
+        """
+        index = month - self.first_month
+        return self.starts[index] + np.minimum(day, self.lengths[index]) - 1
+
+    def day_of_month(self, days: np.ndarray, month: np.ndarray) -> np.ndarray:
+        return days - self.starts[month - self.first_month] + 1
+
+    def split(self, days: np.ndarray):
+        """
+        Returns the month index (months since 1970-01), day of month and month length of each day number.
+        """
+        index = np.searchsorted(self.starts, days, side='right') - 1
+        return index + self.first_month, days - self.starts[index] + 1, self.lengths[index]
@@ -0,0 +1,258 @@
+"""
+An issuer curve of piecewise-constant default intensities, fitted jointly to the prices of all the issuer's bonds.
+
+A bond is priced by discounting its cash flows on a risk-free curve and on the probability of surviving to each
+payment, with a fixed recovery of market value: the risky discount factor to time t is the risk-free one times
+exp(-(1 - recovery) * H(t)), where H is the cumulative hazard. Each hazard is the intensity between two knots, so H
+is linear in the hazards, and the derivatives of every price with respect to every hazard come in closed form from
+the same exponentials as the prices. The fit is a Levenberg-Marquardt least squares on prices with that analytic
+Jacobian.
+
+The fitter keeps the bonds' cash flows and their exposure to each hazard between fits, and starts every fit from
+the previous solution, so refitting after quotes move takes a few iterations over arrays that are already laid out.
+"""
+import numpy as np
+
+from .interpolation import _discount_logs
+
+
+DEFAULT_KNOTS = (1.0, 2.0, 3.0, 5.0, 7.0, 10.0, 20.0, 30.0)
+# The base recovery rate of JtdCalculator
+DEFAULT_RECOVERY = 0.4
+# The API's default risk-free rate, semi-annually compounded
+DEFAULT_RISK_FREE_RATE = 0.04
+# Weight of the squared jumps between neighbouring hazards against the squared price errors. It pins down hazards
+# no bond depends on and keeps the curve from chasing single quotes, at little cost to the fit
+SMOOTHING = 1e4
+
+
+def flat_discount(rate):
+    """
+    Returns the discount function of a flat, semi-annually compounded rate.
+    """
+    def discount(times):
+        return np.exp(_discount_logs(np.asarray(times, dtype=np.float64), rate))
+    return discount
+
+
+def _exposures(times, knots):
+    """
+    Returns the time spent in each hazard segment up to each time, as a (times, knots) array. Segment k runs from
+    knot k - 1 (or 0) to knot k, and the last segment extends past the last knot.
+    """
+    starts = np.concatenate([[0.0], knots[:-1]])
+    widths = np.append(np.diff(starts), np.inf)
+    return np.clip(np.asarray(times, dtype=np.float64)[:, None] - starts[None, :], 0.0, widths[None, :])
+
+
+class HazardCurve:
+    """
+    An issuer curve of piecewise-constant hazard rates over a risk-free curve.
+
+    Attributes
+    ----------
+    knots : np.ndarray
+        The ends of the hazard segments in years; the last hazard also applies past the last knot.
+
+    hazards : np.ndarray
+        The default intensity on each segment.
+
+    recovery : float
+        The share of market value recovered on default.
+
+    risk_free : Callable
+        The risk-free discount function of time in years.
+
+    Methods
+    -------
+    cumulative_hazard(times):
+        Returns the integrated hazard up to each time.
+
+    survival(times):
+        Returns the probabilities of surviving to each time.
+
+    default_probability(times):
+        Returns the probabilities of defaulting before each time.
+
+    discount(times):
+        Returns the issuer's risky discount factors.
+
+    __call__(times):
+        Returns the issuer's semi-annually compounded zero yields, like YieldCurve.
+    """
+    def __init__(self, knots, hazards, recovery=DEFAULT_RECOVERY, risk_free=None):
+        self.knots = np.asarray(knots, dtype=np.float64)
+        self.hazards = np.asarray(hazards, dtype=np.float64)
+        if self.knots.shape != self.hazards.shape:
+            raise ValueError("A hazard curve needs one hazard per knot")
+        self.recovery = recovery
+        self.risk_free = risk_free or flat_discount(DEFAULT_RISK_FREE_RATE)
+
+    def cumulative_hazard(self, times):
+        return _exposures(np.atleast_1d(times), self.knots) @ self.hazards
+
+    def survival(self, times):
+        return np.exp(-self.cumulative_hazard(times))
+
+    def default_probability(self, times):
+        return -np.expm1(-self.cumulative_hazard(times))
+
+    def discount(self, times):
+        times = np.atleast_1d(np.asarray(times, dtype=np.float64))
+        return self.risk_free(times) * np.exp(-(1 - self.recovery) * self.cumulative_hazard(times))
+
+    def __call__(self, times):
+        times = np.maximum(np.atleast_1d(np.asarray(times, dtype=np.float64)), 1e-6)
+        return 2 * np.expm1(-np.log(self.discount(times)) / (2 * times))
+
+
+class HazardCurveFitter:
+    """
+    Fits hazard curves to the prices of a fixed set of bonds, as often as their quotes change.
+
+    Attributes
+    ----------
+    knots : np.ndarray
+        The ends of the hazard segments in years.
+
+    recovery : float
+        The share of market value recovered on default.
+
+    risk_free : Callable
+        The risk-free discount function of time in years.
+
+    hazards : np.ndarray
+        The last fitted hazards, which the next fit starts from; None before the first fit.
+
+    iterations : int
+        The number of iterations the last fit took.
+
+    Methods
+    -------
+    prices(hazards):
+        Returns the model clean prices of the bonds under the given hazards.
+
+    fit(clean_prices, weights):
+        Fits the hazards to the bonds' clean prices and returns the curve.
+    """
+    def __init__(self, cash_flows, knots=DEFAULT_KNOTS, recovery=DEFAULT_RECOVERY, risk_free=DEFAULT_RISK_FREE_RATE,
+                 smoothing=SMOOTHING):
+        self.knots = np.asarray(knots, dtype=np.float64)
+        self.recovery = recovery
+        self.risk_free = risk_free if callable(risk_free) else flat_discount(risk_free)
+        self.hazards = None
+        self.iterations = 0
+        self._damping = 1e-3
+
+        # Each flow lies in one hazard segment: its cumulative hazard is the sum over the segments before it plus
+        # its time into its own segment, so prices and derivatives cost one pass over the flows per fit iteration
+        rows = cash_flows.rows
+        self._count = len(cash_flows.accrued)
+        self._accrued = cash_flows.accrued
+        self._bonds = np.flatnonzero(np.bincount(rows, minlength=self._count))
+        positions = np.searchsorted(self._bonds, rows)
+        starts = np.concatenate([[0.0], self.knots[:-1]])
+        self._widths = np.append(np.diff(starts), 0.0)
+        segments = np.searchsorted(self.knots[:-1], cash_flows.years, side='left')
+        self._segments = segments
+        self._into = cash_flows.years - starts[segments]
+        self._cells = positions * len(self.knots) + segments
+        self._risk_free_values = cash_flows.amounts * self.risk_free(cash_flows.years)
+        self._has_flows = cash_flows.has_flows
+        differences = np.diff(np.eye(len(self.knots)), axis=0)
+        self._penalty = np.sqrt(smoothing) * differences
+
+    def _evaluate(self, hazards, jacobian=True):
+        """
+        Returns the dirty prices of the bonds with flows and, optionally, their derivatives with respect to each
+        hazard.
+        """
+        loss = 1 - self.recovery
+        before = np.concatenate([[0.0], np.cumsum(self._widths * hazards)[:-1]])
+        cumulative = before[self._segments] + self._into * hazards[self._segments]
+        values = self._risk_free_values * np.exp(-loss * cumulative)
+        shape = (len(self._bonds), len(self.knots))
+        cells = np.bincount(self._cells, weights=values, minlength=shape[0] * shape[1]).reshape(shape)
+        prices = cells.sum(axis=1)
+        if not jacobian:
+            return prices, None
+        # A hazard moves the flows inside its segment by their time into it, and every later flow by its width
+        inside = np.bincount(self._cells, weights=values * self._into, minlength=shape[0] * shape[1]).reshape(shape)
+        later = np.cumsum(cells[:, ::-1], axis=1)[:, ::-1] - cells
+        return prices, -loss * (inside + self._widths * later)
+
+    @staticmethod
+    def _step(system, gradient, hazards):
+        """
+        Solves the damped normal equations for a step that keeps the hazards non-negative. Hazards the step would
+        take below zero are set to zero and the step is solved again for the others.
+        """
+        step = np.zeros_like(hazards)
+        fixed = (hazards <= 0) & (gradient >= 0)
+        step[fixed] = -hazards[fixed]
+        for _ in range(len(hazards)):
+            free = ~fixed
+            rhs = -gradient[free] - system[np.ix_(free, fixed)] @ step[fixed]
+            step[free] = np.linalg.solve(system[np.ix_(free, free)], rhs)
+            negative = free & (hazards + step < 0)
+            if not negative.any():
+                break
+            fixed |= negative
+            step[negative] = -hazards[negative]
+        return step
+
+    def prices(self, hazards):
+        clean = np.full(self._count, np.nan)
+        clean[self._bonds] = self._evaluate(np.asarray(hazards, dtype=np.float64), jacobian=False)[0]
+        clean -= self._accrued
+        clean[~self._has_flows] = np.nan
+        return clean
+
+    def fit(self, clean_prices, weights=None, accuracy=1e-8, max_iterations=100):
+        """
+        Fits the hazards by weighted least squares on dirty prices, starting from the previous fit. Bonds with a
+        NaN price or a zero weight, and bonds that have matured, do not take part.
+
+        Args:
+            clean_prices (array-like): The clean prices per 100 face, one per bond of the cash flows.
+            weights (array-like, optional): The weight of each bond's price error, 1 by default.
+            accuracy (float): The largest change of any hazard at which the fit has converged.
+            max_iterations (int): The maximum number of iterations.
+
+        Returns:
+            HazardCurve: The fitted curve.
+        """
+        dirty = np.asarray(clean_prices, dtype=np.float64)[self._bonds] + self._accrued[self._bonds]
+        weights = np.ones(len(self._bonds)) if weights is None else np.asarray(weights, dtype=np.float64)[self._bonds]
+        weights = np.where(np.isfinite(dirty) & self._has_flows[self._bonds], weights, 0.0)
+        dirty = np.where(weights > 0, dirty, 0.0)
+
+        def cost(hazards, prices):
+            residuals = weights * (prices - dirty)
+            return residuals @ residuals + np.sum((self._penalty @ hazards) ** 2)
+
+        hazards = np.full(len(self.knots), 0.01) if self.hazards is None else self.hazards.copy()
+        prices, slopes = self._evaluate(hazards)
+        current = cost(hazards, prices)
+        damping = self._damping
+        iteration = 0
+        for iteration in range(1, max_iterations + 1):
+            jacobian = np.vstack([weights[:, None] * slopes, self._penalty])
+            residuals = np.concatenate([weights * (prices - dirty), self._penalty @ hazards])
+            normal = jacobian.T @ jacobian
+            gradient = jacobian.T @ residuals
+            step = self._step(normal + damping * np.diag(np.diag(normal) + 1e-12), gradient, hazards)
+            trial_prices, trial_slopes = self._evaluate(hazards + step)
+            trial = cost(hazards + step, trial_prices)
+            if trial <= current:
+                hazards, prices, slopes, current = hazards + step, trial_prices, trial_slopes, trial
+                damping = max(damping / 10, 1e-12)
+            else:
+                damping *= 10
+            if np.abs(step).max() < accuracy:
+                break
+
+        self._damping = damping
+        self.hazards = hazards
+        self.iterations = iteration
+        return HazardCurve(self.knots, hazards, self.recovery, self.risk_free)
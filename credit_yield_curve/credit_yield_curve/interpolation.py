@@ -0,0 +1,282 @@
+import numpy as np
+
+
+TENORS = ('1m', '3m', '6m', '1y', '2y', '3y', '5y', '7y', '10y', '20y', '30y', '50y', '70y')
+METHODS = ('linear', 'log_linear', 'monotone_cubic', 'nss')
+EXTRAPOLATIONS = ('flat', 'extend', 'nan', 'raise')
+
+_TENOR_UNITS = {'d': 1 / 365.25, 'w': 7 / 365.25, 'm': 1 / 12, 'y': 1.0}
+
+
+def tenor_years(tenors):
+    """
+    Converts tenor labels such as '1m', '10y' or '2w' to year fractions.
+
+    Args:
+        tenors (Iterable[str]): The tenor labels.
+
+    Returns:
+        np.ndarray: The tenors in years.
+    """
+    try:
+        return np.array([float(tenor[:-1]) * _TENOR_UNITS[tenor[-1].lower()] for tenor in tenors])
+    except (KeyError, ValueError, IndexError):
+        raise ValueError(f"Tenors must look like '3m' or '10y', got {list(tenors)}")
+
+
+def _discount_logs(times, yields):
+    """
+    Log discount factors of semi-annually compounded yields.
+    """
+    return -2 * times * np.log1p(yields / 2)
+
+
+def _monotone_slopes(times, values):
+    """
+    Fritsch-Carlson knot slopes for a shape-preserving cubic Hermite interpolant.
+    """
+    widths = np.diff(times)
+    secants = np.diff(values) / widths
+    slopes = np.zeros_like(values)
+    if len(values) == 2:
+        slopes[:] = secants[0]
+        return slopes
+
+    # Interior slopes are weighted harmonic means of neighbouring secants, zero at local extrema
+    left, right = secants[:-1], secants[1:]
+    w1 = 2 * widths[1:] + widths[:-1]
+    w2 = widths[1:] + 2 * widths[:-1]
+    same_sign = (left * right) > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slopes[1:-1] = np.where(same_sign, (w1 + w2) / (w1 / left + w2 / right), 0.0)
+
+    # End slopes use the three-point formula, limited so the end segments stay monotone
+    for end, h0, h1, d0, d1 in ((0, widths[0], widths[1], secants[0], secants[1]),
+                                (-1, widths[-1], widths[-2], secants[-1], secants[-2])):
+        slope = ((2 * h0 + h1) * d0 - h0 * d1) / (h0 + h1)
+        if np.sign(slope) != np.sign(d0):
+            slope = 0.0
+        elif np.sign(d0) != np.sign(d1) and abs(slope) > abs(3 * d0):
+            slope = 3 * d0
+        slopes[end] = slope
+    return slopes
+
+
+def _nss_basis(times, tau1, tau2):
+    """
+    The four Nelson-Siegel-Svensson factor loadings at each time.
+    """
+    times = np.maximum(times, 1e-8)
+    x1 = times / tau1
+    x2 = times / tau2
+    decay1 = -np.expm1(-x1) / x1
+    decay2 = -np.expm1(-x2) / x2
+    return np.stack([np.ones_like(times), decay1, decay1 - np.exp(-x1), decay2 - np.exp(-x2)], axis=-1)
+
+
+def _fit_nss(times, yields, taus=np.geomspace(0.5, 30, 30)):
+    """
+    Fits Nelson-Siegel-Svensson parameters by least squares: the betas are linear in the loadings, so they are
+    solved exactly for every pair of decay constants on a grid and the best pair is kept. The second decay constant
+    is kept at least twice the first, since nearly equal ones make the two hump loadings collinear.
+    """
+    best = None
+    for tau1 in taus:
+        for tau2 in taus[taus >= 2 * tau1]:
+            basis = _nss_basis(times, tau1, tau2)
+            betas = np.linalg.lstsq(basis, yields, rcond=None)[0]
+            error = np.sum((basis @ betas - yields) ** 2)
+            if best is None or error < best[0]:
+                best = (error, betas, tau1, tau2)
+    return best[1], best[2], best[3]
+
+
+class YieldCurve:
+    """
+    A yield curve through a set of (time, yield) knots that can be evaluated on any grid of times at once.
+
+    The knots are sorted once on construction and everything a method needs (slopes, log discount factors or
+    fitted parameters) is precomputed, so evaluating a grid is a single np.searchsorted followed by array
+    arithmetic. Yields are semi-annually compounded, as returned by CreditYieldCurve.calculate_yield.
+
+    Attributes
+    ----------
+    times : np.ndarray
+        The sorted knot times in years; yields of knots that share a time are averaged.
+
+    yields : np.ndarray
+        The knot yields.
+
+    method : str
+        The interpolation method, one of:
+        'linear' - linear in yield;
+        'log_linear' - linear in log discount factor, i.e. piecewise flat forward rates;
+        'monotone_cubic' - a Fritsch-Carlson cubic that does not overshoot the knots;
+        'nss' - a Nelson-Siegel-Svensson curve fitted to the knots by least squares.
+
+    extrapolation : str
+        What happens outside [times[0], times[-1]], one of:
+        'flat' - hold the yield at the nearest end;
+        'extend' - continue the method's own formula (the end segment for 'linear', 'log_linear' and
+        'monotone_cubic', the fitted curve for 'nss');
+        'nan' - return NaN;
+        'raise' - raise a ValueError.
+
+    parameters : np.ndarray
+        The fitted NSS parameters, empty for the other methods. Passing them back to the constructor with the same
+        knots skips the fit.
+
+    Methods
+    -------
+    __call__(times):
+        Returns the interpolated yields at the given times.
+
+    discount(times):
+        Returns the discount factors implied by the interpolated yields.
+
+    update(position, yield_):
+        Replaces the yield of one input point, deferring the recalculation of the segments it touches.
+    """
+    def __init__(self, times, yields, method='linear', extrapolation='flat', parameters=None):
+        if method not in METHODS:
+            raise ValueError(f"Unknown interpolation method {method!r}, expected one of {METHODS}")
+        if extrapolation not in EXTRAPOLATIONS:
+            raise ValueError(f"Unknown extrapolation {extrapolation!r}, expected one of {EXTRAPOLATIONS}")
+        self.method = method
+        self.extrapolation = extrapolation
+        self._build(np.array(times, dtype=np.float64), np.array(yields, dtype=np.float64), parameters)
+
+    def _build(self, times, yields, parameters=None):
+        """
+        Sorts the points into knots, averaging points that share a time, and precomputes the method.
+        """
+        keep = np.isfinite(times) & np.isfinite(yields)
+        knots, codes = np.unique(times[keep], return_inverse=True)
+        if len(knots) < 2:
+            raise ValueError("A yield curve needs at least two distinct knot times")
+        self._points = (times, yields)
+        self._codes = np.full(len(times), -1)
+        self._codes[keep] = codes
+        self._dirty = set()
+        self.times = knots
+        self.yields = np.bincount(codes, weights=yields[keep]) / np.bincount(codes)
+        self._prepare(parameters)
+
+    def _prepare(self, parameters=None):
+        """
+        Precomputes what the method needs to evaluate the curve. Parameters fitted earlier to the same knots, as
+        returned by the parameters property, are used instead of fitting again.
+        """
+        if self.method == 'log_linear':
+            self._values = _discount_logs(self.times, self.yields)
+        else:
+            self._values = self.yields
+        if self.method == 'monotone_cubic':
+            self._slopes = _monotone_slopes(self.times, self._values)
+        elif self.method == 'nss':
+            if parameters is not None and len(parameters):
+                self._betas, (self._tau1, self._tau2) = np.asarray(parameters[:-2]), parameters[-2:]
+            else:
+                self._betas, self._tau1, self._tau2 = _fit_nss(self.times, self.yields)
+
+    @property
+    def parameters(self):
+        """
+        The fitted parameters of the method: the NSS betas followed by the two decay times, and an empty array for
+        the interpolating methods, which have none.
+        """
+        if self.method != 'nss':
+            return np.empty(0)
+        if self._dirty:
+            self._refresh()
+        return np.append(self._betas, [self._tau1, self._tau2])
+
+    def update(self, position, yield_):
+        """
+        Replaces the yield of one of the points the curve was built from. Only that point's knot is touched now;
+        the segments around it are recalculated on the next evaluation.
+
+        Args:
+            position (int): The position of the point in the arrays the curve was built from.
+            yield_ (float): The new yield.
+
+        Returns:
+            Tuple[float, float]: The range of times whose interpolated yields may have changed.
+        """
+        times, yields = self._points
+        yields[position] = yield_
+        knot = self._codes[position]
+        if knot < 0 or not np.isfinite(yield_):
+            # The point joins or leaves the knots, so the knot layout itself changes
+            self._build(times, yields)
+            return -np.inf, np.inf
+        members = self._codes == knot
+        self.yields[knot] = yields[members].mean()
+        self._dirty.add(knot)
+        if self.method == 'nss':
+            return -np.inf, np.inf
+        reach = 2 if self.method == 'monotone_cubic' else 1
+        low, high = knot - reach, knot + reach
+        return (self.times[low] if low > 0 else -np.inf,
+                self.times[high] if high < len(self.times) - 1 else np.inf)
+
+    def _refresh(self):
+        """
+        Recalculates what depends on knots changed by update().
+        """
+        if self.method == 'nss':
+            self._prepare()
+        for knot in sorted(self._dirty):
+            if self.method == 'log_linear':
+                self._values[knot] = _discount_logs(self.times[knot], self.yields[knot])
+            elif self.method == 'monotone_cubic':
+                # Interior slopes depend on the neighbouring knots and end slopes on the two nearest knots, so a
+                # five-knot window around the changed knot holds every slope it affects
+                count = len(self.times)
+                low, high = max(knot - 2, 0), min(knot + 3, count)
+                slopes = _monotone_slopes(self.times[low:high], self._values[low:high])
+                first = 0 if knot <= 2 else knot - 1
+                last = count if knot >= count - 3 else knot + 2
+                self._slopes[first:last] = slopes[first - low:last - low]
+        self._dirty.clear()
+
+    def _segments(self, times):
+        """
+        Evaluates the method on each time's knot segment; times outside the knots use the end segments.
+        """
+        if self.method == 'nss':
+            return _nss_basis(times, self._tau1, self._tau2) @ self._betas
+        index = np.clip(np.searchsorted(self.times, times, side='right') - 1, 0, len(self.times) - 2)
+        t0, t1 = self.times[index], self.times[index + 1]
+        v0, v1 = self._values[index], self._values[index + 1]
+        width = t1 - t0
+        u = (times - t0) / width
+        if self.method == 'monotone_cubic':
+            m0, m1 = self._slopes[index] * width, self._slopes[index + 1] * width
+            u2, u3 = u * u, u * u * u
+            return ((2 * u3 - 3 * u2 + 1) * v0 + (u3 - 2 * u2 + u) * m0
+                    + (-2 * u3 + 3 * u2) * v1 + (u3 - u2) * m1)
+        values = v0 + u * (v1 - v0)
+        if self.method == 'log_linear':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                values = np.where(times > 0, 2 * np.expm1(-values / (2 * times)), self.yields[0])
+        return values
+
+    def __call__(self, times):
+        if self._dirty:
+            self._refresh()
+        times = np.asarray(times, dtype=np.float64)
+        yields = self._segments(times)
+        below = times < self.times[0]
+        above = times > self.times[-1]
+        if self.extrapolation == 'flat':
+            yields = np.where(below, self.yields[0], np.where(above, self.yields[-1], yields))
+        elif self.extrapolation == 'nan':
+            yields = np.where(below | above, np.nan, yields)
+        elif self.extrapolation == 'raise' and (below.any() or above.any()):
+            raise ValueError(f"Times must lie within [{self.times[0]}, {self.times[-1]}] years")
+        return yields
+
+    def discount(self, times):
+        times = np.asarray(times, dtype=np.float64)
+        return np.exp(_discount_logs(times, self(times)))
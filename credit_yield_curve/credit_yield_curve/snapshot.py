@@ -0,0 +1,84 @@
+"""
+Snapshots of constructed curves on disk.
+
+Solving every bond's yield is the expensive part of building a CreditYieldCurve. A snapshot keeps the solved yields
+and the curve's fitted parameters in one small uncompressed .npz file inside the bond data's cache directory, which
+is already named after the SHA-256 of the CSV's content. The file name is made of the evaluation date and a hash of
+the curve settings, so a change to the data, the evaluation date, the tenors, the interpolation method or the
+extrapolation looks up a different snapshot, and a process that finds one loads it instead of solving the yields
+again.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+import numpy as np
+
+from .bond_data import cache_directory
+
+
+FORMAT_VERSION = 1
+
+
+def snapshot_path(data_path, evaluation_date, tenors, method, extrapolation, cache_dir=None):
+    """
+    Returns where the snapshot of a curve built from a CSV file's current content is kept.
+
+    Args:
+        data_path (str): The bond data CSV.
+        evaluation_date (ql.Date): The evaluation date the yields are solved at.
+        tenors (Iterable[str]): The tenor labels of the curve.
+        method (str): The interpolation method.
+        extrapolation (str): The extrapolation.
+        cache_dir (str, optional): Where cache entries are kept, see bond_data.cache_directory().
+
+    Returns:
+        str: The snapshot's path.
+    """
+    settings = json.dumps([FORMAT_VERSION, list(tenors), method, extrapolation])
+    digest = hashlib.sha256(settings.encode()).hexdigest()[:16]
+    return os.path.join(cache_directory(data_path, cache_dir), f'curve-{evaluation_date.ISO()}-{method}-{digest}.npz')
+
+
+def save_snapshot(path, yields, parameters):
+    """
+    Writes a snapshot to a temporary file that is then renamed into place, so concurrent loaders never see a
+    partial one.
+
+    Args:
+        path (str): The snapshot's path, see snapshot_path().
+        yields (np.ndarray): The yield of every bond, in the CSV's row order.
+        parameters (np.ndarray): The curve's fitted parameters, see YieldCurve.parameters.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    descriptor, partial = tempfile.mkstemp(dir=directory, prefix='.partial-', suffix='.npz')
+    try:
+        with os.fdopen(descriptor, 'wb') as f:
+            np.savez(f, format_version=FORMAT_VERSION, yields=np.asarray(yields, dtype=np.float64),
+                     parameters=np.asarray(parameters, dtype=np.float64))
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+
+def load_snapshot(path):
+    """
+    Reads a snapshot.
+
+    Args:
+        path (str): The snapshot's path, see snapshot_path().
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The yields in the CSV's row order and the curve's fitted parameters, or None
+            if there is no readable snapshot of the current format.
+    """
+    try:
+        with np.load(path, allow_pickle=False) as arrays:
+            if int(arrays['format_version']) != FORMAT_VERSION:
+                return None
+            return arrays['yields'], arrays['parameters']
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+        return None
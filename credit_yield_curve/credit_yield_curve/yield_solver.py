@@ -0,0 +1,203 @@
+from typing import NamedTuple
+import numpy as np
+import QuantLib as ql
+
+from .conventions import CALENDAR, COUPON_MONTHS, SETTLEMENT_DAYS, MonthTable, holidays
+
+
+_DAY_COUNT = ql.Thirty360(ql.Thirty360.USA)
+
+
+def _thirty360(table, start, end):
+    """
+    Thirty360(USA) year fractions between arrays of day numbers.
+    """
+    month1, day1, length1 = table.split(start)
+    month2, day2, length2 = table.split(end)
+    february_end1 = (month1 % 12 == 1) & (day1 == length1)
+    february_end2 = (month2 % 12 == 1) & (day2 == length2)
+    day1 = np.where(day1 == 31, 30, day1)
+    day2 = np.where((day2 == 31) & (day1 >= 30), 30, day2)
+    day2 = np.where(february_end1 & february_end2, 30, day2)
+    day1 = np.where(february_end1, 30, day1)
+    return (30 * (month2 - month1) + (day2 - day1)) / 360.0
+
+
+def _quantlib_yield(evaluation_date, maturity, coupon, clean_price):
+    """
+    Solves one bond's yield with QuantLib, as the reference for rows the vectorized solver cannot handle.
+    """
+    schedule = ql.Schedule(evaluation_date, maturity, ql.Period(ql.Semiannual), CALENDAR,
+                           ql.Unadjusted, ql.Unadjusted, ql.DateGeneration.Backward, False)
+    bond = ql.FixedRateBond(SETTLEMENT_DAYS, 100, schedule, [coupon], _DAY_COUNT)
+    try:
+        return bond.bondYield(clean_price, _DAY_COUNT, ql.Compounded, ql.Semiannual)
+    except TypeError:
+        # QuantLib 1.32 and later take the price wrapped in a BondPrice
+        return bond.bondYield(ql.BondPrice(clean_price, ql.BondPrice.Clean), _DAY_COUNT, ql.Compounded,
+                              ql.Semiannual)
+
+
+class BondCashFlows(NamedTuple):
+    """
+    The remaining cash flows of many bonds, laid out flat: the flows of bond i are the entries whose row is i, in
+    payment order.
+
+    Attributes:
+        rows (np.ndarray): The bond each cash flow belongs to.
+        amounts (np.ndarray): The amount paid per 100 face, zero for flows paid before settlement.
+        times (np.ndarray): The Thirty360 time in years from settlement to each payment, measured as QuantLib
+            does when discounting at a bond yield.
+        years (np.ndarray): The actual time in years (365.25 days) from settlement to each payment, for
+            discounting on a curve.
+        accrued (np.ndarray): The accrued interest of each bond at settlement, per 100 face.
+        has_flows (np.ndarray): Whether each bond still pays anything after settlement.
+    """
+    rows: np.ndarray
+    amounts: np.ndarray
+    times: np.ndarray
+    years: np.ndarray
+    accrued: np.ndarray
+    has_flows: np.ndarray
+
+
+def bond_cash_flows(evaluation_date, maturity_dates, coupon_rates):
+    """
+    Lays out the remaining cash flows of fixed-rate bonds with the conventions of CreditYieldCurve: 100 face,
+    semi-annual coupons generated backward from maturity on the US government bond calendar, settlement two
+    business days after the evaluation date.
+
+    Args:
+        evaluation_date (ql.Date): The evaluation date, also the accrual start of the first coupon.
+        maturity_dates (array-like): The maturity dates, as anything convertible to datetime64[D].
+        coupon_rates (array-like): The annual coupon rates as decimals.
+
+    Returns:
+        BondCashFlows: The cash flows of every bond.
+    """
+    today = np.datetime64(evaluation_date.ISO()).astype(np.int64)
+    maturity = np.asarray(maturity_dates, dtype='datetime64[D]')
+    coupon_rates = np.asarray(coupon_rates, dtype=np.float64)
+    count = maturity.shape[0]
+
+    maturity_month = maturity.astype('datetime64[M]').astype(np.int64)
+    today_month = int(np.datetime64(evaluation_date.ISO(), 'M').astype(np.int64))
+    maturity = maturity.astype(np.int64)
+    table = MonthTable(min(today_month, int(maturity_month.min(initial=today_month))) - 2 * COUPON_MONTHS,
+                       max(today_month, int(maturity_month.max(initial=today_month))) + 2 * COUPON_MONTHS)
+    day = table.split(maturity)[1]
+
+    # Coupon dates fall on maturity - 6k months for every k whose date is still after the evaluation date
+    back = np.maximum(maturity_month - today_month, 0) // COUPON_MONTHS
+    coupons = back + (table.date(maturity_month - COUPON_MONTHS * back, day) > today)
+    offsets = np.cumsum(coupons) - coupons
+    rows = np.repeat(np.arange(count), coupons)
+    position = np.arange(rows.size) - offsets[rows]
+    ends = table.date(maturity_month[rows] - COUPON_MONTHS * (coupons[rows] - 1 - position), day[rows])
+    firsts = offsets[coupons > 0]
+    lasts = (offsets + coupons - 1)[coupons > 0]
+    starts = np.empty_like(ends)
+    starts[1:] = ends[:-1]
+    starts[firsts] = today
+
+    # Holiday years are widened to whole decades so that single-bond calls keep hitting the cache
+    first_year = (table.first_month // 12 + 1970) // 10 * 10
+    last_year = ((table.first_month + len(table.starts)) // 12 + 1970) // 10 * 10 + 9
+    known_holidays = holidays(int(first_year), int(last_year))
+    payments = np.busday_offset(ends.view('datetime64[D]'), 0, roll='forward', holidays=known_holidays).view(np.int64)
+    settlement = np.busday_offset(np.datetime64(evaluation_date.ISO()), SETTLEMENT_DAYS, roll='backward',
+                                  holidays=known_holidays).astype(np.int64)
+    alive = payments > settlement
+
+    accrual = _thirty360(table, starts, ends)
+    amounts = 100 * coupon_rates[rows] * accrual
+    amounts[lasts] += 100
+    amounts[~alive] = 0.0
+
+    # Accrued interest of the coupon being paid next, and discounting steps between cash flows as QuantLib
+    # measures them: from the accrual start when the previous date is not the accrual start
+    first_alive = alive.copy()
+    first_alive[1:] &= ~alive[:-1] | np.isin(np.arange(1, rows.size), firsts)
+    accrued_amount = np.where(first_alive & (settlement > starts),
+                              100 * coupon_rates[rows] * _thirty360(table, starts, np.minimum(settlement, ends)), 0.0)
+
+    previous = np.empty_like(payments)
+    previous[1:] = payments[:-1]
+    previous[first_alive] = settlement
+    steps = np.where(previous != starts,
+                     _thirty360(table, starts, payments) - _thirty360(table, starts, previous),
+                     _thirty360(table, previous, payments))
+    steps[~alive] = 0.0
+    steps = np.cumsum(steps)
+    times = steps - np.concatenate([[0.0], steps])[offsets][rows]
+    years = np.where(alive, payments - settlement, 0) / 365.25
+    accrued = np.bincount(rows, weights=accrued_amount, minlength=count)
+    has_flows = np.bincount(rows, weights=alive, minlength=count) > 0
+    return BondCashFlows(rows, amounts, times, years, accrued, has_flows)
+
+
+def bond_yields(evaluation_date, maturity_dates, coupon_rates, clean_prices, accuracy=1.0e-10, max_iterations=100):
+    """
+    Solves the semi-annual Thirty360 yields of fixed-rate bonds from their clean prices, all at once.
+
+    The bonds are laid out by bond_cash_flows, with the conventions of CreditYieldCurve. Yields are found with
+    Newton steps kept inside a per-bond bracket, falling back to bisection whenever a step leaves it; bonds that
+    still have not converged are solved with QuantLib. Bonds that mature before settlement get NaN.
+
+    Args:
+        evaluation_date (ql.Date): The evaluation date, also the accrual start of the first coupon.
+        maturity_dates (array-like): The maturity dates, as anything convertible to datetime64[D].
+        coupon_rates (array-like): The annual coupon rates as decimals.
+        clean_prices (array-like): The clean prices per 100 face.
+        accuracy (float): The yield tolerance.
+        max_iterations (int): The maximum number of iterations of the vectorized solver.
+
+    Returns:
+        np.ndarray: The yield of each bond.
+    """
+    maturity = np.asarray(maturity_dates, dtype='datetime64[D]')
+    coupon_rates = np.asarray(coupon_rates, dtype=np.float64)
+    clean_prices = np.asarray(clean_prices, dtype=np.float64)
+    count = maturity.shape[0]
+    if count == 0:
+        return np.empty(0)
+
+    rows, amounts, times, _, accrued, has_flows = bond_cash_flows(evaluation_date, maturity, coupon_rates)
+    dirty_prices = clean_prices + accrued
+
+    def value(ytm):
+        factor = 1 + ytm / 2
+        discounted = amounts * np.exp(-2 * times * np.log(factor)[rows])
+        price = np.bincount(rows, weights=discounted, minlength=count)
+        slope = -np.bincount(rows, weights=discounted * times, minlength=count) / factor
+        return price - dirty_prices, slope
+
+    low = np.full(count, -1.0)
+    high = np.full(count, 10.0)
+    ytm = np.full(count, 0.05)
+    converged = ~has_flows
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for _ in range(max_iterations):
+            error, slope = value(ytm)
+            low = np.where(error > 0, ytm, low)
+            high = np.where(error > 0, high, ytm)
+            candidate = ytm - error / slope
+            # The bracket bounds are inclusive: at the root the last iterate is a bound and the Newton step
+            # stays on it. A bisection step never counts as converged, so a bracket that collapses onto -1 or
+            # 10 without finding the root is left to QuantLib.
+            bisect = ~((candidate >= low) & (candidate <= high))
+            candidate = np.where(bisect, (low + high) / 2, candidate)
+            step = np.where(converged, 0.0, candidate - ytm)
+            ytm = ytm + step
+            converged |= (np.abs(step) < accuracy) & ~bisect
+            if converged.all():
+                break
+
+    ytm[~has_flows] = np.nan
+    for i in np.flatnonzero(~converged):
+        maturity_date = ql.Date(str(maturity[i].astype('datetime64[D]')), '%Y-%m-%d')
+        try:
+            ytm[i] = _quantlib_yield(evaluation_date, maturity_date, coupon_rates[i], clean_prices[i])
+        except RuntimeError:
+            ytm[i] = np.nan
+    return ytm
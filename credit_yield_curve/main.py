@@ -4,9 +4,7 @@ from credit_yield_curve.construct_curve import CreditYieldCurve
 def main():
     data = 'bond_data.csv'  # Replace with the actual path to your data file
     curve = CreditYieldCurve(data)
-    curve.load_and_sort_data()
-    curve.calculate_yield()
-    curve.construct_yc()
+    curve.build()  # loads the yields and curve from the snapshot of an earlier run over the same data
     # curve.plot_yields() #  plots all yields available in the bond_data csv
     curve.plot_yc()  # interpolated and smoothed out yield curve based off bond_data
 
@@ -0,0 +1,5 @@
+"""
+The financial_calculations command line: bond pricing, credit curve construction, JTD and the pricing API behind one
+entry point. Nothing heavy is imported until a subcommand runs. Run with `financial_calculations --help`, or
+`python -m financial_calculations --help` from the repository root.
+"""
@@ -0,0 +1,5 @@
+from financial_calculations.cli import main
+
+
+if __name__ == '__main__':
+    main()
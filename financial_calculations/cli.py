@@ -0,0 +1,136 @@
+"""
+The subcommands and their argument parsing. Only the standard library is imported here; each subcommand imports the
+modules it needs, listed in COMMAND_MODULES, when it runs, so `jtd` never loads QuantLib or matplotlib and `--help`
+loads nothing at all.
+"""
+import argparse
+import importlib
+import os
+import sys
+
+DATA_PATH = 'bond_data.csv'
+# The same flat rates as the API's default market data
+DISCOUNT_RATE = 0.045
+RISK_FREE_RATE = 0.04
+
+# The modules each subcommand imports before it starts work; the benchmark suite times them in a fresh interpreter
+COMMAND_MODULES = {
+    'price': ('pandas', 'batch_pricing.runner'),
+    'curve': ('QuantLib', 'credit_yield_curve.credit_yield_curve.construct_curve'),
+    'jtd': ('jtd_calculator', 'credit_yield_curve.credit_yield_curve.bond_data'),
+    'serve': ('uvicorn',),
+}
+COMMANDS = tuple(COMMAND_MODULES)
+
+
+def load(command):
+    """
+    Imports the modules a subcommand needs.
+
+    Args:
+        command (str): The subcommand, one of COMMANDS.
+
+    Returns:
+        list: The imported modules, in the order of COMMAND_MODULES.
+    """
+    return [importlib.import_module(name) for name in COMMAND_MODULES[command]]
+
+
+def _write(frame, output, index=False):
+    if output:
+        frame.to_csv(output, index=index)
+        print(f"Results written to {output}", file=sys.stderr)
+    else:
+        print(frame.to_string(index=index))
+
+
+def price(args):
+    pd, runner = load('price')
+    results = runner.price_chunk(pd.read_csv(args.data), args.discount_rate, args.risk_free_rate)
+    _write(results, args.output)
+
+
+def curve(args):
+    ql, construct_curve = load('curve')
+    if args.date:
+        ql.Settings.instance().evaluationDate = ql.DateParser.parseISO(args.date)
+    credit_yield_curve = construct_curve.CreditYieldCurve(args.data)
+    credit_yield_curve.build(method=args.method, extrapolation=args.extrapolation, snapshot=not args.no_snapshot)
+    _write(credit_yield_curve.yc_df, args.output)
+    if args.plot:
+        credit_yield_curve.plot_yc(args.plot)
+        print(f"Yield curve plotted to {args.plot}", file=sys.stderr)
+    if args.plot_yields:
+        credit_yield_curve.plot_yields(args.plot_yields)
+        print(f"Bond yields plotted to {args.plot_yields}", file=sys.stderr)
+
+
+def jtd(args):
+    jtd_calculator, bond_data = load('jtd')
+    df = bond_data.load_bond_data(args.data)
+    if args.by_bond:
+        columns = jtd_calculator.jtd_columns(df)
+        _write(df[['CUSIP', 'Ticker']].join(columns), args.output)
+    else:
+        _write(jtd_calculator.portfolio_jtd(df), args.output)
+
+
+def serve(args):
+    uvicorn, = load('serve')
+    if args.pricing_workers is not None:
+        os.environ['PRICING_WORKERS'] = str(args.pricing_workers)
+    uvicorn.run('Pricing_API.main:app', host=args.host, port=args.port, reload=args.reload, workers=args.workers)
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog='financial_calculations',
+                                     description='Bond pricing, credit curves, JTD and the pricing API.')
+    commands = parser.add_subparsers(dest='command', required=True, metavar='command')
+
+    command = commands.add_parser('price', help='price a bond file at flat rates',
+                                  description='Prices every bond of a file in the bond_data.csv layout with its JTD.')
+    command.add_argument('data', nargs='?', default=DATA_PATH, help=f'the bond file (default {DATA_PATH})')
+    command.add_argument('--discount-rate', type=float, default=DISCOUNT_RATE, help='flat discount rate')
+    command.add_argument('--risk-free-rate', type=float, default=RISK_FREE_RATE, help='risk-free rate for spreads')
+    command.add_argument('--output', help='write the results as CSV to this file instead of printing them')
+    command.set_defaults(run=price)
+
+    command = commands.add_parser('curve', help='construct the credit yield curve',
+                                  description='Builds the credit yield curve of a bond file, from its saved snapshot '
+                                              'when the same curve was built before, and tabulates it by tenor.')
+    command.add_argument('data', nargs='?', default=DATA_PATH, help=f'the bond file (default {DATA_PATH})')
+    command.add_argument('--method', default='linear',
+                         help='linear, log_linear, monotone_cubic or nss (default linear)')
+    command.add_argument('--extrapolation', default='flat', help='extrapolation outside the maturities (default flat)')
+    command.add_argument('--date', help='evaluation date as YYYY-MM-DD (default today)')
+    command.add_argument('--no-snapshot', action='store_true', help='always solve the yields')
+    command.add_argument('--output', help='write the tenor table as CSV to this file instead of printing it')
+    command.add_argument('--plot', metavar='PATH', help='save the yield curve plot, e.g. curve.png or curve.svg')
+    command.add_argument('--plot-yields', metavar='PATH', help='save the plot of every bond yield by maturity')
+    command.set_defaults(run=curve)
+
+    command = commands.add_parser('jtd', help='calculate jump-to-default',
+                                  description='Aggregates JTD by issuer and rating bucket, or lists it by bond.')
+    command.add_argument('data', nargs='?', default=DATA_PATH, help=f'the bond file (default {DATA_PATH})')
+    command.add_argument('--by-bond', action='store_true', help='one row per bond instead of per issuer and bucket')
+    command.add_argument('--output', help='write the results as CSV to this file instead of printing them')
+    command.set_defaults(run=jtd)
+
+    command = commands.add_parser('serve', help='run the pricing API',
+                                  description='Serves Pricing_API.main:app with uvicorn.')
+    command.add_argument('--host', default='127.0.0.1', help='interface to bind (default 127.0.0.1)')
+    command.add_argument('--port', type=int, default=8000, help='port to bind (default 8000)')
+    command.add_argument('--workers', type=int, help='uvicorn worker processes')
+    command.add_argument('--pricing-workers', type=int, help='pricing processes per API process (PRICING_WORKERS)')
+    command.add_argument('--reload', action='store_true', help='restart on code changes')
+    command.set_defaults(run=serve)
+    return parser
+
+
+def main(argv=None):
+    parser = _parser()
+    args = parser.parse_args(argv)
+    try:
+        args.run(args)
+    except (OSError, ValueError) as e:
+        parser.exit(2, f"error: {e}\n")
@@ -16,6 +16,27 @@ has the right to repurchase the bond before maturity.
 """
 
 
+# Default probability by composite rating; ratings not listed default with UNRATED_DEFAULT_PROB
+DEFAULT_PROBABILITIES = {
+    'AAA': 0.00015, 'Aaa': 0.00015,
+    'AA': 0.001, 'Aa': 0.001,
+    'A': 0.002, 'A-': 0.002,
+    'BBB': 0.02, 'Ba': 0.02,
+    'B': 0.05, 'B-': 0.05,
+}
+UNRATED_DEFAULT_PROB = 0.1
+
+# Rating bucket used for reporting, following the default probability groups
+RATING_BUCKETS = {
+    'AAA': 'AAA', 'Aaa': 'AAA',
+    'AA': 'AA', 'Aa': 'AA',
+    'A': 'A', 'A-': 'A',
+    'BBB': 'BBB', 'Ba': 'BBB',
+    'B': 'B', 'B-': 'B',
+}
+UNRATED_BUCKET = 'Other'
+
+
 class JtdCalculator:
     """
     A class used to calculate the Jump to Default (JTD) for a bond.
@@ -30,6 +51,9 @@ class JtdCalculator:
         The type of bond based on maturity. For example, 'Callable', 'Putable', etc.
     composite_rating : str
         The credit rating of the bond. For example, 'AAA', 'AA', etc.
+    default_prob : float, optional
+        The probability of default, e.g. implied by the issuer's fitted credit curve
+        (CreditYieldCurve.default_probability); taken from the composite rating when not given.
 
     Methods
     -------
@@ -43,13 +67,13 @@ class JtdCalculator:
         Calculates the probability of default based on the bond's composite rating.
     """
 
-    def __init__(self, face_value, coupon_rate, maturity_type, composite_rating):
+    def __init__(self, face_value, coupon_rate, maturity_type, composite_rating, default_prob=None):
         self.face_value = face_value
         self.coupon_rate = coupon_rate
         self.maturity_type = maturity_type
         self.composite_rating = composite_rating
         self.lgd = self.calculate_lgd()
-        self.default_prob = self.calculate_default_prob()
+        self.default_prob = self.calculate_default_prob() if default_prob is None else default_prob
         self.jtd = self.calculate_jtd()
 
     @property
@@ -114,16 +138,9 @@ class JtdCalculator:
             float: The default probability of the bond.
         """
         default_prob = 0.00
-        if self.composite_rating in ['AAA', 'Aaa']:
-            default_prob += 0.00015
-        elif self.composite_rating in ['AA', 'Aa']:
-            default_prob += 0.001
-        elif self.composite_rating in ['A', 'A-']:
-            default_prob += 0.002
-        elif self.composite_rating in ['BBB', 'Ba']:
-            default_prob += 0.02
-        elif self.composite_rating in ['B', 'B-']:
-            default_prob += 0.05
-        else:
-            default_prob += 0.1
+        default_prob += DEFAULT_PROBABILITIES.get(self.composite_rating, UNRATED_DEFAULT_PROB)
         return default_prob
+
+
+from jtd_calculator.portfolio import calculate_jtd_arrays, jtd_columns, portfolio_jtd  # noqa: E402
+from jtd_calculator.simulation import LossDistribution, simulate_losses, simulate_portfolio_losses  # noqa: E402
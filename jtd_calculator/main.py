@@ -1,10 +1,10 @@
-from jtd_calculator import JtdCalculator
-import pandas as pd
+from jtd_calculator import JtdCalculator, portfolio_jtd, simulate_portfolio_losses
+from credit_yield_curve.credit_yield_curve.bond_data import load_bond_data
 
 
 def main():
-    #  Load data from CSV
-    df = pd.read_csv('bond_data.csv')
+    #  Load data from CSV, parsed once and memory-mapped from the columnar cache on later runs
+    df = load_bond_data('bond_data.csv')
 
     #  Pick a random bond from bond_data.csv
     bond_data = df.sample(n=1).iloc[0]
@@ -33,6 +33,14 @@ def main():
     updated_jtd = calculator.calculate_jtd()
     print(f"Updated JTD with 10% increase in default probability: ${updated_jtd:,.2f}")
 
+    #  JTD of the whole file, aggregated by issuer and rating bucket
+    print("\nPortfolio JTD by issuer and rating bucket:")
+    print(portfolio_jtd(df).to_string(index=False))
+
+    #  Default loss distribution of the whole file under a Gaussian copula, with issuers defaulting together
+    print("\nSimulated portfolio default losses:")
+    print(simulate_portfolio_losses(df, correlation=0.2, paths=200_000, seed=42).summary().to_string(index=False))
+
 
 if __name__ == '__main__':
     main()
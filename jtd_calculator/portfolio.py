@@ -0,0 +1,115 @@
+"""
+Columnar Jump to Default for a whole portfolio.
+
+The functions here apply the same rules as JtdCalculator to arrays or DataFrame columns in one pass: ratings and
+maturity types are factorized once and mapped through lookup tables instead of being compared row by row.
+"""
+import numpy as np
+import pandas as pd
+
+from jtd_calculator import (DEFAULT_PROBABILITIES, UNRATED_DEFAULT_PROB, RATING_BUCKETS, UNRATED_BUCKET)
+
+
+def _lookup(values, table, default):
+    """
+    Maps every value through `table` (missing keys and NaN map to `default`) by factorizing the values first,
+    so the table is consulted once per distinct value.
+    """
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object), use_na_sentinel=True)
+    mapped = np.array([table.get(value, default) for value in uniques] + [default])
+    return mapped[codes]
+
+
+def calculate_jtd_arrays(face_value, coupon_rate, maturity_type, composite_rating, default_prob=None):
+    """
+    Calculates LGD, default probability and JTD for arrays of bonds with the JtdCalculator rules.
+
+    Args:
+        face_value (array-like): The nominal values of the bonds.
+        coupon_rate (array-like): The annual coupon rates of the bonds.
+        maturity_type (array-like): The maturity types, e.g. 'Callable', 'Putable'.
+        composite_rating (array-like): The composite ratings, e.g. 'AAA', 'AA'.
+        default_prob (float or array-like, optional): The default probabilities to use instead of the rating
+            table, e.g. implied by the issuers' fitted credit curves.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: The LGD (in percent), default probability and JTD of each bond.
+    """
+    face_value = np.asarray(face_value, dtype=np.float64)
+    coupon_rate = np.asarray(coupon_rate, dtype=np.float64)
+
+    # Adjustments are applied in the same order as JtdCalculator.calculate_lgd so results match exactly
+    recovery_rate = np.full(face_value.shape, 0.4)
+    recovery_rate += np.where(coupon_rate > 0.05, 0.1, 0.0)
+    recovery_rate -= np.where(face_value > 1e9, 0.1, 0.0)
+    recovery_rate -= _lookup(maturity_type, {'Callable': 0.1, 'Putable': 0.1}, 0.0)
+    recovery_rate += _lookup(composite_rating, {'AAA': 0.1, 'AA': 0.1, 'B': -0.1, 'CCC': -0.1}, 0.0)
+    recovery_rate = np.minimum(np.maximum(recovery_rate, 0), 1)
+    lgd = (1 - recovery_rate) * 100
+
+    if default_prob is None:
+        default_prob = _lookup(composite_rating, DEFAULT_PROBABILITIES, UNRATED_DEFAULT_PROB)
+    else:
+        default_prob = np.broadcast_to(np.asarray(default_prob, dtype=np.float64), face_value.shape)
+    jtd = lgd * face_value * default_prob
+    return lgd, default_prob, jtd
+
+
+def jtd_columns(df, face_value='Issued Amount', coupon_rate='Cpn', maturity_type='Maturity Type',
+                composite_rating='Composite Rating', default_prob=None):
+    """
+    Calculates LGD, default probability and JTD for every row of a bond DataFrame.
+
+    Args:
+        df (DataFrame): The bonds, one per row, with columns in the bond_data.csv layout by default.
+        face_value, coupon_rate, maturity_type, composite_rating (str): The names of the input columns.
+        default_prob (float or array-like, optional): Default probabilities replacing the rating table, see
+            calculate_jtd_arrays.
+
+    Returns:
+        DataFrame: A frame indexed like df with 'LGD', 'Default Prob', 'JTD' and 'Rating Bucket' columns.
+    """
+    lgd, default_prob, jtd = calculate_jtd_arrays(df[face_value].to_numpy(), df[coupon_rate].to_numpy(),
+                                                  df[maturity_type].to_numpy(), df[composite_rating].to_numpy(),
+                                                  default_prob)
+    return pd.DataFrame({
+        'LGD': lgd,
+        'Default Prob': default_prob,
+        'JTD': jtd,
+        'Rating Bucket': _lookup(df[composite_rating].to_numpy(), RATING_BUCKETS, UNRATED_BUCKET),
+    }, index=df.index)
+
+
+def portfolio_jtd(df, position=None, issuer='Ticker', face_value='Issued Amount', coupon_rate='Cpn',
+                  maturity_type='Maturity Type', composite_rating='Composite Rating', default_prob=None):
+    """
+    Aggregates JTD over a portfolio by issuer and rating bucket, netting long and short positions.
+
+    Each row's JTD is calculated as JtdCalculator would from its face value, coupon, maturity type and rating. The
+    sign of the `position` column decides whether the row is long (zero or positive) or short (negative); without
+    a position column every row is long.
+
+    Args:
+        df (DataFrame): The bonds, one per row, with columns in the bond_data.csv layout by default.
+        position (str, optional): The name of a signed position column.
+        issuer (str): The column to aggregate issuers by.
+        face_value, coupon_rate, maturity_type, composite_rating (str): The names of the input columns.
+        default_prob (float or array-like, optional): Default probabilities replacing the rating table, see
+            calculate_jtd_arrays.
+
+    Returns:
+        DataFrame: One row per issuer and rating bucket with 'Long JTD', 'Short JTD' and 'Net JTD' columns, where
+        short JTD is reported as a positive amount and net JTD is long minus short.
+    """
+    rows = jtd_columns(df, face_value, coupon_rate, maturity_type, composite_rating, default_prob)
+    short = np.zeros(len(df), dtype=bool) if position is None else df[position].to_numpy() < 0
+    jtd = rows['JTD'].to_numpy()
+    frame = pd.DataFrame({
+        issuer: df[issuer].to_numpy(),
+        'Rating Bucket': rows['Rating Bucket'].to_numpy(),
+        'Long JTD': np.where(short, 0.0, jtd),
+        'Short JTD': np.where(short, jtd, 0.0),
+    })
+    totals = frame.groupby([issuer, 'Rating Bucket'], dropna=False, sort=True).sum()
+    totals['Net JTD'] = totals['Long JTD'] - totals['Short JTD']
+    return totals.reset_index()
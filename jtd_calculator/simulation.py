@@ -0,0 +1,176 @@
+"""
+Monte Carlo portfolio default losses under a one-factor Gaussian copula.
+
+Every obligor (issuer) has a latent variable X = sqrt(rho) * Z + sqrt(1 - rho) * e, with Z a market factor shared
+by all obligors and e idiosyncratic. A bond defaults when its obligor's X falls below the normal quantile of the
+bond's default probability, so bonds of the same issuer default together and the market factor correlates issuers.
+Paths are simulated in fixed-size chunks, each with its own seed spawned from one SeedSequence, so results are
+reproducible and do not depend on how many worker processes run the chunks. Within a chunk, paths are drawn in blocks
+small enough for a memory budget; the generator's stream is the same whichever way it is split, so the budget does
+not change the results either.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from jtd_calculator.portfolio import calculate_jtd_arrays
+
+
+# Bytes per path and obligor (the float32 latent variables), and per path and bond (the latent variable gathered
+# for each bond and its default flag)
+_OBLIGOR_BYTES = 4
+_BOND_BYTES = 5
+
+
+class LossDistribution:
+    """
+    The simulated loss distribution of a portfolio.
+
+    Attributes
+    ----------
+    losses : np.ndarray
+        The portfolio loss on every simulated path, in the units of the face values.
+
+    Methods
+    -------
+    expected_loss():
+        Returns the mean simulated loss.
+
+    var(confidence):
+        Returns the Value at Risk, the loss quantile at the given confidence.
+
+    expected_shortfall(confidence):
+        Returns the Expected Shortfall, the mean loss over the worst (1 - confidence) share of paths.
+
+    summary(confidences):
+        Returns the expected loss, VaR and ES at several confidences as a DataFrame.
+    """
+
+    def __init__(self, losses):
+        self.losses = losses
+
+    def expected_loss(self):
+        return self.losses.mean()
+
+    def var(self, confidence=0.99):
+        return np.quantile(self.losses, confidence)
+
+    def expected_shortfall(self, confidence=0.99):
+        # The mean of the worst (1 - confidence) share of paths, which stays meaningful when the VaR is zero
+        tail = max(int(np.ceil((1 - confidence) * len(self.losses))), 1)
+        return np.partition(self.losses, len(self.losses) - tail)[-tail:].mean()
+
+    def summary(self, confidences=(0.95, 0.99, 0.999)):
+        return pd.DataFrame({
+            'Confidence': confidences,
+            'Expected Loss': self.expected_loss(),
+            'VaR': [self.var(confidence) for confidence in confidences],
+            'ES': [self.expected_shortfall(confidence) for confidence in confidences],
+        })
+
+
+def _simulate_chunk(thresholds, obligors, loss_amounts, correlation, paths, seed, max_bytes):
+    """
+    Simulates the portfolio loss on `paths` paths, in blocks of paths whose arrays fit in max_bytes; runs in the
+    worker processes.
+    """
+    rng = np.random.default_rng(seed)
+    obligor_count = obligors.max(initial=-1) + 1
+    per_path = _OBLIGOR_BYTES * obligor_count + _BOND_BYTES * len(obligors)
+    block = max(max_bytes // max(per_path, 1), 1)
+    thresholds = thresholds.astype(np.float32)
+    factor = rng.standard_normal((paths, 1), dtype=np.float32)
+    losses = np.zeros(paths)
+    for start in range(0, paths, block):
+        stop = min(start + block, paths)
+        latent = rng.standard_normal((stop - start, obligor_count), dtype=np.float32)
+        latent *= np.float32(np.sqrt(1 - correlation))
+        latent += np.float32(np.sqrt(correlation)) * factor[start:stop]
+        # Defaults are rare, so losses are summed over the defaulted (path, bond) pairs only
+        path, bond = np.nonzero(latent[:, obligors] < thresholds)
+        losses[start:stop] = np.bincount(path, weights=loss_amounts[bond], minlength=stop - start)
+    return losses
+
+
+def simulate_losses(default_prob, loss_amount, obligors=None, correlation=0.2, paths=1_000_000, seed=None,
+                    chunk_size=20_000, max_bytes=256 * 2 ** 20, workers=None):
+    """
+    Simulates portfolio default losses with a one-factor Gaussian copula.
+
+    Args:
+        default_prob (array-like): The default probability of every bond.
+        loss_amount (array-like): The loss if the bond defaults, e.g. face value times LGD.
+        obligors (array-like, optional): The issuer of every bond; bonds of one issuer default together. Every
+            bond is its own issuer by default.
+        correlation (float): The asset correlation rho between issuers, in [0, 1].
+        paths (int): The number of simulated paths.
+        seed (int, optional): The seed the per-chunk seeds are spawned from.
+        chunk_size (int): The number of paths simulated in one chunk, each with its own seed.
+        max_bytes (int): The memory ceiling for the arrays of one chunk, which draws its paths in blocks that fit.
+            Every worker process simulates one chunk at a time, so the peak is about workers * max_bytes. The
+            results do not depend on it.
+        workers (int, optional): The number of worker processes, os.cpu_count() by default; 0 simulates in
+            this process.
+
+    Returns:
+        LossDistribution: The simulated losses.
+    """
+    default_prob = np.asarray(default_prob, dtype=np.float64)
+    loss_amount = np.asarray(loss_amount, dtype=np.float64)
+    if default_prob.shape != loss_amount.shape or default_prob.ndim != 1:
+        raise ValueError("default_prob and loss_amount must be one-dimensional arrays of the same length.")
+    if not 0 <= correlation <= 1:
+        raise ValueError("correlation must lie in [0, 1].")
+    if obligors is None:
+        obligors = np.arange(len(default_prob))
+    else:
+        obligors = pd.factorize(np.asarray(obligors, dtype=object), use_na_sentinel=False)[0]
+
+    # Normal quantiles of the default probabilities, computed once per distinct probability
+    probs, codes = np.unique(np.clip(default_prob, 0, 1), return_inverse=True)
+    normal = NormalDist()
+    quantiles = np.array([-np.inf if p == 0 else np.inf if p == 1 else normal.inv_cdf(p) for p in probs])
+    thresholds = quantiles[codes]
+
+    sizes = [min(chunk_size, paths - start) for start in range(0, paths, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(thresholds, obligors, loss_amount, correlation, size, chunk_seed, max_bytes)
+            for size, chunk_seed in zip(sizes, seeds)]
+
+    workers = os.cpu_count() if workers is None else workers
+    if workers == 0 or len(args) == 1:
+        chunks = [_simulate_chunk(*chunk_args) for chunk_args in args]
+    else:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(workers, len(args)), mp_context=context) as executor:
+            chunks = list(executor.map(_simulate_chunk, *zip(*args)))
+    return LossDistribution(np.concatenate(chunks) if chunks else np.empty(0))
+
+
+def simulate_portfolio_losses(df, issuer='Ticker', face_value='Issued Amount', coupon_rate='Cpn',
+                              maturity_type='Maturity Type', composite_rating='Composite Rating', default_prob=None,
+                              **kwargs):
+    """
+    Simulates the default losses of a bond DataFrame, taking every bond's default probability and LGD from the
+    JtdCalculator rules. A defaulted bond loses its face value times its LGD.
+
+    Args:
+        df (DataFrame): The bonds, one per row, with columns in the bond_data.csv layout by default.
+        issuer (str): The column identifying issuers, whose bonds default together.
+        face_value, coupon_rate, maturity_type, composite_rating (str): The names of the input columns.
+        default_prob (float or array-like, optional): Default probabilities replacing the rating table, see
+            calculate_jtd_arrays.
+        **kwargs: Passed on to simulate_losses, e.g. correlation, paths, seed, workers.
+
+    Returns:
+        LossDistribution: The simulated losses.
+    """
+    lgd, default_prob, _ = calculate_jtd_arrays(df[face_value].to_numpy(), df[coupon_rate].to_numpy(),
+                                                df[maturity_type].to_numpy(), df[composite_rating].to_numpy(),
+                                                default_prob)
+    loss_amount = df[face_value].to_numpy(dtype=np.float64) * lgd / 100
+    return simulate_losses(default_prob, loss_amount, obligors=df[issuer].to_numpy(), **kwargs)
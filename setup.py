@@ -1,26 +1,26 @@
-from setuptools import setup, find_packages
+from setuptools import setup, find_namespace_packages
 
 setup(
     name='financial_calculations',
     version='1.0',
-    packages=find_packages(include=['credit_yield_curve', 'bond_pricing', 'pricing_API', 'bond_pricing.*',
-                                    'credit_yield_curve.*', 'pricing_API.*', 'jtd_calculator', 'jtd_calculator.*']),
+    # bond_pricing and credit_yield_curve have no __init__.py at the top level, so they are namespace packages
+    packages=find_namespace_packages(include=['bond_pricing', 'bond_pricing.bond_pricing', 'credit_yield_curve',
+                                              'credit_yield_curve.credit_yield_curve', 'jtd_calculator',
+                                              'Pricing_API', 'batch_pricing', 'financial_calculations']),
     install_requires=[
         'pandas',
         'matplotlib',
         'QuantLib',
         'fastapi',
-        'uvicorn',
+        'uvicorn[standard]',
         'pydantic',
         'numpy_financial',
         'numpy',
         'httpx',
-        'requests'
     ],
     entry_points={
         'console_scripts': [
-            'credit_yield_curve=credit_yield_curve.curve:main',
-            'pricing_API=pricing_API.main:app',
+            'financial_calculations=financial_calculations.cli:main',
         ],
     },
     python_requires='>=3.7',
@@ -0,0 +1,52 @@
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import QuantLib as ql
+
+from bond_pricing.bond_pricing.models import Bond
+
+
+BOND_DATA = os.path.join(os.path.dirname(__file__), os.pardir, 'bond_data.csv')
+
+
+@pytest.fixture
+def evaluation_date():
+    """
+    Sets a fixed QuantLib evaluation date for the test and restores the previous one afterwards.
+    """
+    settings = ql.Settings.instance()
+    previous = settings.evaluationDate
+    date = ql.Date(31, 1, 2025)
+    settings.evaluationDate = date
+    yield date
+    settings.evaluationDate = previous
+
+
+@pytest.fixture
+def bond_data():
+    """
+    The bond_data.csv shipped with the repository, as a DataFrame.
+    """
+    return pd.read_csv(BOND_DATA)
+
+
+@pytest.fixture
+def bonds():
+    """
+    Fifty random Bond objects issued between 2000 and 2024 with 1 to 30 years to maturity, and a discount rate for
+    each.
+    """
+    rng = np.random.default_rng(0)
+    bonds = []
+    for _ in range(50):
+        issue_date = datetime.datetime(2000, 1, 1) + datetime.timedelta(days=int(rng.integers(0, 9000)))
+        maturity = int(rng.integers(1, 31))
+        # Maturity dates a few days off the exact anniversary give short and long stub coupons
+        days = round(maturity * 365.25) + int(rng.integers(-20, 20))
+        bonds.append(Bond(bond_type='Corporate', face_value=int(rng.integers(100, 100_000)),
+                          coupon_rate=float(rng.uniform(0, 0.1)), maturity=maturity, issue_date=issue_date,
+                          maturity_date=issue_date + datetime.timedelta(days=days)))
+    return bonds, rng.uniform(0.01, 0.08, len(bonds))
@@ -0,0 +1,109 @@
+import importlib.util
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from batch_pricing.runner import ParquetWriter, run
+from .conftest import BOND_DATA
+
+CHUNK_SIZE = 5
+
+
+class Interrupted(Exception):
+    pass
+
+
+def _interrupt_after(chunks):
+    def log(line):
+        if line.startswith(f'chunk {chunks:>5}:'):
+            raise Interrupted()
+    return log
+
+
+@pytest.fixture
+def bond_file(tmp_path):
+    path = tmp_path / 'bonds.csv'
+    shutil.copy(BOND_DATA, path)
+    return str(path)
+
+
+def _run(bond_file, output, **kwargs):
+    kwargs.setdefault('log', lambda line: None)
+    return run(bond_file, output, CHUNK_SIZE, workers=0, **kwargs)
+
+
+def test_csv_resume_matches_an_uninterrupted_run(bond_file, tmp_path):
+    expected = tmp_path / 'expected.csv'
+    _run(bond_file, str(expected))
+
+    output = str(tmp_path / 'results.csv')
+    with pytest.raises(Interrupted):
+        _run(bond_file, output, log=_interrupt_after(3))
+    # A crash in the middle of the next chunk leaves a partial write past the checkpoint
+    with open(output, 'a') as f:
+        f.write('459200AM3,IBM,1')
+    state = _run(bond_file, output, resume=True)
+
+    assert state['complete'] and state['chunks'] == 7 and state['rows'] == len(pd.read_csv(BOND_DATA))
+    with open(output) as f, open(expected) as g:
+        assert f.read() == g.read()
+
+
+def test_resume_with_different_rates_is_refused(bond_file, tmp_path):
+    output = str(tmp_path / 'results.csv')
+    with pytest.raises(Interrupted):
+        _run(bond_file, output, log=_interrupt_after(2))
+
+    with pytest.raises(ValueError, match='rates'):
+        _run(bond_file, output, resume=True, discount_rate=0.05)
+
+
+def test_resume_without_the_output_is_refused(bond_file, tmp_path):
+    output = str(tmp_path / 'results.csv')
+    with pytest.raises(Interrupted):
+        _run(bond_file, output, log=_interrupt_after(2))
+    os.remove(output)
+
+    with pytest.raises(ValueError, match='missing'):
+        _run(bond_file, output, resume=True)
+    assert not os.path.exists(output)
+
+
+def test_parquet_directory_keeps_foreign_files(tmp_path):
+    directory = tmp_path / 'results.parquet'
+    directory.mkdir()
+    (directory / 'notes.txt').write_text('mine')
+
+    with pytest.raises(ValueError, match='not empty'):
+        ParquetWriter(str(directory), 0, owned=False)
+
+    (directory / 'part-00000.parquet').write_bytes(b'kept')
+    (directory / 'part-00001.parquet').write_bytes(b'past the checkpoint')
+    (directory / 'part-00001.parquet.partial').write_bytes(b'')
+    (directory / 'part-abcde.parquet').write_bytes(b'not a part')
+    (directory / 'part-00002.parquet.d').mkdir()
+    ParquetWriter(str(directory), 1, owned=True)
+
+    assert sorted(os.listdir(directory)) == ['notes.txt', 'part-00000.parquet', 'part-00002.parquet.d',
+                                             'part-abcde.parquet']
+
+
+def test_parquet_resume_without_parts_is_refused(tmp_path):
+    with pytest.raises(ValueError, match='holds 0'):
+        ParquetWriter(str(tmp_path), 2, owned=True)
+
+
+@pytest.mark.skipif(not any(importlib.util.find_spec(name) for name in ('pyarrow', 'fastparquet')),
+                    reason='Parquet output needs pyarrow or fastparquet')
+def test_parquet_resume_matches_an_uninterrupted_run(bond_file, tmp_path):
+    expected = str(tmp_path / 'expected.parquet')
+    _run(bond_file, expected)
+
+    output = str(tmp_path / 'results.parquet')
+    with pytest.raises(Interrupted):
+        _run(bond_file, output, log=_interrupt_after(3))
+    _run(bond_file, output, resume=True)
+
+    pd.testing.assert_frame_equal(pd.read_parquet(output), pd.read_parquet(expected))
@@ -0,0 +1,33 @@
+import numpy as np
+
+from bond_pricing.bond_pricing.book import BondBook
+
+
+def test_matches_bond(bonds, evaluation_date):
+    bonds, rates = bonds
+    book = BondBook.from_bonds(bonds)
+
+    npv, ytm = book.calculate_npv_ytm(rates)
+    duration = book.calculate_duration(rates)
+    present_value = book.calculate_present_value(rates)
+    cash_flows = book.calculate_cash_flows(rates)
+    spread = book.calculate_spread(0.03, rates)
+    for i, (bond, rate) in enumerate(zip(bonds, rates)):
+        expected_npv, expected_ytm = bond.calculate_npv_ytm(rate)
+        np.testing.assert_allclose(npv[i], expected_npv, rtol=1e-12)
+        assert abs(ytm[i] - expected_ytm) < 1e-8
+        assert abs(spread[i] - bond.calculate_spread(0.03, rate)) < 1e-8
+        # Bond measures duration at QuantLib's yield, solved to 1e-8
+        np.testing.assert_allclose(duration[i], bond.calculate_duration(rate), rtol=1e-7)
+        np.testing.assert_allclose(present_value[i], bond.calculate_present_value(rate), rtol=1e-12)
+        np.testing.assert_allclose(cash_flows[i].compressed(), bond.calculate_cash_flows(rate), rtol=1e-12)
+
+
+def test_one_rate_for_the_book(bonds):
+    bonds, _ = bonds
+    book = BondBook.from_bonds(bonds)
+
+    npv, ytm = book.calculate_npv_ytm(0.05)
+    expected_npv, expected_ytm = book.calculate_npv_ytm(np.full(len(bonds), 0.05))
+    np.testing.assert_array_equal(npv, expected_npv)
+    np.testing.assert_array_equal(ytm, expected_ytm)
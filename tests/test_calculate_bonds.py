@@ -0,0 +1,49 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+import Pricing_API.main as api
+from Pricing_API.workers import PricingPool
+
+BOND = {'bond_type': 'Corporate', 'face_value': 1000.0, 'coupon_rate': 0.05, 'maturity': 10.0,
+        'issue_date': '2022-07-20T00:00:00', 'maturity_date': '2032-07-17T00:00:00'}
+
+
+def test_ndjson_lines_split_across_body_chunks(monkeypatch):
+    monkeypatch.setattr(api, 'pricing_pool', PricingPool(max_workers=0))
+    monkeypatch.setattr(api, 'BATCH_CHUNK_SIZE', 2)
+    body = b'\n'.join([json.dumps(BOND).encode()] * 3 + [b'', b'{"bond_type": 1}', b'not json'])
+
+    def pieces():
+        for start in range(0, len(body), 7):
+            yield body[start:start + 7]
+
+    with TestClient(api.app) as client:
+        response = client.post('/calculate_bonds', content=pieces(),
+                               headers={'Content-Type': 'application/x-ndjson'})
+    results = [json.loads(line) for line in response.text.splitlines()]
+
+    assert [result['index'] for result in results] == list(range(5))
+    assert all('NPV' in result for result in results[:3])
+    assert all(result['error'].startswith('Error: ') for result in results[3:])
+
+
+def test_closing_map_cancels_pending_jobs():
+    jobs = []
+
+    class Pool(PricingPool):
+        async def run(self, fn, *args, wait=False):
+            jobs.append(asyncio.current_task())
+            await asyncio.sleep(3600 if args[0] else 0)
+            return args[0]
+
+    async def main():
+        results = Pool(max_workers=2).map(None, [(i,) for i in range(10)])
+        assert await results.__anext__() == 0
+        await results.aclose()
+        await asyncio.sleep(0)
+        assert len(jobs) == 2
+        assert jobs[1].cancelled()
+
+    asyncio.run(main())
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from credit_yield_curve.credit_yield_curve.construct_curve import CreditYieldCurve
+from credit_yield_curve.credit_yield_curve.interpolation import METHODS
+from .conftest import BOND_DATA
+
+
+@pytest.fixture(autouse=True)
+def bond_data_cache(monkeypatch, tmp_path):
+    monkeypatch.setenv('BOND_DATA_CACHE', str(tmp_path))
+
+
+def _built(method):
+    curve = CreditYieldCurve(BOND_DATA)
+    curve.build(method=method, extrapolation='extend', snapshot=False)
+    return curve
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_quote_updates_match_a_rebuild(evaluation_date, method):
+    curve = _built(method)
+    knots = curve.df[curve.df['Maturity Type'] == 'AT MATURITY']
+    rng = np.random.default_rng(0)
+    # Knots across the curve, an edge knot and a bond that is not a knot
+    cusips = list(knots['CUSIP'].iloc[[0, len(knots) // 2, len(knots) // 2, -1]])
+    cusips += list(curve.df.loc[curve.df['Maturity Type'] != 'AT MATURITY', 'CUSIP'].iloc[:1])
+    prices = {cusip: float(curve.df.loc[curve.df['CUSIP'] == cusip, 'Ask Price'].iloc[0]) + rng.normal(0, 2)
+              for cusip in cusips}
+    for cusip, price in prices.items():
+        curve.update_quote(cusip, price)
+
+    rebuilt = CreditYieldCurve(BOND_DATA)
+    rebuilt.load_and_sort_data()
+    for cusip, price in prices.items():
+        rebuilt.df.loc[rebuilt.df['CUSIP'] == cusip, 'Ask Price'] = price
+    rebuilt.calculate_yield()
+    rebuilt.construct_yc(method=method, extrapolation='extend')
+
+    np.testing.assert_allclose(curve.df['Yield'], rebuilt.df['Yield'], rtol=1e-12)
+    np.testing.assert_allclose(curve.yc_df['Yield'], rebuilt.yc_df['Yield'], atol=1e-12)
+    times = np.linspace(0, 40, 401)
+    np.testing.assert_allclose(curve.yield_at(times), rebuilt.yield_at(times), atol=1e-12)
+
+
+def test_unknown_cusip(evaluation_date):
+    with pytest.raises(KeyError):
+        _built('linear').update_quote('NOT A CUSIP', 100.0)
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from credit_yield_curve.credit_yield_curve.interpolation import METHODS, YieldCurve
+
+GRID = np.linspace(0, 40, 801)
+
+
+def _knots(seed=0):
+    rng = np.random.default_rng(seed)
+    times = np.sort(rng.uniform(0.1, 30, 25))
+    # Two points share a time, so their knot holds the average
+    times[7] = times[6]
+    return times, 0.04 + 0.01 * np.log1p(times) + rng.normal(0, 0.001, len(times))
+
+
+def test_linear_matches_numpy():
+    times, yields = _knots()
+    curve = YieldCurve(times, yields)
+
+    knots = np.unique(times)
+    averaged = [yields[times == knot].mean() for knot in knots]
+    np.testing.assert_allclose(curve(GRID), np.interp(GRID, knots, averaged), rtol=1e-14)
+
+
+@pytest.mark.parametrize('method', ['linear', 'log_linear', 'monotone_cubic'])
+def test_interpolating_methods_pass_through_the_knots(method):
+    times, yields = _knots()
+    curve = YieldCurve(times, yields, method)
+
+    np.testing.assert_allclose(curve(curve.times), curve.yields, rtol=1e-12)
+
+
+def test_monotone_cubic_does_not_overshoot():
+    times = np.array([1.0, 2, 3, 5, 7, 10, 20, 30])
+    yields = np.array([0.01, 0.02, 0.021, 0.021, 0.03, 0.05, 0.051, 0.052])
+    values = YieldCurve(times, yields, 'monotone_cubic')(np.linspace(1, 30, 2_000))
+
+    assert np.all(np.diff(values) >= -1e-15)
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_updates_match_a_rebuild(method):
+    times, yields = _knots()
+    curve = YieldCurve(times, yields, method, 'extend')
+    rng = np.random.default_rng(1)
+    updated = yields.copy()
+    for position in [0, 6, 12, 12, len(times) - 1, 3]:
+        updated[position] += rng.normal(0, 0.002)
+        curve.update(position, updated[position])
+        np.testing.assert_allclose(curve(GRID), YieldCurve(times, updated, method, 'extend')(GRID), atol=1e-12)
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_update_reports_every_time_that_moved(method):
+    times, yields = _knots()
+    curve = YieldCurve(times, yields, method)
+    before = curve(GRID)
+
+    low, high = curve.update(12, yields[12] + 0.005)
+    moved = GRID[np.abs(curve(GRID) - before) > 0]
+    assert np.all((moved >= low) & (moved <= high))
+
+
+def test_points_leaving_and_joining_the_knots():
+    times, yields = _knots()
+    curve = YieldCurve(times, yields)
+    updated = yields.copy()
+
+    updated[5] = np.nan
+    assert curve.update(5, np.nan) == (-np.inf, np.inf)
+    np.testing.assert_allclose(curve(GRID), YieldCurve(times, updated)(GRID), rtol=1e-14)
+
+    updated[5] = 0.05
+    curve.update(5, 0.05)
+    np.testing.assert_allclose(curve(GRID), YieldCurve(times, updated)(GRID), rtol=1e-14)
+
+
+def test_extrapolation():
+    times, yields = np.array([1.0, 2.0, 5.0]), np.array([0.03, 0.04, 0.05])
+
+    np.testing.assert_allclose(YieldCurve(times, yields)([0.5, 10]), [0.03, 0.05])
+    np.testing.assert_allclose(YieldCurve(times, yields, extrapolation='extend')([0.5, 8]), [0.025, 0.06])
+    assert np.isnan(YieldCurve(times, yields, extrapolation='nan')([10])).all()
+    with pytest.raises(ValueError):
+        YieldCurve(times, yields, extrapolation='raise')([10])
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+import QuantLib as ql
+
+from bond_pricing.bond_pricing.book import BondBook
+from bond_pricing.bond_pricing.ladder import CashFlowLadder
+
+AS_OF = '2012-06-15'
+
+
+@pytest.fixture
+def ladder(bonds):
+    bonds, _ = bonds
+    return CashFlowLadder.from_book(BondBook.from_bonds(bonds))
+
+
+def test_flows_match_quantlib(bonds, ladder):
+    bonds, rates = bonds
+    flows = ladder.to_frame()
+
+    for i, (bond, rate) in enumerate(zip(bonds, rates)):
+        quantlib_bond = bond.quantlib_bond(rate).bond
+        settlement = quantlib_bond.settlementDate()
+        expected = [(np.datetime64(cash_flow.date().ISO()), cash_flow.amount(), ql.as_coupon(cash_flow) is None)
+                    for cash_flow in quantlib_bond.cashflows() if cash_flow.date() > settlement]
+        # QuantLib pays the last coupon and the redemption as two flows on the same date
+        dates = sorted({date for date, _, _ in expected})
+        coupons = [sum(amount for day, amount, redemption in expected if day == date and not redemption)
+                   for date in dates]
+        principals = [sum(amount for day, amount, redemption in expected if day == date and redemption)
+                      for date in dates]
+
+        mine = flows[flows['bond'] == i]
+        np.testing.assert_array_equal(mine['date'].to_numpy(dtype='datetime64[D]'),
+                                      np.array(dates, dtype='datetime64[D]'))
+        # Stub coupons go through a different but equal year fraction
+        np.testing.assert_allclose(mine['coupon'], coupons, rtol=1e-10)
+        np.testing.assert_allclose(mine['principal'], principals, rtol=1e-12)
+
+
+@pytest.mark.parametrize('frequency, period', [('D', 'D'), ('W', 'W-SUN'), ('M', 'M'), ('Q', 'Q'), ('Y', 'Y')])
+def test_calendar_buckets_match_summed_flows(ladder, frequency, period):
+    flows = ladder.to_frame()
+    flows = flows[flows['date'] > np.datetime64(AS_OF)]
+    starts = flows['date'].dt.to_period(period).dt.start_time.rename('date')
+    expected = flows.groupby(starts)[['coupon', 'principal']].sum()
+
+    buckets = ladder.bucket(frequency, as_of=AS_OF)
+    np.testing.assert_array_equal(buckets.index.to_numpy(dtype='datetime64[D]'),
+                                  expected.index.to_numpy(dtype='datetime64[D]'))
+    np.testing.assert_allclose(buckets[['coupon', 'principal']], expected, rtol=1e-12)
+    np.testing.assert_allclose(buckets['total'], expected.sum(axis=1), rtol=1e-12)
+
+
+def test_tenor_buckets_and_present_values_match_summed_flows(bonds, ladder):
+    _, rates = bonds
+    tenors = [0.5, 1, 2, 5, 10, 30]
+    flows = ladder.to_frame()
+    flows = flows[flows['date'] > np.datetime64(AS_OF)]
+    years = (flows['date'].to_numpy(dtype='datetime64[D]') - np.datetime64(AS_OF, 'D')).astype(np.float64) / 365.25
+    amounts = flows['coupon'] + flows['principal']
+    present_values = amounts * (1 + rates[flows['bond']] / 2) ** (-2 * years)
+
+    buckets = ladder.bucket(tenors=tenors, as_of=AS_OF, discount_rate=rates)
+    ends = np.append(np.round(np.array(tenors) * 365.25) / 365.25, np.inf)
+    band = np.searchsorted(ends, years - 1e-12)
+    np.testing.assert_allclose(buckets['total'], np.bincount(band, amounts, len(ends)), rtol=1e-12)
+    np.testing.assert_allclose(buckets['present_value'], np.bincount(band, present_values, len(ends)), rtol=1e-12)
+    assert buckets['total'].sum() == pytest.approx(amounts.sum(), rel=1e-12)
@@ -0,0 +1,43 @@
+import json
+
+from Pricing_API.load_generator import RequestBodies
+from Pricing_API.models import BondInput
+
+
+def _keys(bodies, indices):
+    return [json.dumps(bodies[index], sort_keys=True) for index in indices]
+
+
+def test_new_bonds_across_blocks():
+    bodies = RequestBodies()
+    indices = range(2 * RequestBodies.BLOCK_SIZE + 10)
+
+    assert len(set(_keys(bodies, indices))) == len(indices)
+    # Going back to an earlier block regenerates the same bodies
+    first = bodies[5]
+    bodies[3 * RequestBodies.BLOCK_SIZE]
+    assert bodies[5] == first
+    BondInput(**first)
+
+
+def test_new_batches_across_blocks():
+    bodies = RequestBodies(per_request=3)
+    indices = [0, 1, RequestBodies.BLOCK_SIZE - 1, RequestBodies.BLOCK_SIZE, RequestBodies.BLOCK_SIZE + 1]
+
+    batches = [bodies[index] for index in indices]
+    assert all(len(batch) == 3 for batch in batches)
+    bonds = [json.dumps(bond, sort_keys=True) for batch in batches for bond in batch]
+    assert len(set(bonds)) == len(bonds)
+
+
+def test_distinct_bodies_cycle():
+    bodies = RequestBodies(per_request=2, distinct=7)
+
+    # Seven bonds make three whole batches of two
+    assert _keys(bodies, range(3)) == _keys(bodies, range(3, 6)) == _keys(bodies, range(3000, 3003))
+    assert len(set(_keys(bodies, range(3)))) == 3
+    assert _keys(RequestBodies(distinct=5), range(5)) == _keys(RequestBodies(distinct=5), range(5, 10))
+
+
+def test_seeds_give_different_bonds():
+    assert _keys(RequestBodies(seed=0), range(10)) != _keys(RequestBodies(seed=1), range(10))
@@ -0,0 +1,43 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import Pricing_API.main as api
+from Pricing_API.workers import _measured
+from bond_pricing.bond_pricing.metrics import registry as metrics
+
+
+@pytest.fixture
+def recording():
+    enabled = metrics.enabled
+    metrics.enable()
+    metrics.drain()
+    yield
+    metrics.drain()
+    metrics.enable(enabled)
+
+
+def _failing():
+    with metrics.stage('bond', 'construction'):
+        pass
+    raise RuntimeError('pricing failed')
+
+
+def test_unhandled_exceptions_are_counted(recording, monkeypatch):
+    def failing(*args):
+        raise RuntimeError('pricing failed')
+
+    monkeypatch.setattr(api.market_data, 'publish', failing)
+    with TestClient(api.app, raise_server_exceptions=False) as client:
+        assert client.put('/market_data', json={'discount_curve': {}, 'risk_free_curve': {}}).status_code == 500
+
+    counters = metrics.drain()['counters']
+    labels = (('path', '/market_data'), ('status', 500))
+    assert counters[('http_requests_total', labels)] == 1
+    assert counters[('http_errors_total', labels)] == 1
+
+
+def test_failed_calls_do_not_leak_stage_metrics(recording):
+    with pytest.raises(RuntimeError):
+        _measured(_failing)
+
+    assert metrics.drain() == {'counters': {}, 'histograms': {}}
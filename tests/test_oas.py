@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+import QuantLib as ql
+
+from credit_yield_curve.credit_yield_curve.oas import HullWhiteTree, calculate_oas, lattice_cash_flows
+
+RATE = 0.04
+MEAN_REVERSION = 0.03
+VOLATILITY = 0.01
+STEPS_PER_YEAR = 48
+
+
+@pytest.fixture(scope='module')
+def tree():
+    return HullWhiteTree(lambda times: np.exp(-RATE * times), 10, MEAN_REVERSION, VOLATILITY, STEPS_PER_YEAR)
+
+
+def _quantlib_price(evaluation_date, sign, first_exercise):
+    """
+    Prices a 10 year 6% bond with a par option exercisable monthly from the first exercise date on QuantLib's
+    Hull-White tree, with year fractions that match the tree's grid.
+    """
+    day_count = ql.SimpleDayCounter()
+    curve = ql.YieldTermStructureHandle(ql.FlatForward(evaluation_date, RATE, day_count, ql.Continuous,
+                                                       ql.NoFrequency))
+    maturity = evaluation_date + ql.Period(10, ql.Years)
+    schedule = ql.Schedule(evaluation_date, maturity, ql.Period(ql.Semiannual), ql.NullCalendar(), ql.Unadjusted,
+                           ql.Unadjusted, ql.DateGeneration.Backward, False)
+    callabilities = ql.CallabilitySchedule()
+    date = evaluation_date + ql.Period(first_exercise, ql.Years)
+    while date < maturity:
+        callabilities.append(ql.Callability(ql.BondPrice(100, ql.BondPrice.Clean),
+                                            ql.Callability.Call if sign > 0 else ql.Callability.Put, date))
+        date = date + ql.Period(1, ql.Months)
+    bond = ql.CallableFixedRateBond(0, 100, schedule, [0.06], day_count, ql.Unadjusted, 100, evaluation_date,
+                                    callabilities)
+    bond.setPricingEngine(ql.TreeCallableFixedRateBondEngine(ql.HullWhite(curve, MEAN_REVERSION, VOLATILITY),
+                                                             10 * STEPS_PER_YEAR))
+    return bond.dirtyPrice()
+
+
+def test_bullet_reprices_the_curve(tree):
+    flows, strikes, signs, _ = lattice_cash_flows(tree, [10.0], [0.06])
+    price, _ = tree.rollback(flows, strikes, signs, [0.0])
+
+    expected = sum(3 * np.exp(-RATE * 0.5 * k) for k in range(1, 21)) + 100 * np.exp(-RATE * 10)
+    np.testing.assert_allclose(price, expected, rtol=1e-10)
+
+
+@pytest.mark.parametrize('sign', [1, -1])
+def test_matches_quantlib_tree(tree, evaluation_date, sign):
+    flows, strikes, signs, _ = lattice_cash_flows(tree, [10.0], [0.06], [3.0], [sign])
+    price, _ = tree.rollback(flows, strikes, signs, [0.0])
+
+    assert price[0] == pytest.approx(_quantlib_price(evaluation_date, sign, 3), abs=0.02)
+
+
+def test_duration_is_the_price_sensitivity(tree):
+    flows, strikes, signs, _ = lattice_cash_flows(tree, [10.0], [0.06], [3.0], [1])
+    price, slope = tree.rollback(flows, strikes, signs, [0.01])
+    up, _ = tree.rollback(flows, strikes, signs, [0.01 + 1e-7])
+    down, _ = tree.rollback(flows, strikes, signs, [0.01 - 1e-7])
+
+    np.testing.assert_allclose(slope, (up - down) / 2e-7, rtol=1e-5)
+
+
+def test_oas_reprices_the_market_price(tree):
+    maturity, coupon, price = [10.0, 10.0, 10.0], [0.06, 0.06, 0.06], [101.0, 101.0, 101.0]
+    oas, duration, convexity = calculate_oas(tree, maturity, coupon, price, [np.nan, 3.0, 3.0], [0, 1, -1])
+
+    flows, strikes, signs, accrued = lattice_cash_flows(tree, maturity, coupon, [np.nan, 3.0, 3.0], [0, 1, -1])
+    np.testing.assert_allclose(tree.rollback(flows, strikes, signs, oas)[0], np.add(price, accrued), atol=1e-7)
+    # The call is worth something to the issuer and the put to the holder
+    assert oas[1] < oas[0] < oas[2]
+    assert np.all(duration > 0)
+
+
+def test_convexity_is_stable_in_the_bump(tree):
+    # A callable near the money: the default bump is wide enough that the exercise kinks do not flip the sign
+    convexities = [calculate_oas(tree, [10.0], [0.06], [101.0], [3.0], [1], bump=bump)[2][0]
+                   for bump in (0.0025, 0.005, 0.01)]
+
+    assert max(convexities) < 0
+    np.testing.assert_allclose(convexities, convexities[0], rtol=0.1)
+
+
+def test_option_without_date_is_exercisable_from_the_next_step(tree):
+    prices = [tree.rollback(*lattice_cash_flows(tree, [10.0], [0.06], [option_time], [sign])[:3], [0.0])[0][0]
+              for option_time, sign in [(np.nan, -1), (0.0, -1), (np.nan, 0)]]
+
+    assert prices[0] == prices[1]
+    assert prices[0] > prices[2]
@@ -0,0 +1,59 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from jtd_calculator import JtdCalculator, calculate_jtd_arrays, jtd_columns, portfolio_jtd
+
+
+@pytest.fixture
+def bonds(bond_data):
+    """
+    The bonds of bond_data.csv and one bond for every combination of the JtdCalculator branches.
+    """
+    combinations = pd.DataFrame(list(itertools.product(
+        [5e8, 1e9, 2e9], [0.03, 0.05, 0.07], ['AT MATURITY', 'Callable', 'Putable', 'CALLABLE'],
+        ['AAA', 'AA', 'A-', 'BBB', 'B', 'CCC', 'NR', np.nan])),
+        columns=['Issued Amount', 'Cpn', 'Maturity Type', 'Composite Rating'])
+    combinations['Ticker'] = np.where(np.arange(len(combinations)) % 2, 'IBM', 'AAPL')
+    return pd.concat([bond_data, combinations], ignore_index=True)
+
+
+def _per_row(bonds, default_prob=None):
+    calculators = [JtdCalculator(row['Issued Amount'], row['Cpn'], row['Maturity Type'], row['Composite Rating'],
+                                 default_prob) for _, row in bonds.iterrows()]
+    return (np.array([calculator.lgd for calculator in calculators]),
+            np.array([calculator.default_prob for calculator in calculators]),
+            np.array([calculator.jtd for calculator in calculators]))
+
+
+@pytest.mark.parametrize('default_prob', [None, 0.03])
+def test_arrays_match_jtd_calculator(bonds, default_prob):
+    actual = calculate_jtd_arrays(bonds['Issued Amount'], bonds['Cpn'], bonds['Maturity Type'],
+                                  bonds['Composite Rating'], default_prob)
+
+    for expected, values in zip(_per_row(bonds, default_prob), actual):
+        np.testing.assert_array_equal(values, expected)
+
+
+def test_columns_match_jtd_calculator(bonds):
+    columns = jtd_columns(bonds)
+
+    for name, expected in zip(['LGD', 'Default Prob', 'JTD'], _per_row(bonds)):
+        np.testing.assert_array_equal(columns[name], expected)
+    assert columns.index.equals(bonds.index)
+
+
+def test_portfolio_nets_long_and_short_positions(bonds):
+    bonds['Position'] = np.where(np.arange(len(bonds)) % 3 == 0, -1.0, 1.0)
+    totals = portfolio_jtd(bonds, position='Position').set_index(['Ticker', 'Rating Bucket'])
+
+    rows = jtd_columns(bonds)
+    short = bonds['Position'] < 0
+    for (ticker, bucket), group in rows.groupby([bonds['Ticker'], rows['Rating Bucket']]):
+        total = totals.loc[(ticker, bucket)]
+        assert total['Long JTD'] == pytest.approx(group['JTD'][~short].sum(), rel=1e-12)
+        assert total['Short JTD'] == pytest.approx(group['JTD'][short].sum(), rel=1e-12)
+        assert total['Net JTD'] == pytest.approx(total['Long JTD'] - total['Short JTD'], rel=1e-12)
+    assert totals[['Long JTD', 'Short JTD']].to_numpy().sum() == pytest.approx(rows['JTD'].sum(), rel=1e-12)
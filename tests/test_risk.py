@@ -0,0 +1,39 @@
+import numpy as np
+import QuantLib as ql
+
+from bond_pricing.bond_pricing.book import BondBook
+from bond_pricing.bond_pricing.risk import KEY_RATE_TENORS, calculate_key_rate_durations, calculate_risk
+
+
+def test_matches_quantlib(bonds, evaluation_date):
+    bonds, rates = bonds
+    risk = calculate_risk(BondBook.from_bonds(bonds), rates)
+
+    for i, (bond, rate) in enumerate(zip(bonds, rates)):
+        cached = bond.quantlib_bond(float(rate))
+        ytm = ql.InterestRate(risk.ytm[i], cached.day_count, ql.Compounded, ql.Semiannual)
+        assert abs(risk.ytm[i] - cached.bond.bondYield(cached.day_count, ql.Compounded, ql.Semiannual)) < 1e-8
+        assert abs(risk.modified_duration[i] - ql.BondFunctions.duration(cached.bond, ytm, ql.Duration.Modified)) \
+            < 1e-10
+        assert abs(risk.macaulay_duration[i] - ql.BondFunctions.duration(cached.bond, ytm, ql.Duration.Macaulay)) \
+            < 1e-10
+        assert abs(risk.convexity[i] - ql.BondFunctions.convexity(cached.bond, ytm)) < 1e-8
+        np.testing.assert_allclose(risk.dirty_price[i], cached.bond.dirtyPrice() * bond.face_value / 100,
+                                   rtol=1e-10)
+    np.testing.assert_allclose(risk.dv01, risk.modified_duration * risk.dirty_price * 1e-4)
+
+
+def test_key_rate_durations_add_up_to_modified_duration(bonds):
+    bonds, rates = bonds
+    book = BondBook.from_bonds(bonds)
+    durations = calculate_key_rate_durations(book, rates)
+
+    assert durations.shape == (len(bonds), len(KEY_RATE_TENORS))
+    assert np.all(durations >= 0)
+    np.testing.assert_allclose(durations.sum(axis=1), calculate_risk(book, rates).modified_duration, rtol=1e-12)
+    # Nothing is paid after 30 years
+    assert np.all(durations[:, np.asarray(KEY_RATE_TENORS) > 31] == 0)
+
+
+def test_key_rate_tenors_are_the_curve_grid():
+    np.testing.assert_allclose(KEY_RATE_TENORS, (1 / 12, 3 / 12, 6 / 12, 1, 2, 3, 5, 7, 10, 20, 30, 50, 70))
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+import QuantLib as ql
+
+from bond_pricing.bond_pricing.book import BondBook
+from bond_pricing.bond_pricing.scenarios import calculate_scenario_pnl, shock_grid, shock_shapes
+
+PARALLEL = (-100.0, 0.0, 25.0, 200.0)
+
+
+def _dirty_value(bond, price):
+    # QuantLib prices per 100 face, at the settlement date
+    return price * bond.face_value / 100
+
+
+def test_parallel_shocks_match_a_quantlib_reprice(bonds):
+    bonds, rates = bonds
+    pnl = calculate_scenario_pnl(BondBook.from_bonds(bonds), shock_grid(parallel=PARALLEL), discount_rate=rates)
+
+    for i, (bond, rate) in enumerate(zip(bonds, rates)):
+        cached = bond.quantlib_bond(rate)
+        base = _dirty_value(bond, cached.bond.dirtyPrice())
+        np.testing.assert_allclose(pnl.base_value[i], base, rtol=1e-10)
+        for j, shift in enumerate(PARALLEL):
+            cached.set_discount_rate(rate + shift * 1e-4)
+            shocked = _dirty_value(bond, cached.bond.dirtyPrice())
+            np.testing.assert_allclose(pnl.values[i, j], shocked - base, rtol=1e-9, atol=1e-9 * base)
+
+
+def test_parallel_shocks_on_a_curve_match_a_quantlib_reprice(bonds):
+    bonds, rates = bonds
+    level = 0.045
+    pnl = calculate_scenario_pnl(BondBook.from_bonds(bonds), shock_grid(parallel=PARALLEL),
+                                 curve=lambda times: np.full_like(times, level))
+
+    for i, bond in enumerate(bonds):
+        cached = bond.quantlib_bond(rates[i])
+
+        def value(ytm):
+            return _dirty_value(bond, cached.bond.dirtyPrice(ytm, cached.day_count, ql.Compounded, ql.Semiannual))
+
+        for j, shift in enumerate(PARALLEL):
+            expected = value(level + shift * 1e-4) - value(level)
+            np.testing.assert_allclose(pnl.values[i, j], expected, rtol=1e-9, atol=1e-9 * value(level))
+
+
+@pytest.mark.parametrize('max_bytes', [2 ** 12, 256 * 2 ** 20])
+def test_shaped_shocks_match_a_flow_by_flow_reprice(bonds, max_bytes):
+    bonds, rates = bonds
+    book = BondBook.from_bonds(bonds)
+    scenarios = shock_grid(parallel=(0.0, 50.0), twist=(-30.0, 40.0), butterfly=(0.0, 25.0))
+    pnl = calculate_scenario_pnl(book, scenarios, discount_rate=rates, max_bytes=max_bytes)
+
+    rows, amounts, _, curve_times, settlement_time, _ = book._build_schedule()
+    sizes = np.stack([scenarios[field] for field in scenarios.dtype.names], axis=1) * 1e-4
+    for i, rate in enumerate(rates):
+        times = curve_times[rows == i] - settlement_time[i]
+        flows = amounts[rows == i]
+        base = np.sum(flows * np.exp(-rate * times))
+        for j, size in enumerate(sizes):
+            shocked = np.sum(flows * np.exp(-(rate + size @ shock_shapes(times)) * times))
+            np.testing.assert_allclose(pnl.values[i, j], shocked - base, rtol=1e-10, atol=1e-10 * base)
+
+
+def test_float32_results(bonds):
+    bonds, rates = bonds
+    book = BondBook.from_bonds(bonds)
+    scenarios = shock_grid(parallel=PARALLEL, twist=(-25.0, 25.0))
+    full = calculate_scenario_pnl(book, scenarios, discount_rate=rates)
+    single = calculate_scenario_pnl(book, scenarios, discount_rate=rates, dtype=np.float32)
+
+    assert single.values.dtype == np.float32
+    np.testing.assert_allclose(single.values, full.values, rtol=1e-6, atol=1e-6 * full.base_value.max())
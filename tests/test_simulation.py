@@ -0,0 +1,42 @@
+import numpy as np
+
+from jtd_calculator import simulate_losses, simulate_portfolio_losses
+from jtd_calculator.portfolio import calculate_jtd_arrays
+
+
+def _portfolio(count=500, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0.001, 0.05, count), rng.uniform(1, 10, count), rng.integers(0, 60, count)
+
+
+def test_memory_budget_does_not_change_the_losses():
+    default_prob, loss_amount, obligors = _portfolio()
+    kwargs = dict(obligors=obligors, paths=30_000, seed=7, chunk_size=10_000, workers=0)
+
+    losses = simulate_losses(default_prob, loss_amount, **kwargs).losses
+    # About 20 paths per block
+    blocked = simulate_losses(default_prob, loss_amount, max_bytes=60_000, **kwargs).losses
+
+    np.testing.assert_array_equal(losses, blocked)
+
+
+def test_expected_loss_matches_default_probabilities():
+    default_prob, loss_amount, obligors = _portfolio()
+    distribution = simulate_losses(default_prob, loss_amount, obligors=obligors, correlation=0.3, paths=200_000,
+                                   seed=1, workers=0)
+
+    expected = default_prob @ loss_amount
+    standard_error = distribution.losses.std() / np.sqrt(len(distribution.losses))
+    assert abs(distribution.expected_loss() - expected) < 4 * standard_error
+    assert distribution.var(0.99) <= distribution.expected_shortfall(0.99)
+
+
+def test_portfolio_default_prob_override(bond_data):
+    df = bond_data
+    lgd, _, _ = calculate_jtd_arrays(df['Issued Amount'].to_numpy(), df['Cpn'].to_numpy(),
+                                     df['Maturity Type'].to_numpy(), df['Composite Rating'].to_numpy())
+    distribution = simulate_portfolio_losses(df, default_prob=0.0, paths=1_000, seed=1, workers=0)
+    assert distribution.expected_loss() == 0
+
+    distribution = simulate_portfolio_losses(df, default_prob=1.0, paths=1_000, seed=1, workers=0)
+    np.testing.assert_allclose(distribution.losses, df['Issued Amount'].to_numpy() @ lgd / 100)
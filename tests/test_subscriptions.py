@@ -0,0 +1,83 @@
+import asyncio
+import datetime
+
+from Pricing_API.market_data import MarketDataStore
+from Pricing_API.models import BondInput
+from Pricing_API.subscriptions import SubscriptionHub
+from credit_yield_curve.credit_yield_curve.interpolation import TENORS
+
+
+class GatedPool:
+    """
+    Prices in process, holding every pricing job until the test opens the gate.
+    """
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def map(self, fn, args_list):
+        for args in args_list:
+            await self.gate.wait()
+            yield fn(*args)
+
+
+def _bond(maturity=10.0):
+    issue_date = datetime.datetime(2024, 1, 2)
+    maturity_date = issue_date + datetime.timedelta(days=round(maturity * 365.25))
+    return BondInput(bond_type='Corporate', face_value=1000, coupon_rate=0.05, maturity=maturity,
+                     issue_date=issue_date, maturity_date=maturity_date)
+
+
+async def _settle():
+    """
+    Waits for the reprices the hub scheduled on its own.
+    """
+    await asyncio.gather(*(asyncio.all_tasks() - {asyncio.current_task()}))
+
+
+def _publish(market_data, rate):
+    market_data.publish({tenor: rate + 0.005 for tenor in TENORS}, {tenor: rate for tenor in TENORS})
+
+
+def test_publish_during_subscribe_reprices_the_new_bond():
+    async def scenario():
+        pool, market_data = GatedPool(), MarketDataStore()
+        hub = SubscriptionHub(pool, market_data)
+        subscriber = hub.connect()
+
+        pool.gate.clear()
+        subscribing = asyncio.ensure_future(hub.subscribe(subscriber, {'a': _bond()}))
+        await asyncio.sleep(0)
+        _publish(market_data, 0.05)
+        await hub.market_data_changed()
+        pool.gate.set()
+        await subscribing
+        await _settle()
+
+        messages, updates, _ = await subscriber.take()
+        return updates['a']['version'], market_data.snapshot.version
+
+    version, current = asyncio.run(scenario())
+    assert version == current == 2
+
+
+def test_older_prices_do_not_replace_newer_ones():
+    async def scenario():
+        pool, market_data = GatedPool(), MarketDataStore()
+        hub = SubscriptionHub(pool, market_data)
+        first, second = hub.connect(), hub.connect()
+
+        # The first subscriber's pricing against version 1 finishes after the second's against version 2
+        pool.gate.clear()
+        slow = asyncio.ensure_future(hub.subscribe(first, {'a': _bond()}))
+        await asyncio.sleep(0)
+        _publish(market_data, 0.05)
+        pool.gate.set()
+        await hub.subscribe(second, {'a': _bond()})
+        await slow
+        await _settle()
+
+        return [(await subscriber.take())[1]['a']['version'] for subscriber in (first, second)]
+
+    assert asyncio.run(scenario()) == [2, 2]
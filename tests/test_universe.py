@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bond_pricing.bond_pricing.book import BondBook
+from bond_pricing.bond_pricing.universe import BondUniverse, _day_numbers
+from credit_yield_curve.credit_yield_curve.bond_data import load_bond_data
+from .conftest import BOND_DATA
+
+RATES = np.linspace(0.01, 0.08, 33)
+
+
+@pytest.fixture(autouse=True)
+def bond_data_cache(monkeypatch, tmp_path):
+    monkeypatch.setenv('BOND_DATA_CACHE', str(tmp_path / 'cache'))
+
+
+def test_day_numbers_keep_missing_dates_missing():
+    days = _day_numbers(pd.Series(['1/2/2020', None, '3/4/2030', '#N/A Field Not Applicable']), '%m/%d/%Y')
+
+    np.testing.assert_array_equal(days.view('datetime64[D]'),
+                                  np.array(['2020-01-02', 'NaT', '2030-03-04', 'NaT'], dtype='datetime64[D]'))
+
+
+def test_from_frame_matches_the_bond_data_columns(bond_data):
+    cached = load_bond_data(BOND_DATA)
+    universe = BondUniverse.from_frame(bond_data)
+
+    for frame in (bond_data, cached):
+        other = BondUniverse.from_frame(frame)
+        np.testing.assert_array_equal(other.cusip, universe.cusip)
+        for name, values in universe.columns.items():
+            np.testing.assert_array_equal(other.column(name), universe.column(name))
+
+    issue = cached['Issue Date'].to_numpy(dtype='datetime64[D]')
+    maturity = cached['Maturity'].to_numpy(dtype='datetime64[D]')
+    book = BondBook(cached['Issued Amount'], cached['Cpn'] / 100, (maturity - issue).astype(np.float64) / 365.25,
+                    issue, maturity)
+    for expected, actual in zip(book.calculate_npv_ytm(RATES), universe.to_book().calculate_npv_ytm(RATES)):
+        np.testing.assert_array_equal(actual, expected)
+    np.testing.assert_array_equal(universe.to_book().calculate_duration(RATES), book.calculate_duration(RATES))
+
+
+def test_to_book_matches_its_bonds(bond_data):
+    universe = BondUniverse.from_frame(bond_data)
+    book = BondBook.from_bonds([universe.bond(i) for i in range(len(universe))])
+
+    for expected, actual in zip(book.calculate_npv_ytm(RATES), universe.to_book().calculate_npv_ytm(RATES)):
+        np.testing.assert_allclose(actual, expected, rtol=1e-12)
+
+
+@pytest.mark.parametrize('column', ['Issue Date', 'Maturity'])
+@pytest.mark.parametrize('missing', ['', '#N/A Field Not Applicable'])
+def test_missing_dates_are_refused(bond_data, tmp_path, column, missing):
+    bond_data = bond_data.astype({column: object})
+    bond_data.loc[4, column] = missing or None
+    path = tmp_path / 'bonds.csv'
+    bond_data.to_csv(path, index=False)
+
+    for frame in (bond_data, pd.read_csv(path), load_bond_data(str(path))):
+        with pytest.raises(ValueError, match=f"{bond_data.loc[4, 'CUSIP']} has no {column}"):
+            BondUniverse.from_frame(frame)
+
+
+def test_slices_filters_and_lookups(bond_data):
+    universe = BondUniverse.from_frame(bond_data)
+
+    view = universe[2:10]
+    assert np.shares_memory(view.columns['face_value'], universe.columns['face_value'])
+    ibm = universe.filter(ticker='IBM', maturity_type='AT MATURITY')
+    expected = bond_data[(bond_data['Ticker'] == 'IBM') & (bond_data['Maturity Type'] == 'AT MATURITY')]
+    np.testing.assert_array_equal(ibm.cusip, expected['CUSIP'])
+    np.testing.assert_array_equal(universe.rows(expected['CUSIP'][::-1]), expected.index[::-1])
+    with pytest.raises(KeyError):
+        universe.rows(['NOT A CUSIP'])
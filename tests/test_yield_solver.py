@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+import QuantLib as ql
+
+from credit_yield_curve.credit_yield_curve import yield_solver
+from credit_yield_curve.credit_yield_curve.yield_solver import bond_yields
+
+
+def _quantlib_yields(evaluation_date, maturities, coupons, prices):
+    return np.array([yield_solver._quantlib_yield(evaluation_date, ql.DateParser.parseISO(str(maturity)), coupon,
+                                                  price)
+                     for maturity, coupon, price in zip(maturities, coupons, prices)])
+
+
+@pytest.fixture
+def fallbacks(monkeypatch):
+    """
+    Records the bonds handed to the QuantLib fallback.
+    """
+    calls = []
+    solve = yield_solver._quantlib_yield
+
+    def recording(*args):
+        calls.append(args)
+        return solve(*args)
+
+    monkeypatch.setattr(yield_solver, '_quantlib_yield', recording)
+    return calls
+
+
+def test_matches_quantlib_without_fallback(evaluation_date, fallbacks):
+    rng = np.random.default_rng(0)
+    count = 300
+    maturities = np.datetime64('2025-03-01') + rng.integers(0, 30 * 365, count).astype('timedelta64[D]')
+    coupons = rng.uniform(0.0, 0.1, count)
+    prices = rng.uniform(70, 130, count)
+
+    expected = _quantlib_yields(evaluation_date, maturities, coupons, prices)
+    fallbacks.clear()
+    yields = bond_yields(evaluation_date, maturities, coupons, prices)
+
+    np.testing.assert_allclose(yields, expected, rtol=0, atol=1e-8)
+    assert fallbacks == []
+
+
+def test_root_on_a_bracket_bound_converges(evaluation_date, fallbacks):
+    # Priced at the solver's starting yield, so the first iterate is the root and becomes a bracket bound: the
+    # Newton step that stays there must count as converged instead of bisecting away from the root
+    maturities = np.array(['2030-06-15', '2045-11-30'], dtype='datetime64[D]')
+    flows = yield_solver.bond_cash_flows(evaluation_date, maturities, [0.05, 0.03])
+    discounted = flows.amounts * (1 + 0.05 / 2) ** (-2 * flows.times)
+    prices = np.bincount(flows.rows, weights=discounted, minlength=2) - flows.accrued
+
+    yields = bond_yields(evaluation_date, maturities, [0.05, 0.03], prices, max_iterations=5)
+
+    np.testing.assert_allclose(yields, 0.05, atol=1e-10)
+    assert fallbacks == []
+
+
+def test_yield_outside_bracket_falls_back_to_quantlib(evaluation_date, fallbacks):
+    maturities = np.array(['2025-02-18', '2030-06-15'], dtype='datetime64[D]')
+    coupons = np.array([0.0152, 0.05])
+    prices = np.array([60.29, 100.0])
+
+    yields = bond_yields(evaluation_date, maturities, coupons, prices)
+
+    assert len(fallbacks) == 1
+    np.testing.assert_allclose(yields, _quantlib_yields(evaluation_date, maturities, coupons, prices), rtol=1e-8,
+                               atol=1e-8)
+    assert yields[0] > 10
+
+
+def test_matured_bonds_get_nan(evaluation_date):
+    yields = bond_yields(evaluation_date, np.array(['2025-01-15', '2030-06-15'], dtype='datetime64[D]'),
+                         [0.05, 0.05], [100.0, 100.0])
+
+    assert np.isnan(yields[0]) and np.isfinite(yields[1])